@@ -1,16 +1,14 @@
-from pypdf import PdfReader
-from openpyxl import Workbook
+from felder import Feld, Vorlage
+from pdf_text import get_pages_parallel
+import protokoll
 from pathlib import Path
 import datetime
-import glob, os
+import glob, logging, os
 
 YEAR = str(datetime.date.today().year)
 ROW_SUM = "Summe"
 
-
-def get_pages(filename):
-    reader = PdfReader(filename)
-    return [page.extract_text() or "" for page in reader.pages]
+log = logging.getLogger("erdlinge.aag_erstattungen")
 
 
 def find_index(data, element):
@@ -20,87 +18,88 @@ def find_index(data, element):
     return -1
 
 
-def process(pdf_paths, year=YEAR, output_path=None):
-    erstattungen_u1 = {}
-    erstattungen_u2 = {}
-
-    print(f"Starte Verarbeitung von {len(pdf_paths)} PDF-Datei(en)...")
-    for pdf in pdf_paths:
-        print(f"Lese PDF: {pdf}")
-        text_pages = get_pages(pdf)
-        print(f"  {len(text_pages)} Seite(n) gefunden, werte aus...")
-        for page in text_pages:
-            if "Rückrechnung" in page:
-                continue
-            lines = page.split("\n")
-
-            vorname = " ".join(
-                [
-                    lines[idx + 1]
-                    for idx, line in enumerate(lines)
-                    if "Vorname Rentenversicherungsnummer" in line
-                ][0].split(" ")[:-1]
+def parse_eur(value: str):
+    return float(value.replace(" €", "").replace(".", "").replace(",", "."))
+
+
+SEITE = Vorlage(
+    vorname=Feld("Vorname Rentenversicherungsnummer", versatz=1, token=slice(None, -1)),
+    nachname=Feld("Name Pers.Nr.", versatz=1, token=slice(None, -1)),
+    summe=Feld("Summe Erstattungsbetrag", token=slice(2, None), parser=parse_eur),
+    betrag_im_monat=Feld(" im Monat ", teil="nach", parser=parse_eur),
+    u1=Feld("Arbeitsunfähigkeit - U1"),
+    mutterschaft=Feld("Mutterschaft - U2"),
+    beschaeftigungsverbot=Feld("Beschäftigungsverbot - U2"),
+    stornierung=Feld("X Stornierung"),
+    rueckrechnung=Feld("Rückrechnung"),
+)
+
+
+def parse_pages(pdf, text_pages, erstattungen_u1, erstattungen_u2):
+    """Wertet die Seiten eines PDFs aus und addiert die Erstattungen je Name und Datei.
+
+    Gibt die Anzahl der Seiten zurück.
+    """
+    page_count = 0
+    for page_count, page in enumerate(text_pages, 1):
+        felder = SEITE.lesen(page)
+        if felder.hat("rueckrechnung"):
+            continue
+        name = f"{felder['vorname']} {felder['nachname']}"
+
+        if felder.hat("u1"):
+            type = "U1"
+        elif felder.hat("mutterschaft") or felder.hat("beschaeftigungsverbot"):
+            type = "U2"
+        else:
+            raise OSError(
+                f"Konnte Seitentyp (U1/U2) nicht bestimmen (Datei: {pdf}). Bitte PDF prüfen."
             )
-            nachname = " ".join(
-                [
-                    lines[idx + 1]
-                    for idx, line in enumerate(lines)
-                    if "Name Pers.Nr." in line
-                ][0].split(" ")[:-1]
+        if felder.hat("mutterschaft"):
+            value_eur = felder["betrag_im_monat"]
+        else:
+            value_eur = felder["summe"]
+
+        if felder.hat("stornierung"):
+            value_eur = -value_eur
+        title = Path(pdf).stem
+
+        if type == "U1":
+            if name not in erstattungen_u1:
+                erstattungen_u1[name] = {}
+            erstattungen_u1[name][title] = (
+                erstattungen_u1[name][title] + value_eur
+                if title in erstattungen_u1[name]
+                else value_eur
             )
-            name = f"{vorname} {nachname}"
-
-            type = (
-                "U1"
-                if "Arbeitsunfähigkeit - U1" in page
-                else (
-                    "U2"
-                    if "Mutterschaft - U2" in page or "Beschäftigungsverbot - U2" in page
-                    else "TYPE ERROR"
-                )
+        else:
+            if name not in erstattungen_u2:
+                erstattungen_u2[name] = {}
+            erstattungen_u2[name][title] = (
+                erstattungen_u2[name][title] + value_eur
+                if title in erstattungen_u2[name]
+                else value_eur
             )
-            if type == "TYPE ERROR":
-                raise OSError(
-                    f"Konnte Seitentyp (U1/U2) nicht bestimmen (Datei: {pdf}). Bitte PDF prüfen."
-                )
-            value = ""
-            if "Mutterschaft - U2" in page:
-                value = [line for line in lines if " im Monat " in line][0].split(
-                    " im Monat "
-                )[1]
-            else:
-                value = " ".join(
-                    [line for line in lines if "Summe Erstattungsbetrag" in line][0].split(
-                        " "
-                    )[2:]
-                )
-            value_eur = float(value.replace(" €", "").replace(".", "").replace(",", "."))
-
-            if "X Stornierung" in page:
-                value_eur = -value_eur
-            title = Path(pdf).stem
-
-            if type == "U1":
-                if name not in erstattungen_u1:
-                    erstattungen_u1[name] = {}
-                erstattungen_u1[name][title] = (
-                    erstattungen_u1[name][title] + value_eur
-                    if title in erstattungen_u1[name]
-                    else value_eur
-                )
-            else:
-                if name not in erstattungen_u2:
-                    erstattungen_u2[name] = {}
-                erstattungen_u2[name][title] = (
-                    erstattungen_u2[name][title] + value_eur
-                    if title in erstattungen_u2[name]
-                    else value_eur
-                )
+    return page_count
+
+
+def process(pdf_paths, year=YEAR, output_path=None, workers=1):
+    erstattungen_u1 = {}
+    erstattungen_u2 = {}
+
+    log.info("Starte Verarbeitung von %d PDF-Datei(en)...", len(pdf_paths))
+    if workers > 1:
+        log.info("Lese PDFs parallel mit %d Prozess(en)...", workers)
+    pdfs = zip(pdf_paths, get_pages_parallel(pdf_paths, workers))
+    for pdf, text_pages in protokoll.iterate(pdfs, "PDFs ausgewertet", len(pdf_paths)):
+        log.info("Lese PDF: %s", pdf)
+        page_count = parse_pages(pdf, text_pages, erstattungen_u1, erstattungen_u2)
+        log.info("  %d Seite(n) ausgewertet", page_count)
 
     # summing up
-    print(
-        f"Bilde Summen: {len(erstattungen_u1)} Mitarbeiter (U1), "
-        f"{len(erstattungen_u2)} Mitarbeiter (U2)"
+    log.info(
+        "Bilde Summen: %d Mitarbeiter (U1), %d Mitarbeiter (U2)",
+        len(erstattungen_u1), len(erstattungen_u2),
     )
     for name in erstattungen_u1.keys():
         erstattungen_u1[name][ROW_SUM] = sum(erstattungen_u1[name].values())
@@ -109,7 +108,11 @@ def process(pdf_paths, year=YEAR, output_path=None):
 
     titles = [Path(x).stem for x in pdf_paths]
     outfile = output_path or f"AAG_Erstattungen_{year}.xlsx"
-    print(f"\nSchreibe Excel-Datei: {outfile}")
+    log.info("\nSchreibe Excel-Datei: %s", outfile)
+    protokoll.progress("Schreibe Excel-Datei")
+
+    # openpyxl erst beim Schreiben laden
+    from openpyxl import Workbook
 
     wb = Workbook()
     ws = wb.active
@@ -139,7 +142,7 @@ def process(pdf_paths, year=YEAR, output_path=None):
                 cell.number_format = "#,##0.00"
 
     wb.save(outfile)
-    print("...fertig geschrieben!")
+    log.info("...fertig geschrieben!")
     return outfile
 
 
@@ -159,10 +162,16 @@ if __name__ == "__main__":
         "--year", default=YEAR,
         help=f"Abrechnungsjahr (Standard: {YEAR})",
     )
+    ap.add_argument(
+        "--workers", type=int, default=1,
+        help="Anzahl paralleler Prozesse zum Lesen der PDFs (Standard: 1)",
+    )
+    protokoll.add_arguments(ap)
     args = ap.parse_args()
+    protokoll.setup_cli(args)
     pdfs = glob.glob(f"aag_erstattungen/{args.year}/*.pdf")
     if not pdfs:
-        print(f"Keine PDFs gefunden in: aag_erstattungen/{args.year}/")
+        log.error("Keine PDFs gefunden in: aag_erstattungen/%s/", args.year)
         exit(1)
-    print(f"{len(pdfs)} PDF(s) gefunden in: aag_erstattungen/{args.year}/")
-    process(pdfs, year=args.year)
+    log.info("%d PDF(s) gefunden in: aag_erstattungen/%s/", len(pdfs), args.year)
+    process(pdfs, year=args.year, workers=args.workers)
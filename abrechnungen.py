@@ -1,15 +1,16 @@
 from enum import unique
-from pypdf import PdfReader
-from dataclasses import dataclass, field
+from felder import Feld, Vorlage
+from pdf_text import get_pages_parallel
+import protokoll
+from dataclasses import dataclass
 from collections import OrderedDict
-import pandas as pd
-from pandas import DataFrame, ExcelWriter
 import datetime
-import numpy as np
-import glob, os, re
+import glob, logging, os, re
 
 YEAR = str(datetime.date.today().year)
 
+log = logging.getLogger("erdlinge.abrechnungen")
+
 AMZ = "Arbeitsmarktzulage"
 MZ = "Münchenzulage"
 FKZ = "Fahrten zw."
@@ -36,10 +37,6 @@ KRANKENKASSEN = ["Knappschaft",
                  "VIACTIV Krankenkasse",
                  "BARMER (vormals BARMER GEK)"]
 
-def get_pages(filename):
-    reader = PdfReader(filename)
-    return [page.extract_text() or "" for page in reader.pages]
-
 
 def parse_float(float_str_eu: str):
     return float(float_str_eu.replace(".", "").replace(",", "."))
@@ -51,61 +48,104 @@ def unique(lst: list):
     return [x for x in lst if not (x in seen or seen_add(x))]
 
 
-@dataclass
+GEHALTSABRECHNUNG = "Gehaltsabrechnung"
+RUECKRECHNUNG = "Rückrechnung"
+ABTEILUNG = " Abteilung"
+LOEHNE_START = "Kosten- Kosten- Lohn"
+LOEHNE_END = "GESAMTBRUTTO"
+
+def parse_gruppe_stufe(line: str):
+    parts = line.split("Grundvergütung")[-1].strip().split(" ")
+    return (
+        f"S{parts[1]}/{parts[3]}" if parts[0] == "S" else f"{parts[0]}/{parts[2]}"
+    )
+
+
+# Felder einer Seite; beim Anlegen einer Page werden nur die Anker gesucht
+SEITE = Vorlage(
+    month_year=Feld(GEHALTSABRECHNUNG, token=-1),
+    rueckrechnung=Feld(RUECKRECHNUNG),
+    name_zeile=Feld(PERSOENLICH_VERTRAULICH, versatz=1),
+    abteilung=Feld(ABTEILUNG, teil="vor"),
+    loehne_start=Feld(LOEHNE_START, versatz=2),
+    loehne_end=Feld(LOEHNE_END),
+    arbeitsmarktzulage=Feld(AMZ, token=2, parser=parse_float),
+    muenchenzulage=Feld(MZ, token=2, parser=parse_float),
+    fahrtkostenzuschuss=Feld(FKZ, token=7, parser=parse_float),
+    entgeltumwandlung=Feld(EUW, token=-1, parser=parse_float),
+    mutterschaftsgeld=Feld(MUT),
+    mutterschutzfrist_start=Feld(MUTF, token=1),
+    wochenarbeitszeit_zeile=Feld(WAZ, versatz=1),
+    gruppe_stufe=Feld(TVOD, parser=parse_gruppe_stufe),
+)
+
+
 class Page:
-    month_year: str = field()
-    month: int = field()
-    name: str = field()
-    arbeitsmarktzulage: float = field()
-    muenchenzulage: float = field()
-    fahrtkostenzuschuss: float = field()
-    steuerfrei_inkl_fahrtkostenzuschuss: float = field()
-    is_rueckrechnung: bool = field()
-    wochenarbeitszeit: float = field()
-    gruppe_stufe: str = field()
+    """Eine Seite einer Gehaltsabrechnung.
+
+    Beim Anlegen werden nur die Fundstellen der Felder gesucht (:data:`SEITE`)
+    und Monat/Jahr gelesen. Alle weiteren Felder werden beim ersten Zugriff
+    (oder per :meth:`parse`) berechnet; danach wird der Seitentext freigegeben.
+    """
+
+    FIELDS = (
+        "month_year",
+        "month",
+        "name",
+        "arbeitsmarktzulage",
+        "muenchenzulage",
+        "fahrtkostenzuschuss",
+        "steuerfrei_inkl_fahrtkostenzuschuss",
+        "is_rueckrechnung",
+        "wochenarbeitszeit",
+        "gruppe_stufe",
+    )
+    __slots__ = FIELDS + ("_felder",)
 
     def __init__(self, page: str):
-        # Initialize fields with default values
-        self._page = page
-        self._lines = page.split("\n")
+        self._felder = SEITE.lesen(page)
 
-        self.month_year = self.line_with("Gehaltsabrechnung").split(" ")[-1]
+        self.month_year = self._felder["month_year"]
         self.month = int(self.month_year.split(".")[0])
+        self.is_rueckrechnung = self._felder.hat("rueckrechnung")
+
+    def __getattr__(self, attr):
+        # Wird nur für noch nicht gesetzte Slots aufgerufen
+        if attr == "name" and self._felder is not None:
+            self.name = self.extract_name()
+            return self.name
+        if attr in Page.FIELDS and self._felder is not None:
+            self.parse()
+            return getattr(self, attr)
+        raise AttributeError(attr)
+
+    def __repr__(self):
+        values = ", ".join(f"{attr}={getattr(self, attr)!r}" for attr in Page.FIELDS)
+        return f"Page({values})"
+
+    def parse(self):
+        """Berechnet alle Felder und gibt anschließend den Seitentext frei."""
+        if self._felder is None:
+            return self
+        name = self.name
+        felder = self._felder
 
-        self.name = self.extract_name()
-
-        self.is_rueckrechnung = "Rückrechnung" in page
-
-        index_start = self.line_index_with("Kosten- Kosten- Lohn")
-        index_end = self.line_index_with("GESAMTBRUTTO")
         lines_loehne = [
             line
-            for line in self._lines[index_start + 2 : index_end]
+            for line in felder.zeilen("loehne_start", "loehne_end")
             if line.strip() != ""
         ]
+        loehne = "".join(lines_loehne)
 
-        self.arbeitsmarktzulage = (
-            parse_float(self.line_with(AMZ).split(" ")[2])
-            if AMZ in "".join(lines_loehne)
-            else 0
-        )
+        self.arbeitsmarktzulage = felder["arbeitsmarktzulage"] if AMZ in loehne else 0
 
-        self.muenchenzulage = (
-            parse_float(self.line_with(MZ).split(" ")[2])
-            if MZ in "".join(lines_loehne)
-            else 0
-        )
+        self.muenchenzulage = felder["muenchenzulage"] if MZ in loehne else 0
 
-        self.gruppe_stufe = (
-            self.gruppe_stufe(self.line_with(TVOD)) if TVOD in page else "-"
-        )
+        self.gruppe_stufe = felder.get("gruppe_stufe", "-")
 
-        self.fahrtkostenzuschuss = (
-            parse_float(self.line_with(FKZ).split(" ")[7]) if FKZ in page else 0
-        )
+        self.fahrtkostenzuschuss = felder.get("fahrtkostenzuschuss", 0)
 
-        WAZ_HEAD_IDX = self._lines.index(self.line_with(WAZ))
-        WAZ_LINE = self._lines[WAZ_HEAD_IDX + 1]
+        WAZ_LINE = felder["wochenarbeitszeit_zeile"]
         WAZ_MATCH = re.search(
             r"(\d+,\d+)(?= \d+,\d+)", " ".join(WAZ_LINE.split(" ")[1:])
         )
@@ -118,16 +158,17 @@ class Page:
 
         # Entgeldumwandlung during Beschäftigungsverbot and not when Mutterschutzfrist started
         steuerfrei_entgeltumw = (
-            -parse_float(self.line_with(EUW).split(" ")[-1]) if EUW in page else 0
+            -felder["entgeltumwandlung"] if felder.hat("entgeltumwandlung") else 0
         )
-        if EUW in page and MUT in page:
-            fehlzeit_start = self.line_with(MUTF).split(" ")[1]
+        if felder.hat("entgeltumwandlung") and felder.hat("mutterschaftsgeld"):
+            fehlzeit_start = felder["mutterschutzfrist_start"]
             if (
                 int(fehlzeit_start.split(".")[0]) == 1
                 or int(fehlzeit_start.split(".")[1]) < self.month
             ):
-                print(
-                    f"Für {self.name} begann {MUTF} am {fehlzeit_start}, daher gibt es im Monat {self.month} keine unversteuerte {EUW}"
+                log.info(
+                    "Für %s begann %s am %s, daher gibt es im Monat %s keine unversteuerte %s",
+                    name, MUTF, fehlzeit_start, self.month, EUW,
                 )
                 steuerfrei_entgeltumw = 0
 
@@ -135,57 +176,182 @@ class Page:
             self.fahrtkostenzuschuss + sum(steuerfrei_values) + steuerfrei_entgeltumw
         )
 
+        self._felder = None
+        return self
+
     def extract_name(self):
-        idx_persoenlich = self.line_index_with(PERSOENLICH_VERTRAULICH)
-        hat_anrede = self._lines[idx_persoenlich + 1].startswith("Frau") or self._lines[idx_persoenlich + 1].startswith("Herr")
+        line_with_name = self._felder["name_zeile"]
+        hat_anrede = line_with_name.startswith("Frau") or line_with_name.startswith("Herr")
         if hat_anrede:
-            return self.line_with(" Abteilung").split(" Abteilung")[0]
+            return self._felder["abteilung"]
         
-        line_with_name = self._lines[idx_persoenlich + 1]
         # Extrahiere Name vor Krankenkasse
         for kk in KRANKENKASSEN:
             if kk in line_with_name:
                 return line_with_name.split(kk)[0].strip()
 
         # Unbekannte Krankenkasse
-        print(f"Warnung bei Namensextraktion, Fallback Name = erste 2 Wörter: Keine Anrede und Krankenkasse nicht erkannt: {line_with_name}")
+        log.warning("Warnung bei Namensextraktion, Fallback Name = erste 2 Wörter: Keine Anrede und Krankenkasse nicht erkannt: %s", line_with_name)
         return " ".join(line_with_name.split(" ")[:2])
 
-    def line_with(self, text: str):
-        return [line for line in self._lines if text in line][0]
 
-    def line_index_with(self, text: str):
-        return [index for index, line in enumerate(self._lines) if text in line][0]
+TABLES = [
+    {"name": "Arbeitsmarktzulage", "field": "arbeitsmarktzulage"},
+    {"name": "Münchenzulage", "field": "muenchenzulage"},
+    {"name": "Fahrtkostenzuschuss", "field": "fahrtkostenzuschuss"},
+    {
+        "name": "Steuerfrei (inkl. FKZ)",
+        "field": "steuerfrei_inkl_fahrtkostenzuschuss",
+    },
+    {"name": "Wochenarbeitszeit", "field": "wochenarbeitszeit"},
+    {"name": "Gehaltsgruppe-Stufe", "field": "gruppe_stufe"},
+]
 
-    def gruppe_stufe(self, line: str):
-        parts = line.split("Grundvergütung")[-1].strip().split(" ")
-        return (
-            f"S{parts[1]}/{parts[3]}" if parts[0] == "S" else f"{parts[0]}/{parts[2]}"
-        )
+
+@dataclass
+class Conflict:
+    """Ein Wert, der einen abweichenden früheren Wert für denselben Monat überschreibt."""
+
+    table: str
+    name: str
+    month: int
+    old: object
+    new: object
+    page: Page
+
+    def __str__(self):
+        return f"Geänderter Wert {self.table} für {self.name}, Monat {self.month}, alt={self.old}, neu={self.new}, RR={self.page.is_rueckrechnung}"
+
+
+def group_pages(pages):
+    """Gruppiert die Seiten in einem Durchlauf nach (Monat, Name).
+
+    Innerhalb einer Gruppe bleibt die Reihenfolge der Seiten erhalten.
+    """
+    groups = {}
+    for page in pages:
+        groups.setdefault((page.month, page.name), []).append(page)
+    return groups
+
+
+def resolve_conflicts(groups, tables=TABLES):
+    """Führt die Seiten je (Monat, Name) zu einem Wert pro Tabelle zusammen.
+
+    Spätere Seiten (z. B. Rückrechnungen) überschreiben frühere. Gibt die Werte
+    je (Monat, Name) sowie die Liste der dabei überschriebenen, abweichenden
+    Werte zurück.
+    """
+    values = {}
+    conflicts = []
+    for (month, name), group in groups.items():
+        merged = {}
+        for page in group:
+            for table in tables:
+                datapoint = getattr(page, table["field"])
+                if table["name"] in merged and merged[table["name"]] != datapoint:
+                    conflicts.append(
+                        Conflict(table["name"], name, month, merged[table["name"]], datapoint, page)
+                    )
+                merged[table["name"]] = datapoint
+        values[(month, name)] = merged
+    return values, conflicts
 
 
-def process(pdf_paths, year=YEAR, output_path=None):
-    def _month_from_filename(path):
-        m = re.search(r"Verdienstabrechnung (\d{2})\.\d{4}", os.path.basename(path))
-        return int(m.group(1)) if m else float("inf")
-
-    pdf_paths = sorted(pdf_paths, key=_month_from_filename)
-
-    pages = []
-    print(f"Starte Verarbeitung von {len(pdf_paths)} PDF-Datei(en)...")
-    for pdf in pdf_paths:
-        print(f"Lese {pdf}...")
-        text_pages = get_pages(pdf)
-        print(f"  {len(text_pages)} Seite(n) gefunden, werte aus...")
-        for tpage in text_pages:
-            page_obj = Page(tpage)
-            if year not in page_obj.month_year:
-                print(
-                    f"Überspringe Seite, die nicht zum Jahr {year} gehört (RR={page_obj.is_rueckrechnung}): {page_obj}"
-                )
-                continue
-            pages.append(page_obj)
+# Nur die Kopfzeile, um Seiten anderer Jahre vorab auszusortieren
+KOPF = Vorlage(month_year=Feld(GEHALTSABRECHNUNG, token=-1))
+
+
+def month_year_of(text: str):
+    """Liest nur "MM.JJJJ" aus der Kopfzeile "Gehaltsabrechnung ..." einer Seite.
+
+    Entspricht ``Page(text).month_year``, sucht aber nur diesen einen Anker.
+    Gibt ``None`` zurück, wenn die Kopfzeile fehlt.
+    """
+    return KOPF.lesen(text).get("month_year")
+
+
+def year_of(month_year: str):
+    return month_year.split(".")[-1]
+
+
+def parse_pages(text_pages, years=None):
+    """Wertet die Seiten eines PDFs aus und ordnet sie nach Jahr.
+
+    Ist ``years`` angegeben, wird zuerst nur die Kopfzeile gelesen
+    (:func:`month_year_of`); Seiten anderer Jahre, z. B. Rückrechnungen, werden
+    dann nicht weiter ausgewertet. Gibt die Seiten je Jahr und die Anzahl der
+    gelesenen Seiten zurück.
+    """
+    by_year = {}
+    page_count = 0
+    for page_count, text in enumerate(text_pages, 1):
+        month_year = month_year_of(text)
+        if years is not None and month_year is not None and year_of(month_year) not in years:
+            log.debug(
+                "Überspringe Seite, die nicht zum Jahr %s gehört (RR=%s): %s",
+                "/".join(sorted(years)), RUECKRECHNUNG in text, month_year,
+            )
+            continue
+        page_obj = Page(text)
+        by_year.setdefault(year_of(page_obj.month_year), []).append(page_obj.parse())
+    return by_year, page_count
+
+
+def _period_from_filename(path):
+    m = re.search(r"Verdienstabrechnung (\d{2})\.(\d{4})", os.path.basename(path))
+    return (int(m.group(2)), int(m.group(1))) if m else (float("inf"), float("inf"))
+
+
+def read_pages(pdf_paths, years=None, workers=1):
+    """Liest die PDFs einmal und gibt die ausgewerteten Seiten je Jahr zurück.
+
+    Die PDFs werden nach Zeitraum im Dateinamen sortiert, damit spätere Seiten
+    (Rückrechnungen) frühere überschreiben. ``years=None`` liest alle Jahre.
+    """
+    pdf_paths = sorted(pdf_paths, key=_period_from_filename)
+    if years is not None:
+        years = set(years)
+
+    pages = {}
+    log.info("Starte Verarbeitung von %d PDF-Datei(en)...", len(pdf_paths))
+    if workers > 1:
+        log.info("Lese PDFs parallel mit %d Prozess(en)...", workers)
+    pdfs = zip(pdf_paths, get_pages_parallel(pdf_paths, workers))
+    for pdf, text_pages in protokoll.iterate(pdfs, "PDFs ausgewertet", len(pdf_paths)):
+        log.info("Lese %s...", pdf)
+        by_year, page_count = parse_pages(text_pages, years)
+        for page_year, year_pages in by_year.items():
+            pages.setdefault(page_year, []).extend(year_pages)
+        log.info("  %d Seite(n) ausgewertet", page_count)
+    return pages
+
+
+def process(pdf_paths, year=YEAR, output_path=None, workers=1):
+    pages = read_pages(pdf_paths, [year], workers).get(year, [])
+    return write_tables(pages, year, output_path)
+
+
+def process_years(pdf_paths, years=None, output_dir=".", workers=1):
+    """Schreibt aus einem Lesedurchgang je Jahr eine ``abrechnungen_{Jahr}.xlsx``.
+
+    ``years=None`` schreibt alle Jahre, für die Seiten gefunden wurden, auch
+    solche, die nur in Rückrechnungen vorkommen.
+    Gibt die geschriebenen Dateien zurück.
+    """
+    pages = read_pages(pdf_paths, years, workers)
+    missing = sorted(set(years or ()) - set(pages))
+    if missing:
+        log.warning("Keine Seiten für %s gefunden", ", ".join(missing))
+    if not pages:
+        raise ValueError("Keine Seiten für die angegebenen Jahre gefunden. Bitte Jahre und PDFs prüfen.")
+    return [
+        write_tables(pages[page_year], page_year, os.path.join(output_dir, f"abrechnungen_{page_year}.xlsx"))
+        for page_year in sorted(pages)
+    ]
+
 
+def write_tables(pages, year=YEAR, output_path=None):
+    """Schreibt die Tabellen für die ausgewerteten Seiten eines Jahres."""
     months = unique([page.month for page in pages])
     names = unique([page.name for page in pages])
 
@@ -193,55 +359,48 @@ def process(pdf_paths, year=YEAR, output_path=None):
         raise ValueError(
             f"Keine Seiten für das Jahr {year} gefunden. Bitte Jahr und PDFs prüfen."
         )
-    tables = [
-        {"name": "Arbeitsmarktzulage", "field": "arbeitsmarktzulage"},
-        {"name": "Münchenzulage", "field": "muenchenzulage"},
-        {"name": "Fahrtkostenzuschuss", "field": "fahrtkostenzuschuss"},
-        {
-            "name": "Steuerfrei (inkl. FKZ)",
-            "field": "steuerfrei_inkl_fahrtkostenzuschuss",
-        },
-        {"name": "Wochenarbeitszeit", "field": "wochenarbeitszeit"},
-        {"name": "Gehaltsgruppe-Stufe", "field": "gruppe_stufe"},
-    ]
-    print(
-        f"\nErstelle Tabellen {[table['name'] for table in tables]} für Monate {months} und Mitarbeiter {names}"
+    tables = TABLES
+    log.info(
+        "\nErstelle Tabellen %s für Monate %s und %d Mitarbeiter",
+        [table["name"] for table in tables], months, len(names),
     )
-
-    data = {}
-    for name in names:
-        employee_pages = [page for page in pages if page.name == name]
-        for page in employee_pages:
-            if page.month not in data:
-                data[page.month] = {}
-            if page.name not in data[page.month]:
-                data[page.month][page.name] = {}
-            for table in tables:
-                datapoint = getattr(page, table["field"])
-                if table["name"] in data[page.month][page.name]:
-                    old_datapoint = data[page.month][page.name][table["name"]]
-                    if old_datapoint != datapoint:
-                        print(
-                            f"Geänderter Wert {table['name']} für {page.name}, Monat {page.month}, alt={old_datapoint}, neu={datapoint}, RR={page.is_rueckrechnung} page={page}"
-                        )
-                data[page.month][page.name][table["name"]] = datapoint
+    log.debug("Mitarbeiter: %s", names)
+
+    values, conflicts = resolve_conflicts(group_pages(pages), tables)
+    for conflict in conflicts:
+        log.warning("%s", conflict)
+        log.debug("  %r", conflict.page)
+    log.info("%d geänderte(r) Wert(e) durch spätere Seiten aufgelöst", len(conflicts))
+
+    # pandas erst für die Tabellen laden (Startzeit)
+    import pandas as pd
+    from pandas import DataFrame, ExcelWriter
+
+    # Langformat: eine Zeile je (Name, Monat, Feld, Wert)
+    long_df = DataFrame(
+        [
+            (name, month, table_name, value)
+            for (month, name), merged in values.items()
+            for table_name, value in merged.items()
+        ],
+        columns=["name", "month", "field", "value"],
+    )
+    wide = long_df.pivot(index="name", columns=["field", "month"], values="value")
 
     OUT_FILENAME = output_path or f"abrechnungen_{year}.xlsx"
-    print(f"\nErstelle {OUT_FILENAME}")
+    log.info("\nErstelle %s", OUT_FILENAME)
     if os.path.exists(OUT_FILENAME):
         os.remove(OUT_FILENAME)
 
     with ExcelWriter(OUT_FILENAME, engine="openpyxl", mode="w") as writer:
-        for table in tables:
-            print(f"  Schreibe Tabellenblatt: {table['name']}")
-            df = DataFrame()
-            for month in months:
-                for employee in names:
-                    df.loc[employee, month] = (
-                        data[month][employee][table["name"]]
-                        if employee in data[month]
-                        else None
-                    )
+        for table in protokoll.iterate(tables, "Tabellenblätter geschrieben"):
+            log.info("  Schreibe Tabellenblatt: %s", table["name"])
+            df = (
+                wide[table["name"]]
+                .reindex(index=names, columns=months)
+                .rename_axis(index=None, columns=None)
+                .infer_objects()
+            )
             if pd.api.types.is_numeric_dtype(df.iloc[:, 0]):
                 df["Summe"] = df.sum(axis=1)
             title_df = DataFrame([{"Daten": table["name"]}])
@@ -252,7 +411,7 @@ def process(pdf_paths, year=YEAR, output_path=None):
                 writer, sheet_name=table["name"], index=True, header=True, startrow=2
             )
             writer.sheets[table["name"]].column_dimensions["A"].width = 30
-    print("fertig")
+    log.info("fertig")
     return OUT_FILENAME
 
 
@@ -265,18 +424,34 @@ if __name__ == "__main__":
             "  abrechnungen/<YEAR>/*.pdf\n\n"
             "Je PDF-Seite werden Arbeitsmarktzulage, Münchenzulage, Fahrtkostenzuschuss,\n"
             "steuerfreie Bezüge, Wochenarbeitszeit und TVöD-Gehaltsgruppe extrahiert.\n"
-            "Seiten anderer Jahre (Rückrechnungen) werden übersprungen."
+            "Seiten anderer Jahre (Rückrechnungen) werden übersprungen; dafür wird nur die\n"
+            "Kopfzeile der Seite gelesen.\n\n"
+            "Mit mehreren Jahren (z. B. --year 2023 2024 2025) werden die PDFs aller\n"
+            "Jahre einmal gelesen und je Jahr eine abrechnungen_<YEAR>.xlsx geschrieben;\n"
+            "Rückrechnungen landen dabei im Jahr, zu dem sie gehören."
         ),
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
     ap.add_argument(
-        "--year", default=YEAR,
-        help=f"Abrechnungsjahr (Standard: {YEAR})",
+        "--year", nargs="+", default=[YEAR],
+        help=f"Abrechnungsjahr(e) (Standard: {YEAR})",
+    )
+    ap.add_argument(
+        "--workers", type=int, default=1,
+        help="Anzahl paralleler Prozesse zum Lesen der PDFs (Standard: 1)",
     )
+    protokoll.add_arguments(ap)
     args = ap.parse_args()
-    pdfs = glob.glob(f"abrechnungen/{args.year}/*.pdf")
-    if not pdfs:
-        print(f"Keine PDFs gefunden in: abrechnungen/{args.year}/")
-        exit(1)
-    print(f"{len(pdfs)} PDF(s) gefunden in: abrechnungen/{args.year}/")
-    process(pdfs, year=args.year)
+    protokoll.setup_cli(args)
+    pdfs = []
+    for year in args.year:
+        found = glob.glob(f"abrechnungen/{year}/*.pdf")
+        if not found:
+            log.error("Keine PDFs gefunden in: abrechnungen/%s/", year)
+            exit(1)
+        log.info("%d PDF(s) gefunden in: abrechnungen/%s/", len(found), year)
+        pdfs += found
+    if len(args.year) == 1:
+        process(pdfs, year=args.year[0], workers=args.workers)
+    else:
+        process_years(pdfs, years=args.year, workers=args.workers)
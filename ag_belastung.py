@@ -1,21 +1,17 @@
-from pandas.core.arrays import boolean
-from pypdf import PdfReader
-from pandas import DataFrame, ExcelWriter
+from pdf_text import iter_pages, iter_body_lines, with_next
+import protokoll
 import datetime
-import glob, re, os
+import glob, logging, re, os
 
 YEAR = str(datetime.date.today().year)
 
+log = logging.getLogger("erdlinge.ag_belastung")
+
 
 HEADER_END = "Pers.Nr. Einheiten"
 FOOTER_START = "Lohnservice Wendel eG"
 
 
-def get_pages(filename):
-    reader = PdfReader(filename)
-    return [page.extract_text() or "" for page in reader.pages]
-
-
 def parse_float(float_str_eu: str):
     return float(float_str_eu.replace(".", "").replace(",", "."))
 
@@ -26,14 +22,6 @@ def unique(lst: list):
     return [x for x in lst if not (x in seen or seen_add(x))]
 
 
-def line_with(lines: list, text: str):
-    return [line for line in lines if text in line][0]
-
-
-def line_index_with(lines: list, text: str):
-    return [index for index, line in enumerate(lines) if text in line][0]
-
-
 GESAMTBRUTTO = "Brutto (Gesamt)"
 MONATSBRUTTO = "Brutto (Monat)"
 SV_AG_GESAMT = "SV-AG (Gesamt)"
@@ -43,71 +31,134 @@ U1_MONAT = "U1 (Monat)"
 U2_GESAMT = "U2 (Gesamt)"
 U2_MONAT = "U2 (Monat)"
 
+AMOUNT = re.compile(r"^-{0,1}\d+\.{0,1}\d*\,\d{2}")
 
-def process(pdf_paths, year=YEAR, mon=None, output_path=None):
-    if len(pdf_paths) != 1:
-        raise OSError("expected one pdf")
-    if mon is None:
-        mon = os.path.splitext(os.path.basename(pdf_paths[0]))[0]
+# Zeilenarten außer den Lohnarten
+BRUTTO = "Brutto"
+RR = "RR"
+ZWISCHENSUMMEN = "Zwischensummen"
+
+# Kategorie -> (Monats-Spalte, Gesamt-Spalte, positives Vorzeichen)
+KATEGORIEN = {
+    BRUTTO: (MONATSBRUTTO, GESAMTBRUTTO, True),
+    "SV-AG": (SV_AG_MONAT, SV_AG_GESAMT, True),
+    "U1": (U1_MONAT, U1_GESAMT, False),
+    "U2": (U2_MONAT, U2_GESAMT, False),
+}
+
+# Zeilenanfang der Lohnart -> Kategorie, siehe register_lohnart
+LOHNARTEN = {}
+_LINE_PATTERN = None
+
+
+def _compile_line_pattern():
+    global _LINE_PATTERN
+    # Längere Präfixe zuerst, damit sie nicht von kürzeren verdeckt werden
+    prefixes = sorted(LOHNARTEN, key=len, reverse=True)
+    alternatives = [
+        r"(?P<RR>aus RR: -{0,1}\d+\.{0,1}\d*\,\d{2})",
+        r"(?P<Brutto>\d)",
+        r"(?P<Zwischensummen>Zwischensummen)",
+    ]
+    if prefixes:
+        alternatives.append("(?P<lohnart>" + "|".join(map(re.escape, prefixes)) + ")")
+    _LINE_PATTERN = re.compile("^(?:" + "|".join(alternatives) + ")")
+
+
+def register_lohnart(prefix: str, kategorie: str):
+    """Ordnet Zeilen, die mit ``prefix`` beginnen, einer Kategorie aus KATEGORIEN zu."""
+    if kategorie not in KATEGORIEN or kategorie == BRUTTO:
+        raise ValueError(f"Unbekannte Kategorie für Lohnart {prefix!r}: {kategorie}")
+    LOHNARTEN[prefix] = kategorie
+    _compile_line_pattern()
+
+
+def classify(line: str):
+    """Bestimmt die Zeilenart in einem Schritt.
+
+    Gibt BRUTTO, RR, ZWISCHENSUMMEN, eine Lohnart-Kategorie oder ``None`` zurück.
+    """
+    m = _LINE_PATTERN.match(line)
+    if m is None:
+        return None
+    if m.lastgroup == "lohnart":
+        return LOHNARTEN[m.group("lohnart")]
+    return m.lastgroup
 
-    print(f"Lese PDF: {pdf_paths[0]}")
-    pages = get_pages(pdf_paths[0])
-    print(f"  {len(pages)} Seite(n) gefunden, extrahiere Zeilen...")
-
-    lines = []
-    for page in pages:
-        pLines = page.split("\n")
-        index_start = line_index_with(pLines, HEADER_END)
-        index_end = line_index_with(pLines, FOOTER_START)
-        lines.extend(
-            [line for line in pLines[index_start + 1 : index_end] if line.strip() != ""]
-        )
-    print(f"  {len(lines)} Datenzeile(n) extrahiert")
-
-    def process_entry(
-        data,
-        nextLineRR,
-        lineSplit: list,
-        nextLineSplit: list,
-        monat_header: str,
-        gesamt_header: str,
-        plus: bool,
-    ):
+
+for _prefix in (
+    "SV-AG Anteil (Pflicht)",
+    "SV-AG Anteil (Pauschal)",
+    "Umlage 1/2",
+    "Insolvenzgeldumlage",
+    "aus RR: Umlage 1/2",
+    "aus RR: SV-AG Anteil (Pflicht)",
+    "aus RR: Insolvenzgeldumlage",
+    "geringf. p. Steuer",
+):
+    register_lohnart(_prefix, "SV-AG")
+for _prefix in ("Erst. Entg. AU", "aus RR: Erst. Entg. AU"):
+    register_lohnart(_prefix, "U1")
+for _prefix in (
+    "Erst. Entg. B.Verbot",
+    "aus RR: Erst. Entg. B.Verbot",
+    "Erst. SV-AG B.Verbot",
+    "aus RR: Erst. SV-AG B.Verbot",
+    "Erst. Mutterschutz",
+    "aus RR: Erst. Mutterschutz",
+):
+    register_lohnart(_prefix, "U2")
+
+
+def parse_pages(pages):
+    """Wertet die Seitentexte aus und gibt die Werte je Mitarbeiter zurück."""
+    return parse_lines(iter_body_lines(pages, HEADER_END, FOOTER_START))
+
+
+def parse_lines(lines):
+    """Wertet die Tabellenzeilen aller Seiten (ohne Kopf- und Fußzeilen) aus."""
+
+    def process_entry(data, lineSplit: list, nextLine, kategorie: str):
+        monat_header, gesamt_header, plus = KATEGORIEN[kategorie]
+        nextLineRR = nextLine is not None and classify(nextLine) == RR
         sign = 1.0 if plus else -1.0
         gesamt = 0.0
         monat = 0.0
         if nextLineRR:
-            print(f"Verarbeite zusätzlich '{' '.join(nextLineSplit)}'")
+            if debug:
+                log.debug("Verarbeite zusätzlich '%s'", nextLine)
+            nextLineSplit = nextLine.split(" ")
             gesamt = sign * parse_float(nextLineSplit[-1])
             monat = sign * (parse_float(nextLineSplit[-2]) + parse_float(lineSplit[-1]))
         else:
-            has_monthly = re.match(r"^-{0,1}\d+\.{0,1}\d*\,\d{2}", lineSplit[-2]) != None
+            has_monthly = AMOUNT.match(lineSplit[-2]) != None
             gesamt = sign * parse_float(lineSplit[-1])
             monat = sign * parse_float(lineSplit[-2]) if has_monthly else 0.0
         data[current_employee][gesamt_header] += gesamt
         data[current_employee][monat_header] += monat
-        print(f">{gesamt_header}+={gesamt}, {monat_header}+={monat}")
+        if debug:
+            log.debug(">%s+=%s, %s+=%s", gesamt_header, gesamt, monat_header, monat)
         return nextLineRR
 
     data = {}
     current_employee = ""
     current_employee_done = False
     RR_line_processed = False
-    print("Starte Auswertung der Zeilen...")
-    for idx, line in enumerate(lines):
-        lineSplit = line.split(" ")
-        nextLineSplit = lines[idx + 1].split(" ") if idx < len(lines) - 1 else []
-        nextLineRR = (
-            re.match(r"^aus RR: -{0,1}\d+\.{0,1}\d*\,\d{2}", lines[idx + 1])
-            if idx < len(lines) - 1
-            else False
-        )
+    line_count = 0
+    # Detailmeldungen nur erzeugen, wenn sie auch ausgegeben werden
+    debug = log.isEnabledFor(logging.DEBUG)
+    log.info("Starte Auswertung der Zeilen...")
+    for line, nextLine in with_next(lines):
+        line_count += 1
         if RR_line_processed:
             RR_line_processed = False
             continue
-        print(f"Verarbeite '{line}'")
-        if re.match(r"^\d", line):
-            has_two_values = re.match(r"^-{0,1}\d+\.{0,1}\d*\,\d{2}", lineSplit[-2]) != None
+        if debug:
+            log.debug("Verarbeite '%s'", line)
+        kategorie = classify(line)
+        lineSplit = line.split(" ")
+        if kategorie == BRUTTO:
+            has_two_values = AMOUNT.match(lineSplit[-2]) != None
             current_employee = " ".join(lineSplit[1 : (-2 if has_two_values else -1)])
             current_employee_done = False
             data[current_employee] = {
@@ -120,54 +171,45 @@ def process(pdf_paths, year=YEAR, mon=None, output_path=None):
                 U2_GESAMT: 0.0,
                 U2_MONAT: 0.0,
             }
-            print(f"--- BEGINN {current_employee} ---")
-            RR_line_processed = process_entry(
-                data, nextLineRR, lineSplit, nextLineSplit, MONATSBRUTTO, GESAMTBRUTTO, True
-            )
+            if debug:
+                log.debug("--- BEGINN %s ---", current_employee)
+            RR_line_processed = process_entry(data, lineSplit, nextLine, BRUTTO)
             continue
-        if line.startswith("Zwischensummen"):
+        if kategorie == ZWISCHENSUMMEN:
             current_employee_done = True
-            print(f">Daten: {data[current_employee]}")
-            print(f"--- ENDE {current_employee} ---\n")
+            if debug:
+                log.debug(">Daten: %s", data[current_employee])
+                log.debug("--- ENDE %s ---\n", current_employee)
         if current_employee_done:
             continue
-        if (
-            line.startswith("SV-AG Anteil (Pflicht)")
-            or line.startswith("SV-AG Anteil (Pauschal)")
-            or line.startswith("Umlage 1/2")
-            or line.startswith("Insolvenzgeldumlage")
-            or line.startswith("aus RR: Umlage 1/2")
-            or line.startswith("aus RR: SV-AG Anteil (Pflicht)")
-            or line.startswith("aus RR: Insolvenzgeldumlage")
-            or line.startswith("geringf. p. Steuer")
-        ):
-            RR_line_processed = process_entry(
-                data, nextLineRR, lineSplit, nextLineSplit, SV_AG_MONAT, SV_AG_GESAMT, True
-            )
-            continue
-        if line.startswith("Erst. Entg. AU") or line.startswith("aus RR: Erst. Entg. AU"):
-            RR_line_processed = process_entry(
-                data, nextLineRR, lineSplit, nextLineSplit, U1_MONAT, U1_GESAMT, False
-            )
-            continue
-        if (
-            line.startswith("Erst. Entg. B.Verbot")
-            or line.startswith("aus RR: Erst. Entg. B.Verbot")
-            or line.startswith("Erst. SV-AG B.Verbot")
-            or line.startswith("aus RR: Erst. SV-AG B.Verbot")
-            or line.startswith("Erst. Mutterschutz")
-            or line.startswith("aus RR: Erst. Mutterschutz")
-        ):
-            RR_line_processed = process_entry(
-                data, nextLineRR, lineSplit, nextLineSplit, U2_MONAT, U2_GESAMT, False
-            )
+        if kategorie in KATEGORIEN:
+            RR_line_processed = process_entry(data, lineSplit, nextLine, kategorie)
             continue
 
         raise OSError(f"Unable to process unknown line {line}")
-    print("Lesen abgeschlossen")
+    log.info(
+        "Lesen abgeschlossen: %d Datenzeile(n), %d Mitarbeiter ausgewertet",
+        line_count, len(data),
+    )
+    return data
+
+
+def process(pdf_paths, year=YEAR, mon=None, output_path=None):
+    if len(pdf_paths) != 1:
+        raise OSError("expected one pdf")
+    if mon is None:
+        mon = os.path.splitext(os.path.basename(pdf_paths[0]))[0]
+
+    log.info("Lese PDF: %s", pdf_paths[0])
+    # Seiten werden einzeln gelesen, zugeschnitten und direkt ausgewertet
+    data = parse_pages(iter_pages(pdf_paths[0]))
+
+    # pandas wird nur für die Excel-Ausgabe gebraucht
+    from pandas import DataFrame, ExcelWriter
 
     OUT_FILENAME = output_path or f"ag_belastung_{year}_{mon}.xlsx"
-    print(f"\nErstelle {OUT_FILENAME}")
+    log.info("\nErstelle %s", OUT_FILENAME)
+    protokoll.progress("Schreibe Excel-Datei")
     if os.path.exists(OUT_FILENAME):
         os.remove(OUT_FILENAME)
 
@@ -191,7 +233,7 @@ def process(pdf_paths, year=YEAR, mon=None, output_path=None):
         writer.sheets[TITLE].column_dimensions["A"].width = 30
         for column in ["B", "C", "D", "E", "F", "G", "H", "I"]:
             writer.sheets[TITLE].column_dimensions[column].width = 15
-    print("fertig")
+    log.info("fertig")
     return OUT_FILENAME
 
 
@@ -216,9 +258,11 @@ if __name__ == "__main__":
         "--month", required=True,
         help="Monatsname auf Deutsch, z.B. Oktober",
     )
+    protokoll.add_arguments(ap)
     args = ap.parse_args()
+    protokoll.setup_cli(args)
     pdfs = glob.glob(f"ag_belastung/{args.year}/{args.month}.pdf")
     if not pdfs:
-        print(f"Keine PDF gefunden: ag_belastung/{args.year}/{args.month}.pdf")
+        log.error("Keine PDF gefunden: ag_belastung/%s/%s.pdf", args.year, args.month)
         exit(1)
     process(pdfs, year=args.year, mon=args.month)
@@ -3,24 +3,58 @@
 Jedes CLI-Skript ist als eigener Tab verfügbar. Auf jedem Tab können die
 benötigten Dateien hochgeladen werden; per "Ausführen" wird die jeweilige
 ``process``-Funktion ausgeführt und die erzeugte Excel-Datei sowie die
-Log-Ausgabe zurückgegeben. Die Kernlogik der Skripte bleibt unverändert.
+Log-Ausgabe zurückgegeben. Protokoll und Fortschritt werden schon während
+der Ausführung angezeigt, "Abbrechen" beendet den laufenden Auftrag. Die
+Kernlogik der Skripte bleibt unverändert.
+
+Der Abgleichsstand der Kontoabgleiche (siehe :mod:`kontoabgleich_stand`) ist
+je Lauf eine eigene Datei: Der Stand des letzten Laufs wird hochgeladen (oder
+neu angelegt) und der fortgeschriebene Stand mit dem Ergebnis zurückgegeben.
+Die gemeinsame Standarddatei der Kommandozeile verwendet die App nicht, damit
+sich Benutzer nicht gegenseitig Buchungen als erledigt markieren.
+
+Die Aufträge laufen nicht im Server-Prozess, sondern in einem Pool von
+Arbeitsprozessen (siehe :mod:`auftraege`), damit mehrere Benutzer gleichzeitig
+arbeiten können, ohne sich gegenseitig auszubremsen.
+
+Damit die Oberfläche schnell erscheint, importiert der Server-Prozess die
+Skripte nicht; sie werden nur über ihren Namen referenziert. Erst wenn die
+Oberfläche läuft, startet :func:`warm_up` die Arbeitsprozesse, die dabei die
+Skripte samt pandas, pypdf und openpyxl laden. Mit ``ERDLINGE_VORWAERMEN=0``
+geschieht das erst beim ersten Auftrag und nur für das benötigte Skript.
 """
 
-import contextlib
 import datetime
-import io
+import html
 import os
+import shutil
 import tempfile
-import traceback
+import threading
 
 import gradio as gr
 
-import aag_erstattungen
-import abrechnungen
-import ag_belastung
-import lohnjournal
-import kontoabgleich_gls
-import kontoabgleich_paypal
+import auftraege
+import protokoll
+
+CPU_COUNT = os.cpu_count() or 1
+DEFAULT_WORKERS = min(CPU_COUNT, 4)
+POLL_SECONDS = 0.3
+WARM_UP = os.environ.get("ERDLINGE_VORWAERMEN", "1") != "0"
+# Werden nur in den Arbeitsprozessen importiert
+PROCESSORS = (
+    "aag_erstattungen",
+    "abrechnungen",
+    "ag_belastung",
+    "lohnjournal",
+    "kontoabgleich_gls",
+    "kontoabgleich_paypal",
+)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Abbruch-Ereignis des laufenden Auftrags je (Sitzung, Tab)
+_jobs = {}
 
 
 def _paths(files):
@@ -32,25 +66,88 @@ def _paths(files):
     return [f if isinstance(f, str) else f.name for f in files]
 
 
-def _run(fn, files, out_name, **kwargs):
-    """Führt eine ``process``-Funktion aus und fängt stdout als Log ein."""
-    buf = io.StringIO()
+def _progress_html(text, done=None, total=None):
+    """Fortschrittsbalken; ohne ``total`` läuft er unbestimmt."""
+    if total:
+        bar = f'<progress value="{done}" max="{total}" style="width:100%"></progress>'
+        text = f"{text}: {done} von {total}"
+    else:
+        bar = '<progress style="width:100%"></progress>'
+        if done is not None:
+            text = f"{text}: {done}"
+    return f"{bar}<div>{html.escape(text)}</div>"
+
+
+def _executor():
+    """Gemeinsamer Auftrags-Pool; die Arbeitsprozesse starten beim ersten Aufruf."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = auftraege.Executor(preload=PROCESSORS if WARM_UP else ())
+        return _pool
+
+
+def warm_up():
+    """Startet die Arbeitsprozesse, die dabei alle Skripte importieren.
+
+    Aufzurufen, nachdem die Oberfläche läuft; die Importe laufen in den
+    Arbeitsprozessen und halten den Server nicht auf. Ohne Vorwärmen
+    (``ERDLINGE_VORWAERMEN=0``) passiert nichts.
+    """
+    if WARM_UP:
+        _executor()
+
+
+def _stand_datei(upload, name):
+    """Eigene Kopie des hochgeladenen Abgleichsstands für einen Lauf (ohne Upload eine neue Datei)."""
+    pfad = os.path.join(tempfile.mkdtemp(prefix="erdlinge_stand_"), name)
+    if upload:
+        shutil.copyfile(_paths(upload)[0], pfad)
+    return pfad
+
+
+def _run(fn, files, out_name, details=False, cancel=None, **kwargs):
+    """Gibt eine ``process``-Funktion (``"modul.process"``) an den Auftrags-Pool und verfolgt sie.
+
+    Liefert laufend Tupel (Ergebnis, Protokoll, Fortschritt); das Ergebnis ist
+    erst im letzten Tupel gesetzt. Wird ``cancel`` gesetzt, bricht der Auftrag
+    bei der nächsten Fortschrittsmeldung ab bzw. wird gar nicht erst gestartet.
+    """
+    paths = _paths(files)
+    if not paths:
+        yield None, "\nFEHLER: Bitte mindestens eine Datei hochladen.\n", auftraege.FEHLER
+        return
+    tmpdir = tempfile.mkdtemp(prefix="erdlinge_")
+    job = _executor().submit(
+        fn,
+        paths,
+        output_path=os.path.join(tmpdir, out_name),
+        level=protokoll.DEBUG if details else protokoll.SUMMARY,
+        **kwargs,
+    )
+    shown = None
     try:
-        paths = _paths(files)
-        if not paths:
-            raise OSError("Bitte mindestens eine Datei hochladen.")
-        tmpdir = tempfile.mkdtemp(prefix="erdlinge_")
-        out_path = os.path.join(tmpdir, out_name)
-        with contextlib.redirect_stdout(buf):
-            result = fn(paths, output_path=out_path, **kwargs)
-        return result, buf.getvalue()
-    except Exception as exc:  # noqa: BLE001 - Fehler sollen im Log landen
-        buf.write(f"\nFEHLER: {exc}\n")
-        buf.write(traceback.format_exc())
-        return None, buf.getvalue()
-
-
-def _make_tab(label, description, fn, out_name, with_year=True, file_types=(".pdf",), single_file=False):
+        while True:
+            if cancel is not None and cancel.is_set():
+                job.cancel()
+            if job.wait(POLL_SECONDS):
+                break
+            if job.status == auftraege.WARTET:
+                status = (f"{auftraege.WARTET}, Position", job.position, None)
+            else:
+                status = job.progress or (auftraege.LAEUFT, None, None)
+            current = (job.log(), status)
+            if current != shown:
+                shown = current
+                yield None, current[0], _progress_html(*status)
+    finally:
+        # Auch wenn Gradio die Ausgabe beendet (z. B. Seite geschlossen)
+        if not job.done:
+            job.cancel()
+    yield job.result, job.log(), html.escape(job.status)
+
+
+def _make_tab(label, description, fn, out_name, with_year=True, with_workers=False, with_toleranz=False, file_types=(".pdf",), single_file=False):
     with gr.Tab(label):
         gr.Markdown(description)
         with gr.Row():
@@ -61,23 +158,65 @@ def _make_tab(label, description, fn, out_name, with_year=True, file_types=(".pd
                     file_types=list(file_types),
                 )
                 year = gr.Dropdown(choices=[str(y) for y in range(2022, 2041)], value=str(datetime.date.today().year), label="Jahr") if with_year else None
-                btn = gr.Button("Ausführen", variant="primary")
+                workers = gr.Slider(1, max(CPU_COUNT, 2), value=DEFAULT_WORKERS, step=1, label="Parallele Prozesse") if with_workers else None
+                toleranz = gr.Slider(0, 10, value=0, step=1, label="Datumstoleranz (Tage, 0 = nur exakt)") if with_toleranz else None
+                monat = gr.Checkbox(label="Übrige Buchungen mit gleichem Betrag im selben Monat zuordnen", value=False) if with_toleranz else None
+                stand = gr.Checkbox(label="Abgleichsstand fortschreiben (nur neue Buchungen, offene Posten übernehmen)", value=False) if with_toleranz else None
+                stand_datei = gr.File(label="Abgleichsstand des letzten Laufs (leer = neu anlegen)", file_types=[".sqlite"]) if with_toleranz else None
+                details = gr.Checkbox(label="Detailprotokoll (jede Zeile)", value=False)
+                with gr.Row():
+                    btn = gr.Button("Ausführen", variant="primary")
+                    stop = gr.Button("Abbrechen", variant="stop")
             with gr.Column():
                 out_file = gr.File(label="Ergebnis (Excel)")
-                logs = gr.Textbox(label="Protokoll", lines=15)
-
-        if with_year:
-            btn.click(
-                lambda f, y: _run(fn, f, out_name.replace(".xlsx", f"_{y}.xlsx"), year=y),
-                inputs=[files, year],
-                outputs=[out_file, logs],
-            )
-        else:
-            btn.click(
-                lambda f: _run(fn, f, out_name),
-                inputs=[files],
-                outputs=[out_file, logs],
-            )
+                out_stand = gr.File(label="Abgleichsstand (für den nächsten Lauf aufbewahren)") if with_toleranz else None
+                status = gr.HTML()
+                logs = gr.Textbox(label="Protokoll", lines=15, autoscroll=True)
+
+        def _click(request: gr.Request, f, *settings):
+            settings = list(settings)
+            kwargs = {"details": settings.pop()}
+            name = out_name
+            if with_year:
+                y = settings.pop(0)
+                kwargs["year"] = y
+                name = out_name.replace(".xlsx", f"_{y}.xlsx")
+            if with_workers:
+                kwargs["workers"] = int(settings.pop(0))
+            stand_pfad = None
+            if with_toleranz:
+                kwargs["toleranz"] = int(settings.pop(0))
+                kwargs["monat"] = settings.pop(0)
+                fortschreiben, vorher = settings.pop(0), settings.pop(0)
+                if fortschreiben or vorher:
+                    stand_pfad = _stand_datei(vorher, out_name.replace(".xlsx", "_stand.sqlite"))
+                    kwargs["stand"] = stand_pfad
+            cancel = threading.Event()
+            _jobs[(request.session_hash, label)] = cancel
+            try:
+                for result, log, status in _run(fn, f, name, cancel=cancel, **kwargs):
+                    if not with_toleranz:
+                        yield result, log, status
+                    else:
+                        # Den Stand nur nach einem erfolgreichen Lauf zurückgeben
+                        yield result, log, status, stand_pfad if result and stand_pfad else None
+            finally:
+                if _jobs.get((request.session_hash, label)) is cancel:
+                    del _jobs[(request.session_hash, label)]
+
+        def _stop(request: gr.Request):
+            cancel = _jobs.get((request.session_hash, label))
+            if cancel is not None:
+                cancel.set()
+
+        btn.click(
+            _click,
+            inputs=[files] + [c for c in (year, workers, toleranz, monat, stand, stand_datei) if c is not None] + [details],
+            outputs=[out_file, logs, status] + ([out_stand] if with_toleranz else []),
+            # Begrenzt wird über den Auftrags-Pool, nicht über Gradio
+            concurrency_limit=None,
+        )
+        stop.click(_stop, None, None)
 
 
 def build_app():
@@ -87,20 +226,22 @@ def build_app():
         _make_tab(
             "AAG Erstattungen",
             "PDF(s) der AAG-Erstattungen hochladen. Ergebnis: Excel mit U1- und U2-Tabelle.",
-            aag_erstattungen.process,
+            "aag_erstattungen.process",
             "AAG_Erstattungen.xlsx",
             with_year=False,
+            with_workers=True,
         )
         _make_tab(
             "Verdienstabrechnungen",
             "PDF(s) der Gehaltsabrechnungen hochladen.",
-            abrechnungen.process,
+            "abrechnungen.process",
             "abrechnungen.xlsx",
+            with_workers=True,
         )
         _make_tab(
             "AG Belastung",
             "Genau ein PDF der AG-Belastung hochladen (Dateiname = Monat).",
-            ag_belastung.process,
+            "ag_belastung.process",
             "ag_belastung.xlsx",
             with_year=False,
             single_file=True,
@@ -108,30 +249,46 @@ def build_app():
         _make_tab(
             "Lohnjournal",
             "Genau ein PDF des Lohnjournals hochladen.",
-            lohnjournal.process,
+            "lohnjournal.process",
             "lohnjournal.xlsx",
             with_year=False,
             single_file=True,
         )
         _make_tab(
             "Kontoabgleich GLS",
-            "GLS-Konto-CSV und GLS-Buchhaltungs-XLSX hochladen.",
-            kontoabgleich_gls.process,
+            "GLS-Konto-CSV und GLS-Buchhaltungs-XLSX hochladen. Für mehrere Konten oder Monate "
+            "je ein Paar hochladen; die Dateien werden über Kontoname bzw. Zeitraum im Dateinamen "
+            "zugeordnet (z. B. `GLS_Konto_2025-03.csv` + `GLS_Buchhaltung_2025-03.xlsx`).",
+            "kontoabgleich_gls.process",
             "kontoabgleich_gls.xlsx",
             with_year=False,
+            with_workers=True,
+            with_toleranz=True,
             file_types=(".csv", ".xls", ".xlsx"),
         )
         _make_tab(
             "Kontoabgleich PayPal",
-            "PayPal-Konto-CSV und PayPal-Buchhaltungs-XLSX hochladen.",
-            kontoabgleich_paypal.process,
+            "PayPal-Konto-CSV und PayPal-Buchhaltungs-XLSX hochladen. Für mehrere Konten oder "
+            "Monate je ein Paar hochladen; die Dateien werden über Kontoname bzw. Zeitraum im "
+            "Dateinamen zugeordnet (z. B. `Paypal_Konto_2025-03.csv` + `Paypal_Buchhaltung_2025-03.xlsx`).",
+            "kontoabgleich_paypal.process",
             "kontoabgleich_paypal.xlsx",
             with_year=False,
+            with_workers=True,
+            with_toleranz=True,
             file_types=(".csv", ".xls", ".xlsx"),
         )
 
     return demo
 
 
+def launch(**kwargs):
+    """Startet die Oberfläche, wärmt danach die Arbeitsprozesse vor und blockiert bis zum Ende."""
+    demo = build_app()
+    demo.launch(prevent_thread_lock=True, **kwargs)
+    warm_up()
+    demo.block_thread()
+
+
 if __name__ == "__main__":
-    build_app().launch()
+    launch()
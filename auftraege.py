@@ -0,0 +1,325 @@
+"""Ausführung der Auswertungen in einem Pool von Arbeitsprozessen.
+
+pypdf und openpyxl rechnen in reinem Python und halten dabei den GIL. Liefen
+die ``process``-Funktionen im Server-Prozess der Gradio-App, würden die
+Oberfläche und die Aufträge anderer Benutzer ausgebremst. Der
+:class:`Executor` verteilt die Aufträge daher auf eine feste Zahl dauerhaft
+laufender Arbeitsprozesse, die die Skripte beim Start einmal importieren.
+Weitere Aufträge warten in einer Warteschlange, deren Position angezeigt
+werden kann.
+
+Jeder Auftrag hat ein Zeitlimit. Wird es überschritten oder der Auftrag
+abgebrochen, endet er bei der nächsten Fortschrittsmeldung
+(:func:`protokoll.progress`); reagiert der Arbeitsprozess nicht innerhalb von
+``GRACE_SECONDS``, wird er beendet und durch einen neuen ersetzt.
+
+Konfiguration über Umgebungsvariablen:
+
+* ``ERDLINGE_JOBS``: gleichzeitig laufende Aufträge (Standard: Anzahl CPUs, höchstens 4)
+* ``ERDLINGE_JOB_TIMEOUT``: Zeitlimit je Auftrag in Sekunden (Standard: 1800, ``0`` = ohne)
+"""
+
+import atexit
+import collections
+import importlib
+import logging
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+
+import protokoll
+
+JOBS = int(os.environ.get("ERDLINGE_JOBS") or min(os.cpu_count() or 1, 4))
+JOB_TIMEOUT = float(os.environ.get("ERDLINGE_JOB_TIMEOUT", "1800"))
+GRACE_SECONDS = 10
+POLL_SECONDS = 0.2
+
+# Zustände eines Auftrags
+WARTET = "In Warteschlange"
+LAEUFT = "Läuft"
+FERTIG = "Fertig"
+ABGEBROCHEN = "Abgebrochen"
+ZEITLIMIT = "Zeitlimit überschritten"
+FEHLER = "Fehler"
+
+log = logging.getLogger("erdlinge.auftraege")
+
+
+def _resolve(fn):
+    """Die Funktion zu ``fn``; Text der Form ``"modul.funktion"`` wird erst hier importiert."""
+    if isinstance(fn, str):
+        module, _, name = fn.rpartition(".")
+        return getattr(importlib.import_module(module), name)
+    return fn
+
+
+def _worker_main(conn, cancel, preload):
+    """Hauptschleife eines Arbeitsprozesses: Aufträge empfangen und ausführen."""
+    for name in preload:
+        importlib.import_module(name)
+
+    def send_log(text):
+        conn.send(("log", text))
+
+    def send_progress(text, done, total):
+        conn.send(("progress", (text, done, total)))
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args, kwargs, level = task
+        with protokoll.forward(send_log, level), protokoll.track(send_progress, cancel):
+            try:
+                message = ("done", _resolve(fn)(*args, **kwargs))
+            except protokoll.JobCancelled:
+                message = ("cancelled", None)
+            except Exception as exc:  # noqa: BLE001 - Fehler sollen im Log landen
+                message = ("error", f"\nFEHLER: {exc}\n{traceback.format_exc()}")
+        conn.send(message)
+
+
+class Job:
+    """Ein Auftrag im :class:`Executor`.
+
+    ``status``, ``progress`` (Tupel aus :func:`protokoll.progress`),
+    ``result`` und :meth:`log` werden vom Pool laufend aktualisiert.
+    """
+
+    def __init__(self, executor, fn, args, kwargs, level, timeout):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.level = level
+        self.timeout = timeout
+        self.status = WARTET
+        self.progress = None
+        self.result = None
+        self._executor = executor
+        self._log = []
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def position(self):
+        """Position in der Warteschlange (1 = als Nächstes), 0 wenn nicht wartend."""
+        return self._executor.position(self)
+
+    @property
+    def done(self):
+        return self._finished.is_set()
+
+    def log(self):
+        return "".join(self._log)
+
+    def wait(self, timeout=None):
+        """Wartet höchstens ``timeout`` Sekunden; ``True``, wenn der Auftrag beendet ist."""
+        return self._finished.wait(timeout)
+
+    def cancel(self):
+        """Bricht den Auftrag ab; ein wartender Auftrag wird nicht mehr gestartet."""
+        self._cancel.set()
+        self._executor.withdraw(self)
+
+    def _append(self, text):
+        self._log.append(text)
+
+    def _finish(self, status, result=None, message=None):
+        if message:
+            self._log.append(message)
+        self.result = result
+        self.status = status
+        self._finished.set()
+
+
+class _Slot:
+    """Ein Arbeitsprozess samt Thread, der ihm Aufträge zuteilt."""
+
+    def __init__(self, executor, index):
+        self._executor = executor
+        self._index = index
+        self._process = None
+        self._conn = None
+        self._cancel = None
+        self._thread = threading.Thread(
+            target=self._serve, name=f"erdlinge-auftrag-{index}", daemon=True
+        )
+
+    def start(self):
+        self._start_process()
+        self._thread.start()
+
+    def _start_process(self):
+        ctx = self._executor.context
+        self._conn, child = ctx.Pipe()
+        self._cancel = ctx.Event()
+        # Nicht als Daemon, damit die Skripte selbst Prozess-Pools starten können
+        self._process = ctx.Process(
+            target=_worker_main,
+            args=(child, self._cancel, self._executor.preload),
+            name=f"erdlinge-auftrag-{self._index}",
+        )
+        self._process.start()
+        child.close()
+
+    def stop(self):
+        if self._process is None:
+            return
+        try:
+            self._conn.send(None)
+        except OSError:
+            pass
+        self._process.join(GRACE_SECONDS)
+        self._kill()
+
+    def _kill(self):
+        if self._process.is_alive():
+            self._process.kill()
+            self._process.join()
+        self._conn.close()
+        self._process = None
+
+    def _serve(self):
+        while True:
+            job = self._executor.take()
+            if job is None:
+                return
+            if self._process is None or not self._process.is_alive():
+                self._start_process()
+            self._run(job)
+
+    def _run(self, job):
+        self._cancel.clear()
+        job.status = LAEUFT
+        try:
+            self._conn.send((job.fn, job.args, job.kwargs, job.level))
+        except Exception as exc:  # noqa: BLE001 - z. B. nicht übertragbare Argumente
+            job._finish(FEHLER, message=f"\nFEHLER: {exc}\n")
+            return
+        deadline = time.monotonic() + job.timeout if job.timeout else None
+        stop_status = None
+        kill_at = None
+        while True:
+            try:
+                if self._conn.poll(POLL_SECONDS):
+                    kind, value = self._conn.recv()
+                    if kind == "log":
+                        job._append(value)
+                    elif kind == "progress":
+                        job.progress = value
+                    elif kind == "done":
+                        job._finish(FERTIG, result=value)
+                        return
+                    elif kind == "cancelled":
+                        job._finish(stop_status or ABGEBROCHEN, message=_stop_message(stop_status, job))
+                        return
+                    else:
+                        job._finish(FEHLER, message=value)
+                        return
+            except (EOFError, OSError):
+                self._kill()
+                job._finish(FEHLER, message="\nFEHLER: Arbeitsprozess unerwartet beendet\n")
+                return
+
+            # Auch nach jeder Meldung prüfen: Skripte, die häufiger als alle
+            # POLL_SECONDS Fortschritt melden, ließen sich sonst nie abbrechen
+            now = time.monotonic()
+            if stop_status is None:
+                if job._cancel.is_set():
+                    stop_status = ABGEBROCHEN
+                elif deadline is not None and now > deadline:
+                    stop_status = ZEITLIMIT
+                    log.warning("Auftrag nach %s s abgebrochen (Zeitlimit)", job.timeout)
+                if stop_status is not None:
+                    self._cancel.set()
+                    kill_at = now + GRACE_SECONDS
+            elif now > kill_at:
+                # Keine Fortschrittsmeldung mehr, der Prozess wird ersetzt
+                self._kill()
+                job._finish(stop_status, message=_stop_message(stop_status, job))
+                return
+
+
+def _stop_message(status, job):
+    if status == ZEITLIMIT:
+        return f"\nFEHLER: Zeitlimit von {job.timeout:g} s überschritten\n"
+    return "\nAbgebrochen.\n"
+
+
+class Executor:
+    """Verteilt Aufträge auf ``size`` dauerhaft laufende Arbeitsprozesse.
+
+    ``preload`` sind Modulnamen, die jeder Arbeitsprozess beim Start importiert.
+    ``timeout`` ist das Standard-Zeitlimit je Auftrag in Sekunden (``0`` = ohne).
+    """
+
+    def __init__(self, size=JOBS, timeout=JOB_TIMEOUT, preload=()):
+        # "spawn" auf allen Plattformen: der Server-Prozess hat bereits Threads
+        self.context = multiprocessing.get_context("spawn")
+        self.preload = tuple(preload)
+        self.timeout = timeout
+        self._waiting = collections.deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._slots = [_Slot(self, i) for i in range(max(size, 1))]
+        for slot in self._slots:
+            slot.start()
+        atexit.register(self.shutdown)
+
+    def submit(self, fn, *args, level=protokoll.SUMMARY, timeout=None, **kwargs):
+        """Stellt ``fn(*args, **kwargs)`` in die Warteschlange und liefert den :class:`Job`.
+
+        ``fn`` kann auch als ``"modul.funktion"`` angegeben werden; das Modul
+        wird dann nur im Arbeitsprozess importiert, nicht im aufrufenden.
+        """
+        job = Job(self, fn, args, kwargs, level, self.timeout if timeout is None else timeout)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Executor wurde bereits beendet")
+            self._waiting.append(job)
+            self._condition.notify()
+        return job
+
+    def position(self, job):
+        with self._condition:
+            try:
+                return self._waiting.index(job) + 1
+            except ValueError:
+                return 0
+
+    def withdraw(self, job):
+        """Entfernt einen noch wartenden Auftrag aus der Warteschlange."""
+        with self._condition:
+            try:
+                self._waiting.remove(job)
+            except ValueError:
+                return
+        job._finish(ABGEBROCHEN, message="\nAbgebrochen.\n")
+
+    def take(self):
+        """Nächster wartender Auftrag; ``None``, wenn der Executor beendet wird."""
+        with self._condition:
+            while not self._waiting and not self._closed:
+                self._condition.wait()
+            if self._closed:
+                return None
+            return self._waiting.popleft()
+
+    def shutdown(self):
+        """Beendet alle Arbeitsprozesse; wartende Aufträge werden verworfen."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            waiting = list(self._waiting)
+            self._waiting.clear()
+            self._condition.notify_all()
+        for job in waiting:
+            job._finish(ABGEBROCHEN, message="\nAbgebrochen.\n")
+        for slot in self._slots:
+            slot.stop()
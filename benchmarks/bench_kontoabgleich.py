@@ -0,0 +1,237 @@
+"""Benchmark für den Kontoabgleich (GLS und PayPal).
+
+Misst für synthetische Daten (siehe :mod:`testdaten_kontoabgleich`) jede Phase
+einzeln:
+
+* ``lese_konto``: ``lese_gls_konto`` bzw. ``lese_paypal_konto``
+* ``lese_buchhaltung``: ``lese_gls_buchhaltung`` bzw. ``lese_paypal_buchhaltung``
+* ``abgleich``: alle Durchgänge des Abgleichs samt Aufbereitung der Listen
+* ``schreibe_ergebnis``: Schreiben der Ergebnis-XLSX
+
+Jede Messung läuft in einem eigenen Prozess. Je Phase werden Laufzeit,
+Durchsatz (Zeilen pro Sekunde) und der höchste Speicherbedarf des Prozesses
+bis zum Ende der Phase festgehalten, dazu die Anzahl der Paare und offenen
+Posten. Das Ergebnis wird als JSON gespeichert; mit ``--vergleich`` wird es
+einer früheren Messung gegenübergestellt und Verschlechterungen oberhalb von
+``--schwelle`` führen zum Exit-Code 1. Abweichende Ergebnisse (andere Anzahl
+an Paaren) werden ebenfalls gemeldet.
+
+Aufruf::
+
+    python benchmarks/bench_kontoabgleich.py --zeilen 1000 10000 100000 --ausgabe basis.json
+    python benchmarks/bench_kontoabgleich.py --zeilen 1000 10000 100000 --vergleich basis.json
+
+Die erzeugten Eingabedateien werden unter ``--daten`` (Standard: Temp-Ordner)
+zwischengespeichert und bei gleichen Parametern wiederverwendet.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HIER))
+
+import testdaten_kontoabgleich  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+KONTEN = ("gls", "paypal")
+PHASEN = ("lese_konto", "lese_buchhaltung", "abgleich", "schreibe_ergebnis")
+# Kürzere Phasen schwanken zu stark, um sie zu bewerten
+MINDESTDAUER = 0.05
+
+
+def _speicher_mb():
+    """Bisher höchster Speicherbedarf (RSS) dieses Prozesses in MB."""
+    if resource is None:
+        return None
+    spitze = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux meldet KiB, macOS Bytes
+    return round(spitze / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def messen(konto, csv_pfad, xlsx_pfad, ziel, toleranz=0, monat=False):
+    """Führt den Abgleich einmal phasenweise aus und gibt die Messwerte zurück."""
+    modul = importlib.import_module(f"kontoabgleich_{konto}")
+    lese_konto = getattr(modul, f"lese_{konto}_konto")
+    lese_buchhaltung = getattr(modul, f"lese_{konto}_buchhaltung")
+    phasen = {}
+    start = [time.perf_counter()]
+
+    def phase(name, zeilen):
+        jetzt = time.perf_counter()
+        sekunden = jetzt - start[0]
+        phasen[name] = {
+            "sekunden": round(sekunden, 4),
+            "zeilen": zeilen,
+            "zeilen_pro_s": round(zeilen / sekunden) if sekunden else None,
+            "speicher_mb": _speicher_mb(),
+        }
+        start[0] = time.perf_counter()
+
+    speicher_start = _speicher_mb()
+    start[0] = time.perf_counter()
+    buchungen = lese_konto(csv_pfad)
+    phase("lese_konto", len(buchungen))
+    bh = lese_buchhaltung(xlsx_pfad)
+    phase("lese_buchhaltung", len(bh))
+    nur_konto, nur_bh, uebereinstimmend, abweichend = modul.abgleich(buchungen, bh, toleranz, monat)
+    phase("abgleich", len(buchungen) + len(bh))
+    modul.schreibe_ergebnis(ziel, nur_konto, nur_bh, uebereinstimmend, abweichend, toleranz, monat)
+    phase("schreibe_ergebnis", len(nur_konto) + len(nur_bh) + len(uebereinstimmend) + len(abweichend))
+    return {
+        "phasen": phasen,
+        "speicher_start_mb": speicher_start,
+        "ergebnis": {
+            "konto": len(buchungen),
+            "buchhaltung": len(bh),
+            "uebereinstimmend": len(uebereinstimmend),
+            "abweichend": len(abweichend),
+            "nur_konto": len(nur_konto),
+            "nur_buchhaltung": len(nur_bh),
+        },
+    }
+
+
+def _testdaten(daten, konto, zeilen, quote, seed):
+    """Pfade der Eingabedateien; fehlende werden erzeugt."""
+    ordner = os.path.join(daten, f"{konto}_{zeilen}_{quote}_{seed}")
+    erzeuge = testdaten_kontoabgleich.ERZEUGER[konto]
+    name = "GLS" if konto == "gls" else "Paypal"
+    pfade = (os.path.join(ordner, f"{name}_Konto.csv"), os.path.join(ordner, f"{name}_Buchhaltung.xlsx"))
+    if not all(os.path.exists(p) for p in pfade):
+        print(f"Erzeuge Testdaten: {konto}, {zeilen} Zeilen, Quote {quote}", file=sys.stderr)
+        pfade = erzeuge(ordner, zeilen, quote, seed=seed)
+    return pfade
+
+
+def _lauf(konto, pfade, ziel, toleranz, monat):
+    """Eine Messung in einem frischen Prozess (eigene Speicherspitze)."""
+    befehl = [sys.executable, os.path.abspath(__file__), "--messen", konto, *pfade, ziel, "--toleranz", str(toleranz)]
+    if monat:
+        befehl.append("--monat")
+    ausgabe = subprocess.run(befehl, check=True, capture_output=True, text=True).stdout
+    return json.loads(ausgabe.splitlines()[-1])
+
+
+def benchmark(konten, groessen, quote=0.9, toleranz=3, monat=False, wiederholungen=1, seed=1, daten=None):
+    """Misst alle Kombinationen aus Konto und Größe; je Phase zählt die schnellste Wiederholung."""
+    daten = daten or os.path.join(tempfile.gettempdir(), "erdlinge_benchmark")
+    laeufe = []
+    with tempfile.TemporaryDirectory(prefix="erdlinge_bench_") as tmp:
+        for konto in konten:
+            for zeilen in groessen:
+                pfade = _testdaten(daten, konto, zeilen, quote, seed)
+                messungen = [
+                    _lauf(konto, pfade, os.path.join(tmp, f"{konto}_{zeilen}.xlsx"), toleranz, monat)
+                    for _ in range(wiederholungen)
+                ]
+                bester = min(messungen, key=lambda m: sum(p["sekunden"] for p in m["phasen"].values()))
+                for name in PHASEN:
+                    p = bester["phasen"][name]
+                    p["sekunden"] = min(m["phasen"][name]["sekunden"] for m in messungen)
+                    p["zeilen_pro_s"] = round(p["zeilen"] / p["sekunden"]) if p["sekunden"] else None
+                lauf = {"konto": konto, "zeilen": zeilen, "quote": quote, **bester}
+                laeufe.append(lauf)
+                _ausgeben(lauf)
+    return {
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plattform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "toleranz": toleranz,
+        "monat": monat,
+        "wiederholungen": wiederholungen,
+        "seed": seed,
+        "laeufe": laeufe,
+    }
+
+
+def _ausgeben(lauf, basis=None):
+    print(f"{lauf['konto']} mit {lauf['zeilen']} Zeilen:")
+    for name in PHASEN:
+        p = lauf["phasen"][name]
+        zeile = (
+            f"  {name:<18} {p['sekunden']:9.3f} s {p['zeilen_pro_s'] or 0:>11,} Zeilen/s"
+            f" {p['speicher_mb'] or 0:8.1f} MB"
+        )
+        if basis is not None:
+            alt = basis["phasen"][name]["sekunden"]
+            if alt:
+                zeile += f"  ({(p['sekunden'] - alt) / alt:+.0%})"
+        print(zeile)
+
+
+def vergleiche(ergebnis, basis, schwelle):
+    """Stellt ``ergebnis`` der Messung ``basis`` gegenüber; gibt die Anzahl der Auffälligkeiten zurück."""
+    alt = {(lauf["konto"], lauf["zeilen"], lauf["quote"]): lauf for lauf in basis["laeufe"]}
+    probleme = 0
+    print(f"\nVergleich mit der Messung vom {basis['erstellt']} (Schwelle {schwelle:.0%}):")
+    for lauf in ergebnis["laeufe"]:
+        vorher = alt.get((lauf["konto"], lauf["zeilen"], lauf["quote"]))
+        if vorher is None:
+            print(f"{lauf['konto']} mit {lauf['zeilen']} Zeilen: nicht in der Basis")
+            continue
+        _ausgeben(lauf, vorher)
+        if lauf["ergebnis"] != vorher["ergebnis"]:
+            probleme += 1
+            print(f"  ABWEICHENDES ERGEBNIS: {vorher['ergebnis']} -> {lauf['ergebnis']}")
+        for name in PHASEN:
+            neu, bisher = lauf["phasen"][name]["sekunden"], vorher["phasen"][name]["sekunden"]
+            if max(neu, bisher) >= MINDESTDAUER and neu > bisher * (1 + schwelle):
+                probleme += 1
+                print(f"  LANGSAMER: {name} {bisher:.3f} s -> {neu:.3f} s")
+    return probleme
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark der Kontoabgleiche mit synthetischen Daten.")
+    ap.add_argument("--zeilen", type=int, nargs="+", default=[1000, 10000, 100000],
+                    help="Buchungen je Konto, mehrere Größen möglich (Standard: 1000 10000 100000)")
+    ap.add_argument("--konto", choices=KONTEN, action="append", help="Nur dieses Konto messen (mehrfach möglich)")
+    ap.add_argument("--quote", type=float, default=0.9, help="Anteil der Buchungen mit Gegenbuchung (Standard: 0.9)")
+    ap.add_argument("--toleranz", type=int, default=3, help="Datumstoleranz des Abgleichs in Tagen (Standard: 3)")
+    ap.add_argument("--monat", action="store_true", help="Zusätzlich gleicher Betrag im selben Monat")
+    ap.add_argument("--wiederholungen", type=int, default=1, help="Messungen je Größe, die schnellste zählt")
+    ap.add_argument("--seed", type=int, default=1, help="Startwert für die Testdaten")
+    ap.add_argument("--daten", help="Ordner für die erzeugten Testdaten (Standard: Temp-Ordner)")
+    ap.add_argument("--ausgabe", default="benchmark_kontoabgleich.json",
+                    help="JSON-Datei für die Messwerte (Standard: benchmark_kontoabgleich.json)")
+    ap.add_argument("--vergleich", metavar="BASIS", help="Mit einer früheren JSON-Messung vergleichen")
+    ap.add_argument("--schwelle", type=float, default=0.25,
+                    help="Erlaubte Verlangsamung je Phase beim Vergleich (Standard: 0.25 = 25 %%)")
+    ap.add_argument("--messen", nargs=4, metavar=("KONTO", "CSV", "XLSX", "ZIEL"), help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.messen:
+        konto, csv_pfad, xlsx_pfad, ziel = args.messen
+        print(json.dumps(messen(konto, csv_pfad, xlsx_pfad, ziel, args.toleranz, args.monat)))
+        return
+
+    ergebnis = benchmark(
+        args.konto or KONTEN, args.zeilen, args.quote, args.toleranz, args.monat,
+        args.wiederholungen, args.seed, args.daten,
+    )
+    with open(args.ausgabe, "w", encoding="utf-8") as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    print(f"Messwerte geschrieben: {args.ausgabe}")
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            basis = json.load(f)
+        if vergleiche(ergebnis, basis, args.schwelle):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
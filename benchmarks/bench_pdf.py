@@ -0,0 +1,188 @@
+"""Benchmark der PDF-Auswertungen: Textextraktion und Auswertung getrennt.
+
+Für die synthetischen PDFs aus :mod:`testdaten_pdf` wird je Modul gemessen:
+
+* ``extraktion``: Seitentext mit pypdf (:func:`pdf_text.extract_pages`, ohne Cache)
+* ``parsen``: Auswertung der bereits extrahierten Seitentexte
+* ``bereich`` (nur ``ag_belastung`` und ``lohnjournal``): nur die Tabellenzeilen
+  zwischen Kopf- und Fußzeile mit :func:`pdf_text.extract_body_lines`; als
+  Gegenstück zu ``extraktion``. Weichen die Zeilen von denen der ganzen Seiten
+  ab, wird das gemeldet.
+
+  - ``abrechnungen``: ``parse_pages`` für das Jahr 2025
+  - ``aag_erstattungen``, ``ag_belastung``, ``lohnjournal``: ``parse_pages``
+
+Berichtet werden Laufzeit und Seiten pro Sekunde; die Werte werden als JSON
+gespeichert und lassen sich wie beim Benchmark des Kontoabgleichs mit
+``--vergleich`` einer früheren Messung gegenüberstellen.
+
+Aufruf::
+
+    python benchmarks/bench_pdf.py --seiten 100 1000 --ausgabe basis_pdf.json
+    python benchmarks/bench_pdf.py --seiten 100 1000 --vergleich basis_pdf.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HIER))
+
+import pypdf  # noqa: E402
+
+import pdf_text  # noqa: E402
+import testdaten_pdf  # noqa: E402
+
+PHASEN = ("extraktion", "parsen", "bereich")
+# Module mit Tabellenbereich zwischen HEADER_END und FOOTER_START
+BEREICH = ("ag_belastung", "lohnjournal")
+JAHR = "2025"
+# Kürzere Phasen schwanken zu stark, um sie zu bewerten
+MINDESTDAUER = 0.05
+
+
+def parsen(modul, pfade, seiten):
+    """Wertet die extrahierten Seiten ``seiten`` (je PDF eine Liste) mit ``modul`` aus."""
+    art = modul.__name__
+    if art == "abrechnungen":
+        for texte in seiten:
+            modul.parse_pages(texte, {JAHR})
+    elif art == "aag_erstattungen":
+        u1, u2 = {}, {}
+        for pfad, texte in zip(pfade, seiten):
+            modul.parse_pages(pfad, texte, u1, u2)
+    else:
+        modul.parse_pages(seiten[0])
+
+
+def _zeitmessung(funktion, *args):
+    start = time.perf_counter()
+    ergebnis = funktion(*args)
+    return time.perf_counter() - start, ergebnis
+
+
+def messen(art, pfade, wiederholungen=3):
+    """Misst Extraktion und Auswertung; je Phase zählt die schnellste Wiederholung."""
+    # Import nicht mitmessen
+    modul = importlib.import_module(art)
+    zeiten = {phase: [] for phase in PHASEN if phase != "bereich" or art in BEREICH}
+    for _ in range(wiederholungen):
+        sekunden, seiten = _zeitmessung(lambda: [pdf_text.extract_pages(p) for p in pfade])
+        zeiten["extraktion"].append(sekunden)
+        zeiten["parsen"].append(_zeitmessung(parsen, modul, pfade, seiten)[0])
+        if "bereich" in zeiten:
+            sekunden, zeilen = _zeitmessung(
+                lambda: list(pdf_text.extract_body_lines(pfade[0], modul.HEADER_END, modul.FOOTER_START))
+            )
+            zeiten["bereich"].append(sekunden)
+    if "bereich" in zeiten:
+        if zeilen != list(pdf_text.iter_body_lines(seiten[0], modul.HEADER_END, modul.FOOTER_START)):
+            print(f"  ABWEICHUNG: {art}: Tabellenzeilen von extract_body_lines weichen ab", file=sys.stderr)
+    anzahl = sum(len(texte) for texte in seiten)
+    phasen = {}
+    for phase, werte in zeiten.items():
+        sekunden = min(werte)
+        phasen[phase] = {
+            "sekunden": round(sekunden, 4),
+            "seiten_pro_s": round(anzahl / sekunden, 1) if sekunden else None,
+        }
+    return {"art": art, "pdfs": len(pfade), "seiten": anzahl, "phasen": phasen}
+
+
+def _testdaten(daten, art, seiten):
+    """Pfade der PDFs; fehlende werden erzeugt."""
+    ordner = os.path.join(daten, f"{art}_{seiten}")
+    fertig = os.path.join(ordner, "pfade.json")
+    if os.path.exists(fertig):
+        with open(fertig, encoding="utf-8") as f:
+            return json.load(f)
+    print(f"Erzeuge Testdaten: {art}, {seiten} Seiten", file=sys.stderr)
+    pfade = testdaten_pdf.erzeuge(art, ordner, seiten)
+    with open(fertig, "w", encoding="utf-8") as f:
+        json.dump(pfade, f)
+    return pfade
+
+
+def _ausgeben(lauf, basis=None):
+    print(f"{lauf['art']} mit {lauf['seiten']} Seiten in {lauf['pdfs']} PDF(s):")
+    for phase, p in lauf["phasen"].items():
+        zeile = f"  {phase:<12} {p['sekunden']:9.3f} s {p['seiten_pro_s'] or 0:>12,.1f} Seiten/s"
+        if basis is not None and basis["phasen"].get(phase, {}).get("sekunden"):
+            alt = basis["phasen"][phase]["sekunden"]
+            zeile += f"  ({(p['sekunden'] - alt) / alt:+.0%})"
+        print(zeile)
+
+
+def benchmark(arten, groessen, wiederholungen=3, daten=None):
+    daten = daten or os.path.join(tempfile.gettempdir(), "erdlinge_benchmark")
+    laeufe = []
+    for art in arten:
+        for seiten in groessen:
+            lauf = messen(art, _testdaten(daten, art, seiten), wiederholungen)
+            laeufe.append(lauf)
+            _ausgeben(lauf)
+    return {
+        "erstellt": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pypdf": pypdf.__version__,
+        "plattform": platform.platform(),
+        "wiederholungen": wiederholungen,
+        "laeufe": laeufe,
+    }
+
+
+def vergleiche(ergebnis, basis, schwelle):
+    """Stellt ``ergebnis`` der Messung ``basis`` gegenüber; gibt die Anzahl der Verschlechterungen zurück."""
+    alt = {(lauf["art"], lauf["seiten"]): lauf for lauf in basis["laeufe"]}
+    probleme = 0
+    print(f"\nVergleich mit der Messung vom {basis['erstellt']} (Schwelle {schwelle:.0%}):")
+    for lauf in ergebnis["laeufe"]:
+        vorher = alt.get((lauf["art"], lauf["seiten"]))
+        if vorher is None:
+            print(f"{lauf['art']} mit {lauf['seiten']} Seiten: nicht in der Basis")
+            continue
+        _ausgeben(lauf, vorher)
+        for phase in lauf["phasen"].keys() & vorher["phasen"].keys():
+            neu, bisher = lauf["phasen"][phase]["sekunden"], vorher["phasen"][phase]["sekunden"]
+            if max(neu, bisher) >= MINDESTDAUER and neu > bisher * (1 + schwelle):
+                probleme += 1
+                print(f"  LANGSAMER: {phase} {bisher:.3f} s -> {neu:.3f} s")
+    return probleme
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark der PDF-Auswertungen mit synthetischen PDFs.")
+    ap.add_argument("--seiten", type=int, nargs="+", default=[100, 1000],
+                    help="Seiten je Modul, mehrere Größen möglich (Standard: 100 1000)")
+    ap.add_argument("--art", choices=testdaten_pdf.ARTEN, action="append",
+                    help="Nur dieses Modul messen (mehrfach möglich)")
+    ap.add_argument("--wiederholungen", type=int, default=3,
+                    help="Messungen je Größe, die schnellste zählt (Standard: 3)")
+    ap.add_argument("--daten", help="Ordner für die erzeugten PDFs (Standard: Temp-Ordner)")
+    ap.add_argument("--ausgabe", default="benchmark_pdf.json",
+                    help="JSON-Datei für die Messwerte (Standard: benchmark_pdf.json)")
+    ap.add_argument("--vergleich", metavar="BASIS", help="Mit einer früheren JSON-Messung vergleichen")
+    ap.add_argument("--schwelle", type=float, default=0.25,
+                    help="Erlaubte Verlangsamung je Phase beim Vergleich (Standard: 0.25 = 25 %%)")
+    args = ap.parse_args()
+
+    ergebnis = benchmark(args.art or testdaten_pdf.ARTEN, args.seiten, args.wiederholungen, args.daten)
+    with open(args.ausgabe, "w", encoding="utf-8") as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    print(f"Messwerte geschrieben: {args.ausgabe}")
+    if args.vergleich:
+        with open(args.vergleich, encoding="utf-8") as f:
+            basis = json.load(f)
+        if vergleiche(ergebnis, basis, args.schwelle):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""Erzeugt synthetische Eingabedateien für den Kontoabgleich.
+
+Für Benchmarks und zum Ausprobieren ohne echte Kontodaten entstehen je Konto
+eine Konto-CSV im Format des Bank-Exports und eine passende
+Buchhaltungs-XLSX:
+
+* ``GLS_Konto.csv`` (Buchungstag, Valutadatum, Betrag, Verwendungszweck; UTF-8,
+  Semikolon) und ``GLS_Buchhaltung.xlsx``
+* ``Paypal_Konto.csv`` (Datum, Brutto, Gebühr, Name, Hinweis, Typ; UTF-8 mit
+  BOM, Komma) und ``Paypal_Buchhaltung.xlsx``; Zahlungseingänge haben eine
+  Gebühr, die die Buchhaltung als eigene Buchung führt
+
+``quote`` ist der Anteil der Kontobuchungen mit Gegenbuchung in der
+Buchhaltung. Davon trägt der Anteil ``verschoben`` ein um ein bis drei Tage
+abweichendes Datum (nur mit Datumstoleranz zuzuordnen), bei GLS ein weiterer
+Teil das Valutadatum statt des Buchungstags. Zusätzlich enthält die
+Buchhaltung Buchungen ohne Gegenstück im Konto. Wiederkehrende Beträge
+(Beiträge, Miete) sorgen wie in echten Daten für viele gleiche Schlüssel.
+
+Aufruf::
+
+    python benchmarks/testdaten_kontoabgleich.py ZIELORDNER --zeilen 100000 --quote 0.9
+"""
+
+import argparse
+import csv
+import os
+import random
+from datetime import date, datetime, timedelta
+
+from openpyxl import Workbook
+
+START = date(2020, 1, 1)
+BUCHHALTUNG_KOPF = ["Belegnr.", "Datum", "Buchungstext", "Gutschrift / Soll", "Lastschrift / Haben", "Saldo"]
+
+# Wiederkehrende Beträge in Cent (Beiträge, Miete, Abschläge)
+_FESTBETRAEGE = [15000, 23000, 8500, 4200, 12000, -185000, -24500, -9900, -3590, -120000]
+_MONATE = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August",
+           "September", "Oktober", "November", "Dezember"]
+_NAMEN = ["Müller", "Schmidt", "Schneider", "Fischer", "Weber", "Meyer", "Wagner",
+          "Becker", "Schulz", "Hoffmann", "Koch", "Richter", "Klein", "Wolf"]
+_ZWECKE = [
+    "Elternbeitrag {name} {monat}",
+    "Miete {monat} Objekt {nr}",
+    "SEPA-Lastschrift Stadtwerke Kd-Nr {nr}",
+    "Rechnung {nr} {name}",
+    "Gehalt {monat} {name}",
+    "Spende {name}",
+    "Erstattung Auslagen {name} Beleg {nr}",
+]
+_PAYPAL_TYPEN = ["Zahlung", "Spende", "Allgemeine Zahlung", "Rückzahlung"]
+
+
+def _betrag(cent):
+    """Betrag in deutscher Schreibweise ("-1.234,56")."""
+    vorzeichen = "-" if cent < 0 else ""
+    euro, rest = divmod(abs(cent), 100)
+    return f"{vorzeichen}{euro:,}".replace(",", ".") + f",{rest:02d}"
+
+
+def _zufallsbetrag(rng, groesse=200000):
+    """Betrag in Cent: teils wiederkehrend, sonst log-normal verteilt."""
+    if rng.random() < 0.25:
+        return rng.choice(_FESTBETRAEGE)
+    cent = max(1, min(int(rng.lognormvariate(9, 1.3)), groesse * 100))
+    return cent if rng.random() < 0.45 else -cent
+
+
+def _zweck(rng, tag):
+    return rng.choice(_ZWECKE).format(
+        name=rng.choice(_NAMEN), monat=_MONATE[tag.month - 1], nr=rng.randrange(10000, 99999)
+    )
+
+
+def _gegenbuchung(rng, tag, verschoben):
+    """Datum der Buchhaltung: meist gleich, im Anteil ``verschoben`` 1–3 Tage daneben."""
+    if rng.random() < verschoben:
+        return tag + timedelta(days=rng.choice([-3, -2, -1, 1, 2, 3]))
+    return tag
+
+
+def schreibe_buchhaltung(pfad, buchungen):
+    """Schreibt (datum, cent, text) als Buchhaltungs-XLSX, nach Datum sortiert, mit Anfangssaldo."""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("Buchungen")
+    ws.append(BUCHHALTUNG_KOPF)
+    saldo = 1000000
+    ws.append([None, None, "Anfangssaldo", None, None, saldo / 100])
+    for nr, (tag, cent, text) in enumerate(sorted(buchungen, key=lambda b: b[0]), 1):
+        saldo += cent
+        ws.append([
+            nr,
+            datetime.combine(tag, datetime.min.time()),
+            text,
+            cent / 100 if cent >= 0 else None,
+            -cent / 100 if cent < 0 else None,
+            saldo / 100,
+        ])
+    wb.save(pfad)
+
+
+def _tage(zeilen, tage):
+    return tage or max(365, zeilen // 100)
+
+
+def erzeuge_gls(ordner, zeilen, quote=0.9, verschoben=0.05, seed=1, tage=None):
+    """Erzeugt ``GLS_Konto.csv`` und ``GLS_Buchhaltung.xlsx`` in ``ordner``; gibt beide Pfade zurück."""
+    rng = random.Random(seed)
+    tage = _tage(zeilen, tage)
+    konto = []
+    buchhaltung = []
+    for _ in range(zeilen):
+        buchungstag = START + timedelta(days=rng.randrange(tage))
+        valutadatum = buchungstag + timedelta(days=rng.choice([0, 0, 0, 1, 2]))
+        cent = _zufallsbetrag(rng)
+        zweck = _zweck(rng, buchungstag)
+        konto.append((buchungstag, valutadatum, cent, zweck))
+        if rng.random() < quote:
+            tag = valutadatum if rng.random() < 0.1 else buchungstag
+            buchhaltung.append((_gegenbuchung(rng, tag, verschoben), cent, zweck.upper()))
+    for _ in range(int(zeilen * 0.05)):
+        tag = START + timedelta(days=rng.randrange(tage))
+        buchhaltung.append((tag, _zufallsbetrag(rng), "Umbuchung " + _zweck(rng, tag)))
+
+    os.makedirs(ordner, exist_ok=True)
+    csv_pfad = os.path.join(ordner, "GLS_Konto.csv")
+    with open(csv_pfad, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow(["Bezeichnung Auftragskonto", "Buchungstag", "Valutadatum",
+                    "Name Zahlungsbeteiligter", "Verwendungszweck", "Betrag", "Waehrung"])
+        # Der Export beginnt mit der neuesten Buchung
+        for buchungstag, valutadatum, cent, zweck in sorted(konto, key=lambda b: b[0], reverse=True):
+            w.writerow(["Girokonto", f"{buchungstag:%d.%m.%Y}", f"{valutadatum:%d.%m.%Y}",
+                        rng.choice(_NAMEN), zweck, _betrag(cent), "EUR"])
+    xlsx_pfad = os.path.join(ordner, "GLS_Buchhaltung.xlsx")
+    schreibe_buchhaltung(xlsx_pfad, buchhaltung)
+    return csv_pfad, xlsx_pfad
+
+
+def erzeuge_paypal(ordner, zeilen, quote=0.9, verschoben=0.05, seed=2, tage=None):
+    """Erzeugt ``Paypal_Konto.csv`` und ``Paypal_Buchhaltung.xlsx`` in ``ordner``; gibt beide Pfade zurück."""
+    rng = random.Random(seed)
+    tage = _tage(zeilen, tage)
+    konto = []
+    buchhaltung = []
+    for _ in range(zeilen):
+        tag = START + timedelta(days=rng.randrange(tage))
+        brutto = _zufallsbetrag(rng, groesse=2000)
+        # Gebühr für Zahlungseingänge: 2,49 % + 0,35 Euro
+        gebuehr = -(round(brutto * 0.0249) + 35) if brutto > 0 and rng.random() < 0.7 else 0
+        name = rng.choice(_NAMEN)
+        hinweis = _zweck(rng, tag) if rng.random() < 0.5 else ""
+        typ = rng.choice(_PAYPAL_TYPEN)
+        konto.append((tag, brutto, gebuehr, name, hinweis, typ))
+        if rng.random() < quote:
+            gegen = _gegenbuchung(rng, tag, verschoben)
+            buchhaltung.append((gegen, brutto, f"PayPal {name} {hinweis}".strip()))
+            if gebuehr:
+                buchhaltung.append((gegen, gebuehr, f"PayPal Gebühr {name}"))
+    for _ in range(int(zeilen * 0.05)):
+        tag = START + timedelta(days=rng.randrange(tage))
+        buchhaltung.append((tag, _zufallsbetrag(rng, groesse=2000), "Umbuchung PayPal"))
+
+    os.makedirs(ordner, exist_ok=True)
+    csv_pfad = os.path.join(ordner, "Paypal_Konto.csv")
+    with open(csv_pfad, "w", encoding="utf-8-sig", newline="") as f:
+        w = csv.writer(f)
+        w.writerow(["Datum", "Uhrzeit", "Name", "Typ", "Brutto", "Gebühr", "Netto", "Hinweis"])
+        for tag, brutto, gebuehr, name, hinweis, typ in sorted(konto, key=lambda b: b[0], reverse=True):
+            w.writerow([f"{tag:%d.%m.%Y}", f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:00",
+                        name, typ, _betrag(brutto), _betrag(gebuehr), _betrag(brutto + gebuehr), hinweis])
+    xlsx_pfad = os.path.join(ordner, "Paypal_Buchhaltung.xlsx")
+    schreibe_buchhaltung(xlsx_pfad, buchhaltung)
+    return csv_pfad, xlsx_pfad
+
+
+ERZEUGER = {"gls": erzeuge_gls, "paypal": erzeuge_paypal}
+
+
+def main():
+    ap = argparse.ArgumentParser(
+        description="Erzeugt synthetische Konto-CSVs und Buchhaltungs-XLSX für den Kontoabgleich."
+    )
+    ap.add_argument("ziel", help="Zielordner")
+    ap.add_argument("--zeilen", type=int, default=10000, help="Buchungen je Konto (Standard: 10000)")
+    ap.add_argument("--quote", type=float, default=0.9,
+                    help="Anteil der Kontobuchungen mit Gegenbuchung (Standard: 0.9)")
+    ap.add_argument("--verschoben", type=float, default=0.05,
+                    help="Anteil der Gegenbuchungen mit 1–3 Tagen Datumsabweichung (Standard: 0.05)")
+    ap.add_argument("--tage", type=int, default=None,
+                    help="Zeitraum in Tagen (Standard: Zeilen/100, mindestens 365)")
+    ap.add_argument("--seed", type=int, default=1, help="Startwert des Zufallsgenerators")
+    ap.add_argument("--konto", choices=sorted(ERZEUGER), action="append",
+                    help="Nur dieses Konto erzeugen (mehrfach möglich; Standard: alle)")
+    args = ap.parse_args()
+    for konto in args.konto or sorted(ERZEUGER):
+        pfade = ERZEUGER[konto](
+            args.ziel, args.zeilen, args.quote, args.verschoben, seed=args.seed, tage=args.tage
+        )
+        print(*pfade, sep="\n")
+
+
+if __name__ == "__main__":
+    main()
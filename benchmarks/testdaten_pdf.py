@@ -0,0 +1,275 @@
+"""Erzeugt anonymisierte Lohn-PDFs für Benchmarks der PDF-Auswertungen.
+
+Die echten Abrechnungen sind vertraulich. Die hier erzeugten PDFs enthalten
+erfundene Personen und Beträge, aber dieselben Textmarken und Zeilenaufbauten,
+an denen sich die Auswertungen orientieren:
+
+* Verdienstabrechnungen (``abrechnungen``): "Gehaltsabrechnung MM.JJJJ",
+  "Persönlich/Vertraulich", "Kosten- Kosten- Lohn" ... "GESAMTBRUTTO", ein
+  PDF je Monat, dazwischen Rückrechnungen für Vormonate und das Vorjahr
+* AAG-Erstattungsanträge (``aag_erstattungen``): U1, Mutterschaft und
+  Beschäftigungsverbot, teils storniert
+* AG-Belastung (``ag_belastung``): Tabelle nach "Pers.Nr. Einheiten" bis
+  "Lohnservice Wendel eG" mit Lohnarten und "aus RR:"-Zeilen
+* Lohnjournal (``lohnjournal``): Tabelle nach "Name E Kl" bis
+  "Negative Werte sind", je Person zwei Zeilen
+
+Die Größe wird in Seiten angegeben. Die PDFs werden ohne zusätzliche
+Abhängigkeiten direkt geschrieben (eine Textzeile je Zeile, Helvetica).
+
+Aufruf::
+
+    python benchmarks/testdaten_pdf.py ZIELORDNER --seiten 1000
+"""
+
+import argparse
+import math
+import os
+import random
+
+VORNAMEN = ["Anna", "Ben", "Clara", "David", "Eva", "Felix", "Greta", "Hannes",
+            "Ida", "Jonas", "Karla", "Lukas", "Mira", "Noah", "Olga", "Paul"]
+NACHNAMEN = ["Muster", "Beispiel", "Probe", "Test", "Schmidt", "Huber", "Maier",
+             "Wagner", "Lange", "Vogel"]
+KRANKENKASSEN = ["Techniker Krankenkasse", "AOK Bayern Die Gesundheitskasse",
+                 "DAK-Gesundheit", "IKK classic", "BKK firmus"]
+MONATSNAMEN = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli",
+               "August", "September", "Oktober", "November", "Dezember"]
+
+
+def _pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def schreibe_pdf(pfad, seiten):
+    """Schreibt ein PDF mit einer Seite je Zeilenliste in ``seiten``."""
+    objekte = []
+
+    def neu(inhalt):
+        objekte.append(inhalt)
+        return len(objekte)
+
+    schrift = neu(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    wurzel = neu(None)
+    kinder = []
+    for zeilen in seiten:
+        befehle = [
+            f"BT /F1 8 Tf 1 0 0 1 30 {800 - 10 * i} Tm ({_pdf_text(zeile)}) Tj ET"
+            for i, zeile in enumerate(zeilen)
+        ]
+        strom = "\n".join(befehle).encode("cp1252")
+        inhalt = neu(b"<< /Length %d >>\nstream\n" % len(strom) + strom + b"\nendstream")
+        kinder.append(neu(
+            f"<< /Type /Page /Parent {wurzel} 0 R /MediaBox [0 0 595 842]"
+            f" /Resources << /Font << /F1 {schrift} 0 R >> >> /Contents {inhalt} 0 R >>".encode()
+        ))
+    objekte[wurzel - 1] = (
+        f"<< /Type /Pages /Kids [{' '.join(f'{k} 0 R' for k in kinder)}] /Count {len(kinder)} >>".encode()
+    )
+    katalog = neu(f"<< /Type /Catalog /Pages {wurzel} 0 R >>".encode())
+
+    daten = bytearray(b"%PDF-1.4\n")
+    positionen = []
+    for nr, inhalt in enumerate(objekte, 1):
+        positionen.append(len(daten))
+        daten += b"%d 0 obj\n" % nr + inhalt + b"\nendobj\n"
+    xref = len(daten)
+    daten += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objekte) + 1)
+    for position in positionen:
+        daten += b"%010d 00000 n \n" % position
+    daten += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (
+        len(objekte) + 1, katalog, xref,
+    )
+    with open(pfad, "wb") as f:
+        f.write(daten)
+    return pfad
+
+
+def _eur(wert):
+    """Betrag in deutscher Schreibweise ("1.234,56")."""
+    text = f"{abs(wert):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    return ("-" if wert < 0 else "") + text
+
+
+def personen(anzahl):
+    """Eindeutige, erfundene (Vorname, Nachname)."""
+    kombinationen = len(VORNAMEN) * len(NACHNAMEN)
+    return [
+        (VORNAMEN[i % len(VORNAMEN)],
+         NACHNAMEN[(i // len(VORNAMEN)) % len(NACHNAMEN)] + (str(i // kombinationen) if i >= kombinationen else ""))
+        for i in range(anzahl)
+    ]
+
+
+def abrechnung_seite(rng, nr, vorname, nachname, monat, jahr, rueckrechnung=False):
+    zeilen = ["Lohnservice Wendel eG", f"Gehaltsabrechnung {monat:02d}.{jahr}"]
+    if rueckrechnung:
+        zeilen.append("Rückrechnung")
+    zeilen.append("Persönlich/Vertraulich")
+    if nr % 2 == 0:
+        zeilen.append("Frau" if nr % 4 == 0 else "Herr")
+        zeilen.append(f"{vorname} {nachname} Abteilung Kita {nr % 3}")
+    else:
+        zeilen.append(f"{vorname} {nachname} {KRANKENKASSEN[nr % len(KRANKENKASSEN)]} {rng.randrange(10000, 99999)}")
+    zeilen.append("Steuerklasse Kinder Konf. Arb.Zeit Std.")
+    zeilen.append(f"{1 + nr % 5} {_eur(39.0 - (nr % 3) * 5)} {_eur(7.8)}")
+    zeilen.append("Kosten- Kosten- Lohn")
+    zeilen.append("stelle träger art Bezeichnung Betrag")
+    zeilen.append(f"1001 TVöD SuE Arbeitnehmer Grundvergütung S 8a Stufe {1 + nr % 5} {_eur(3200 + nr % 900)} * *")
+    if nr % 2 == 0:
+        zeilen.append(f"2051 Arbeitsmarktzulage {_eur(150)} {_eur(150)} * *")
+    if nr % 3 == 0:
+        zeilen.append(f"2052 Münchenzulage {_eur(270)} {_eur(270)} * *")
+    zeilen.append(f"2400 Zuschlag Nacht steuerfrei {_eur(rng.randrange(0, 8000) / 100)} *")
+    zeilen.append("")
+    zeilen.append(f"GESAMTBRUTTO {_eur(3800 + nr % 900)}")
+    if nr % 4 == 1:
+        zeilen.append(f"2300 Fahrten zw. Whg./Arbeit steuerfrei 15 Tg. {_eur(46)} {_eur(46)} *")
+    zeilen.append("Auszahlungsbetrag")
+    return zeilen
+
+
+def erzeuge_abrechnungen(ordner, seiten, jahr=2025, seed=1):
+    """Zwölf Monats-PDFs ("Verdienstabrechnung MM.JJJJ.pdf") mit zusammen etwa ``seiten`` Seiten."""
+    rng = random.Random(seed)
+    os.makedirs(ordner, exist_ok=True)
+    je_monat = max(1, math.ceil(seiten / 12))
+    leute = personen(je_monat)
+    pfade = []
+    for monat in range(1, 13):
+        blaetter = []
+        for nr, (vorname, nachname) in enumerate(leute):
+            blaetter.append(abrechnung_seite(rng, nr, vorname, nachname, monat, jahr))
+            if nr % 20 == 7:
+                # Rückrechnung für den Vormonat, im Januar für das Vorjahr
+                vormonat, vorjahr = (monat - 1, jahr) if monat > 1 else (12, jahr - 1)
+                blaetter.append(abrechnung_seite(rng, nr, vorname, nachname, vormonat, vorjahr, True))
+        pfade.append(schreibe_pdf(os.path.join(ordner, f"Verdienstabrechnung {monat:02d}.{jahr}.pdf"), blaetter))
+    return pfade
+
+
+def aag_seite(rng, vorname, nachname, typ, storno=False, rueckrechnung=False):
+    zeilen = ["Rückrechnung"] if rueckrechnung else []
+    zeilen += [
+        "AAG Erstattungsantrag",
+        "Vorname Rentenversicherungsnummer",
+        f"{vorname} {rng.randrange(10, 99)}010180M{rng.randrange(100, 999)}",
+        "Name Pers.Nr.",
+        f"{nachname} {rng.randrange(10000, 99999):05d}",
+    ]
+    wert = _eur(rng.randint(1000, 300000) / 100)
+    if typ == "U1":
+        zeilen += ["Arbeitsunfähigkeit - U1", f"Summe Erstattungsbetrag {wert} €"]
+    elif typ == "MU":
+        zeilen += ["Mutterschaft - U2", f"Zuschuss im Monat {wert} €"]
+    else:
+        zeilen += ["Beschäftigungsverbot - U2", f"Summe Erstattungsbetrag {wert} €"]
+    if storno:
+        zeilen.append("X Stornierung")
+    return zeilen
+
+
+def erzeuge_aag(ordner, seiten, seed=2, je_datei=50):
+    """Erstattungsanträge ("Erstattung_NN.pdf") mit je bis zu ``je_datei`` Seiten."""
+    rng = random.Random(seed)
+    os.makedirs(ordner, exist_ok=True)
+    leute = personen(max(10, seiten // 20))
+    pfade = []
+    for datei in range(math.ceil(seiten / je_datei)):
+        blaetter = []
+        for _ in range(min(je_datei, seiten - datei * je_datei)):
+            vorname, nachname = rng.choice(leute)
+            blaetter.append(aag_seite(
+                rng, vorname, nachname, rng.choice(["U1", "U1", "MU", "BV"]),
+                storno=rng.random() < 0.1, rueckrechnung=rng.random() < 0.05,
+            ))
+        pfade.append(schreibe_pdf(os.path.join(ordner, f"Erstattung_{datei + 1:02d}.pdf"), blaetter))
+    return pfade
+
+
+def ag_belastung_block(nr, vorname, nachname):
+    if nr % 7 == 3:
+        block = [f"{1000 + nr:05d} {nachname} {vorname} {_eur(3000 + nr % 500)}",
+                 f"aus RR: {_eur(10)} {_eur(36010 + nr % 500 * 12)}"]
+    else:
+        block = [f"{1000 + nr:05d} {nachname} {vorname} {_eur(3000 + nr % 500)} {_eur(36000 + nr % 500 * 12)}"]
+    block.append(f"SV-AG Anteil (Pflicht) {_eur(600 + nr % 100)} {_eur(7200 + nr % 100)}")
+    block.append(f"Umlage 1/2 {_eur(50)} {_eur(600)}")
+    block.append(f"Insolvenzgeldumlage {_eur(2)} {_eur(24)}")
+    if nr % 5 == 0:
+        block.append(f"Erst. Entg. AU {_eur(120)} {_eur(480)}")
+    if nr % 6 == 0:
+        block.append(f"Erst. Mutterschutz {_eur(900)}")
+        block.append(f"aus RR: SV-AG Anteil (Pflicht) {_eur(5)}")
+        block.append(f"aus RR: {_eur(4)} {_eur(100)}")
+    if nr % 9 == 0:
+        block.append(f"geringf. p. Steuer {_eur(10)} {_eur(120)}")
+    block.append(f"Zwischensummen {_eur(4000)} {_eur(48000)}")
+    block.append("Summe Arbeitgeber 123,00")
+    return block
+
+
+def erzeuge_ag_belastung(ordner, seiten, monat=10, je_seite=5):
+    """AG-Belastung eines Monats ("Oktober.pdf") mit ``je_seite`` Personen je Seite."""
+    os.makedirs(ordner, exist_ok=True)
+    bloecke = [ag_belastung_block(nr, *person) for nr, person in enumerate(personen(seiten * je_seite))]
+    blaetter = []
+    for start in range(0, len(bloecke), je_seite):
+        rumpf = [zeile for block in bloecke[start : start + je_seite] for zeile in block]
+        blaetter.append(
+            ["AG Belastung", f"Monat {MONATSNAMEN[monat - 1]}", "Pers.Nr. Einheiten Lohnart Monat Gesamt"]
+            + rumpf
+            + ["Lohnservice Wendel eG", f"Seite {start // je_seite + 1}"]
+        )
+    return schreibe_pdf(os.path.join(ordner, f"{MONATSNAMEN[monat - 1]}.pdf"), blaetter)
+
+
+def erzeuge_lohnjournal(ordner, seiten, jahr=2025, je_seite=6):
+    """Lohnjournal ("12.JJJJ.pdf") mit ``je_seite`` Personen je Seite."""
+    os.makedirs(ordner, exist_ok=True)
+    bloecke = [
+        [f"{100000 + nr} 1 I 0 1,0 ev 01.01.2020 {_eur(42000 + nr % 1000)} {_eur(41000 + nr % 1000)} {_eur(10)}",
+         f"{nachname}, {vorname} {_eur(8400 + nr % 1000)} {_eur(1.5)} {_eur(3)}"]
+        for nr, (vorname, nachname) in enumerate(personen(seiten * je_seite))
+    ]
+    blaetter = []
+    for start in range(0, len(bloecke), je_seite):
+        rumpf = [zeile for block in bloecke[start : start + je_seite] for zeile in block]
+        if start + je_seite >= len(bloecke):
+            rumpf.append(f"Summen: {_eur(1)}")
+        blaetter.append(
+            [f"Lohnjournal 12.{jahr}", "Name E Kl St Kin Konf Eintritt Gesamtbrutto Steuerbrutto"]
+            + rumpf
+            + ["Negative Werte sind Rückrechnungen", f"Seite {start // je_seite + 1}"]
+        )
+    return schreibe_pdf(os.path.join(ordner, f"12.{jahr}.pdf"), blaetter)
+
+
+def erzeuge(art, ordner, seiten):
+    """Erzeugt die PDFs einer Art und gibt die Liste ihrer Pfade zurück."""
+    if art == "abrechnungen":
+        return erzeuge_abrechnungen(ordner, seiten)
+    if art == "aag_erstattungen":
+        return erzeuge_aag(ordner, seiten)
+    if art == "ag_belastung":
+        return [erzeuge_ag_belastung(ordner, seiten)]
+    if art == "lohnjournal":
+        return [erzeuge_lohnjournal(ordner, seiten)]
+    raise ValueError(f"Unbekannte Art: {art}")
+
+
+ARTEN = ("aag_erstattungen", "abrechnungen", "ag_belastung", "lohnjournal")
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Erzeugt anonymisierte Lohn-PDFs mit dem Aufbau der echten Dokumente.")
+    ap.add_argument("ziel", help="Zielordner; je Art entsteht ein Unterordner")
+    ap.add_argument("--seiten", type=int, default=100, help="Seiten je Art (Standard: 100)")
+    ap.add_argument("--art", choices=ARTEN, action="append", help="Nur diese Art erzeugen (mehrfach möglich)")
+    args = ap.parse_args()
+    for art in args.art or ARTEN:
+        print(*erzeuge(art, os.path.join(args.ziel, art), args.seiten), sep="\n")
+
+
+if __name__ == "__main__":
+    main()
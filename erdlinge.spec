@@ -34,6 +34,14 @@ _local_modules = [
     "lohnjournal.py",
     "kontoabgleich_gls.py",
     "kontoabgleich_paypal.py",
+    "pdf_text.py",
+    "protokoll.py",
+    "auftraege.py",
+    "kontoabgleich_common.py",
+    "kontoabgleich_stand.py",
+    "startzeiten.py",
+    "jahresabschluss.py",
+    "felder.py",
 ]
 datas += [(m, ".") for m in _local_modules]
 
@@ -41,6 +49,10 @@ datas += [(m, ".") for m in _local_modules]
 hiddenimports = []
 for _pkg in ["gradio", "gradio_client", "safehttpx", "groovy"]:
     hiddenimports += collect_submodules(_pkg)
+# ``app`` importiert die Skripte nicht mehr selbst (sie laden erst in den
+# Arbeitsprozessen); damit ihre Abhängigkeiten (pypdf, openpyxl, ...) trotzdem
+# gefunden werden, die eigenen Module ausdrücklich analysieren lassen.
+hiddenimports += [m[: -len(".py")] for m in _local_modules]
 
 
 a = Analysis(
@@ -0,0 +1,140 @@
+"""Deklarative Feldextraktion aus Seitentexten.
+
+Jeder Bericht beschreibt seine Felder als :class:`Feld`: Ankertext,
+Zeilenversatz, Wort(e) der Zeile und Parser. :class:`Vorlage` sucht beim
+Lesen einer Seite die erste Fundstelle jedes Ankers, ohne die Seite in Zeilen
+zu zerlegen. Gelesen und umgewandelt wird ein Feld erst beim Zugriff
+(:class:`Fundstellen`); Felder, die auf einer Seite nicht gebraucht werden,
+kosten also nichts.
+
+Beispiel::
+
+    SEITE = Vorlage(
+        vorname=Feld("Vorname Rentenversicherungsnummer", versatz=1, token=slice(None, -1)),
+        summe=Feld("Summe Erstattungsbetrag", token=slice(2, None), parser=parse_eur),
+        storno=Feld("X Stornierung"),
+    )
+    felder = SEITE.lesen(text)
+    betrag = -felder["summe"] if felder.hat("storno") else felder["summe"]
+
+Neue Layouts brauchen damit nur eine geänderte Vorlage.
+"""
+
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Feld:
+    """Ein Wert aus der ersten Zeile einer Seite, die ``anker`` enthält.
+
+    * ``versatz``: stattdessen die Zeile so viele Zeilen nach dem Anker
+    * ``teil``: ``"vor"`` bzw. ``"nach"`` nimmt nur den Text vor bzw. hinter
+      dem Anker (nur ohne ``versatz``)
+    * ``token``: Wort der an Leerzeichen geteilten Zeile (``int``) oder
+      mehrere Wörter (``slice``, wieder mit Leerzeichen verbunden); ``None``
+      liefert den ganzen Text
+    * ``parser``: wird zuletzt auf den Text angewendet
+    """
+
+    anker: str
+    versatz: int = 0
+    teil: str = None
+    token: object = None
+    parser: object = None
+
+
+class Vorlage:
+    """Die Felder eines Berichts, z. B. ``Vorlage(name=Feld(...), ...)``."""
+
+    def __init__(self, **felder):
+        self.felder = felder
+        self._anker = tuple(dict.fromkeys(feld.anker for feld in felder.values()))
+
+    def lesen(self, text):
+        """Sucht alle Anker in ``text`` und gibt ihre :class:`Fundstellen` zurück."""
+        # str.find je Anker ist deutlich schneller als ein gemeinsamer
+        # regulärer Ausdruck, da re keine Suche nach mehreren Texten kennt
+        positionen = {}
+        for anker in self._anker:
+            position = text.find(anker)
+            if position >= 0:
+                positionen[anker] = position
+        return Fundstellen(self, text, positionen)
+
+
+class Fundstellen:
+    """Erste Fundstelle jedes Ankers auf einer Seite; Felder werden beim Zugriff gelesen.
+
+    ``fundstellen[name]`` ist für Pflichtfelder: Fehlt der Anker, gibt es einen
+    ``KeyError`` mit Feld und Anker. ``get(name, default)`` ist für optionale
+    Felder und liefert ``default`` nur, wenn der Anker fehlt. Ist der Anker da,
+    aber das Feld nicht lesbar, melden beide dasselbe: ``IndexError``, wenn die
+    Zeile nach ``versatz`` oder das Wort ``token`` fehlt, ``ValueError``, wenn
+    der Parser scheitert, jeweils mit dem Namen des Felds.
+    """
+
+    __slots__ = ("vorlage", "text", "_positionen")
+
+    def __init__(self, vorlage, text, positionen):
+        self.vorlage = vorlage
+        self.text = text
+        self._positionen = positionen
+
+    def hat(self, name):
+        """Ob der Anker des Felds ``name`` auf der Seite vorkommt."""
+        return self.vorlage.felder[name].anker in self._positionen
+
+    def _zeilenanfang(self, feld, name):
+        try:
+            position = self._positionen[feld.anker]
+        except KeyError:
+            raise KeyError(f"{name}: '{feld.anker}' nicht gefunden") from None
+        text = self.text
+        start = text.rfind("\n", 0, position) + 1
+        for _ in range(feld.versatz):
+            start = text.find("\n", start) + 1
+            if start == 0:
+                raise IndexError(f"{name}: keine Zeile {feld.versatz} nach '{feld.anker}'")
+        return start
+
+    def zeile(self, name):
+        """Die Zeile des Felds ``name`` (mit Versatz), unverarbeitet."""
+        return self._zeile(self.vorlage.felder[name], name)
+
+    def _zeile(self, feld, name):
+        start = self._zeilenanfang(feld, name)
+        ende = self.text.find("\n", start)
+        return self.text[start:ende] if ende >= 0 else self.text[start:]
+
+    def zeilen(self, von, bis):
+        """Die Zeilen ab der Zeile von ``von`` bis vor die Zeile von ``bis``."""
+        felder = self.vorlage.felder
+        start, ende = self._zeilenanfang(felder[von], von), self._zeilenanfang(felder[bis], bis)
+        if start >= ende:
+            return []
+        return self.text[start:ende].split("\n")[:-1]
+
+    def __getitem__(self, name):
+        feld = self.vorlage.felder[name]
+        wert = self._zeile(feld, name)
+        if feld.teil is not None:
+            wert = wert.split(feld.anker)[0 if feld.teil == "vor" else 1]
+        token = feld.token
+        if token is not None:
+            if type(token) is slice:
+                wert = " ".join(wert.split(" ")[token])
+            else:
+                try:
+                    wert = wert.split(" ")[token]
+                except IndexError:
+                    raise IndexError(f"{name}: kein Wort {token} in '{wert}'") from None
+        if feld.parser is None:
+            return wert
+        try:
+            return feld.parser(wert)
+        except ValueError as exc:
+            raise ValueError(f"{name}: '{wert}' nicht lesbar ({exc})") from exc
+
+    def get(self, name, default=None):
+        """Wert des Felds ``name`` oder ``default``, wenn der Anker fehlt (siehe oben)."""
+        return self[name] if self.hat(name) else default
@@ -0,0 +1,345 @@
+"""Jahresabschluss: alle Auswertungen eines Jahres in einem Lauf.
+
+Die Eingaben werden in denselben Ordnern gesucht wie von den einzelnen
+Skripten:
+
+* ``aag_erstattungen/<JAHR>/*.pdf``
+* ``abrechnungen/<JAHR>/*.pdf``
+* ``ag_belastung/<JAHR>/<MONAT>.pdf`` (je Monat eine Auswertung)
+* ``lohnjournal/12.<JAHR>.pdf``
+* ``kontoabgleich/<JAHR>/`` oder ``kontoabgleich/``: GLS- und PayPal-Dateien;
+  aus ``kontoabgleich/`` nur die mit ``<JAHR>`` im Zeitraum des Dateinamens
+  und die ohne Zeitraum (mit Warnung)
+
+Zuerst wird der Text aller PDFs gemeinsam in einem Prozess-Pool gelesen (die
+größten Dateien zuerst) und im PDF-Cache abgelegt (siehe :mod:`pdf_text`).
+Danach laufen alle Auswertungen parallel und lesen die Seiten aus dem Cache.
+Ergebnisse, das Protokoll jeder Auswertung und eine Zusammenfassung mit
+Laufzeiten und Fehlern landen in einem gemeinsamen Ausgabeordner. Schlägt
+eine Auswertung fehl, laufen die übrigen weiter.
+"""
+
+import datetime
+import glob
+import importlib
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+import pdf_text
+import protokoll
+
+YEAR = str(datetime.date.today().year)
+ZUSAMMENFASSUNG = "zusammenfassung.txt"
+KONTO_ENDUNGEN = (".csv", ".xlsx", ".xls")
+
+log = logging.getLogger("erdlinge.jahresabschluss")
+
+
+@dataclass
+class Auswertung:
+    """Ein Aufruf von ``<modul>.process`` im Jahresabschluss."""
+
+    name: str
+    modul: str
+    eingaben: list
+    ausgabe: str  # Dateiname im Ausgabeordner
+    optionen: dict = field(default_factory=dict)
+
+    @property
+    def pdfs(self):
+        return [p for p in self.eingaben if p.lower().endswith(".pdf")]
+
+
+@dataclass
+class Ergebnis:
+    auswertung: Auswertung
+    sekunden: float
+    fehler: str = None
+    protokoll: str = ""
+
+
+def finde_auswertungen(basis, year=YEAR, toleranz=0, monat=False):
+    """Sucht die Eingaben aller Skripte für ``year`` unterhalb von ``basis``."""
+
+    def dateien(*teile):
+        return sorted(glob.glob(os.path.join(basis, *teile)))
+
+    auswertungen = []
+    pdfs = dateien("aag_erstattungen", year, "*.pdf")
+    if pdfs:
+        auswertungen.append(Auswertung(
+            "AAG Erstattungen", "aag_erstattungen", pdfs, f"AAG_Erstattungen_{year}.xlsx", {"year": year},
+        ))
+    pdfs = dateien("abrechnungen", year, "*.pdf")
+    if pdfs:
+        auswertungen.append(Auswertung(
+            "Abrechnungen", "abrechnungen", pdfs, f"abrechnungen_{year}.xlsx", {"year": year},
+        ))
+    for pdf in dateien("ag_belastung", year, "*.pdf"):
+        mon = os.path.splitext(os.path.basename(pdf))[0]
+        auswertungen.append(Auswertung(
+            f"AG Belastung {mon}", "ag_belastung", [pdf], f"ag_belastung_{year}_{mon}.xlsx",
+            {"year": year, "mon": mon},
+        ))
+    pdfs = dateien("lohnjournal", f"12.{year}.pdf")
+    if pdfs:
+        auswertungen.append(Auswertung(
+            "Lohnjournal", "lohnjournal", pdfs, f"lohnjournal_{year}.xlsx", {"year": year},
+        ))
+
+    ordner = os.path.join(basis, "kontoabgleich", year)
+    gemeinsam = not os.path.isdir(ordner)
+    if gemeinsam:
+        ordner = os.path.join(basis, "kontoabgleich")
+    konto_dateien = [
+        p for p in sorted(glob.glob(os.path.join(ordner, "*"))) if p.lower().endswith(KONTO_ENDUNGEN)
+    ]
+    if gemeinsam:
+        konto_dateien = _dateien_des_jahres(konto_dateien, year, ordner)
+    for name, modul, praefix in (
+        ("Kontoabgleich GLS", "kontoabgleich_gls", "gls"),
+        ("Kontoabgleich PayPal", "kontoabgleich_paypal", "paypal"),
+    ):
+        eigene = [p for p in konto_dateien if os.path.basename(p).lower().startswith(praefix)]
+        if eigene:
+            auswertungen.append(Auswertung(
+                name, modul, eigene, f"{modul}_{year}.xlsx", {"toleranz": toleranz, "monat": monat},
+            ))
+    return auswertungen
+
+
+def _dateien_des_jahres(pfade, year, ordner):
+    """Die Konto-Dateien für ``year`` aus dem Ordner ``kontoabgleich/`` ohne Jahresunterordner.
+
+    Maßgeblich ist der Zeitraum im Dateinamen (siehe
+    :func:`kontoabgleich_common.kennung`). Dateien ohne Zeitraum werden
+    übernommen, da ihr Jahr unbekannt ist, aber mit einer Warnung.
+    """
+    from kontoabgleich_common import kennung
+
+    eigene, ohne_jahr, andere = [], [], 0
+    for p in pfade:
+        zeitraum = kennung(p)[1]
+        if not zeitraum:
+            ohne_jahr.append(p)
+        elif zeitraum.startswith(year):
+            eigene.append(p)
+        else:
+            andere += 1
+    if andere:
+        log.info("%s: %s Datei(en) anderer Jahre übersprungen", ordner, andere)
+    if ohne_jahr:
+        log.warning(
+            "%s: %s ohne Jahr im Dateinamen werden für %s verwendet; "
+            "für getrennte Jahre die Dateien nach %s verschieben oder den Zeitraum "
+            "(z. B. _%s-03) in den Namen aufnehmen",
+            ordner, ", ".join(os.path.basename(p) for p in ohne_jahr), year,
+            os.path.join(ordner, year), year,
+        )
+    return eigene + ohne_jahr
+
+
+def _pool(workers, aufgaben):
+    return ProcessPoolExecutor(
+        max_workers=max(1, min(workers, aufgaben)),
+        # Eigene Prozesse ohne geerbte Protokoll-Ausgabe
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def extrahiere(pdfs, workers=1):
+    """Liest den Text aller ``pdfs`` parallel in den PDF-Cache, die größten zuerst.
+
+    Gibt die Anzahl der neu gelesenen Seiten zurück. Nicht lesbare PDFs werden
+    nur gemeldet; der Fehler erscheint später bei der betroffenen Auswertung.
+    """
+    offen = sorted(set(pdfs), key=os.path.getsize, reverse=True)
+    if not offen:
+        return 0
+    seiten = 0
+    pool = _pool(workers, len(offen))
+    try:
+        aufgaben = {pool.submit(pdf_text.prefetch, pdf): pdf for pdf in offen}
+        for fertig, aufgabe in enumerate(as_completed(aufgaben), 1):
+            try:
+                seiten += aufgabe.result()
+            except Exception as exc:
+                log.warning("  Warnung: %s konnte nicht gelesen werden: %s", aufgaben[aufgabe], exc)
+            protokoll.progress("PDFs gelesen", fertig, len(offen))
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return seiten
+
+
+def _ausfuehren(auswertung, ordner, level):
+    """Führt eine Auswertung im Arbeitsprozess aus; Fehler werden zurückgegeben, nicht ausgelöst."""
+    fehler = None
+    start = time.perf_counter()
+    with protokoll.capture(level) as buf:
+        try:
+            process = importlib.import_module(auswertung.modul).process
+            process(auswertung.eingaben, output_path=os.path.join(ordner, auswertung.ausgabe), **auswertung.optionen)
+        except Exception as exc:
+            fehler = f"{type(exc).__name__}: {exc}"
+            log.error("FEHLER: %s\n%s", fehler, traceback.format_exc())
+    return Ergebnis(auswertung, time.perf_counter() - start, fehler, buf.getvalue())
+
+
+def auswerten(auswertungen, ordner, workers=1, level=protokoll.SUMMARY):
+    """Führt alle Auswertungen parallel aus und liefert ihre Ergebnisse in Eingabereihenfolge."""
+    # Große Auswertungen zuerst, damit sie nicht am Ende allein laufen
+    reihenfolge = sorted(
+        auswertungen, key=lambda a: sum(os.path.getsize(p) for p in a.eingaben), reverse=True,
+    )
+    ergebnisse = {}
+    pool = _pool(workers, len(reihenfolge))
+    try:
+        aufgaben = {pool.submit(_ausfuehren, a, ordner, level): a for a in reihenfolge}
+        for aufgabe in as_completed(aufgaben):
+            auswertung = aufgaben[aufgabe]
+            try:
+                ergebnis = aufgabe.result()
+            except Exception as exc:  # z. B. abgestürzter Arbeitsprozess
+                ergebnis = Ergebnis(auswertung, 0.0, f"{type(exc).__name__}: {exc}")
+            ergebnisse[auswertung.name] = ergebnis
+            if ergebnis.fehler:
+                log.warning("  %s: FEHLER nach %.1f s: %s", auswertung.name, ergebnis.sekunden, ergebnis.fehler)
+            else:
+                log.info("  %s: fertig in %.1f s", auswertung.name, ergebnis.sekunden)
+            protokoll.progress("Auswertungen fertig", len(ergebnisse), len(reihenfolge))
+    finally:
+        pool.shutdown(cancel_futures=True)
+    return [ergebnisse[a.name] for a in auswertungen]
+
+
+def zusammenfassung(year, basis, ergebnisse, extraktion, gesamt):
+    """Text der Zusammenfassung: Laufzeiten, Ergebnisdateien und Fehler.
+
+    ``extraktion`` ist (PDFs, neu gelesene Seiten, Sekunden) oder ``None``,
+    wenn der PDF-Cache abgeschaltet ist.
+    """
+    if extraktion is None:
+        vorab = "abgeschaltet (kein PDF-Cache)"
+    else:
+        pdfs, seiten, sekunden = extraktion
+        vorab = f"{pdfs} PDF(s), {seiten} Seite(n) neu gelesen in {sekunden:.1f} s"
+    zeilen = [
+        f"Jahresabschluss {year}",
+        f"Eingaben: {os.path.abspath(basis)}",
+        f"Erstellt: {datetime.datetime.now():%d.%m.%Y %H:%M}, Gesamtdauer {gesamt:.1f} s",
+        f"Textextraktion: {vorab}",
+        "",
+    ]
+    breite = max(len(e.auswertung.name) for e in ergebnisse)
+    for e in ergebnisse:
+        status, ergebnis = ("FEHLER", e.fehler) if e.fehler else ("OK", e.auswertung.ausgabe)
+        zeilen.append(f"{e.auswertung.name:<{breite}}  {status:<6} {e.sekunden:7.1f} s  {ergebnis}")
+    fehler = sum(1 for e in ergebnisse if e.fehler)
+    zeilen.append("")
+    zeilen.append(f"{len(ergebnisse) - fehler} von {len(ergebnisse)} Auswertung(en) erfolgreich")
+    return "\n".join(zeilen) + "\n"
+
+
+def jahresabschluss(basis=".", year=YEAR, ordner=None, workers=1, toleranz=0, monat=False,
+                    level=protokoll.SUMMARY):
+    """Führt alle Auswertungen für ``year`` aus und gibt die Ergebnisse zurück.
+
+    ``ordner`` ist der Ausgabeordner (Standard: ``jahresabschluss_<JAHR>``).
+    Dort liegen danach die Ergebnisdateien, je Auswertung ein Protokoll
+    (``.log``) und die Zusammenfassung (:data:`ZUSAMMENFASSUNG`).
+    """
+    start = time.perf_counter()
+    ordner = ordner or f"jahresabschluss_{year}"
+    auswertungen = finde_auswertungen(basis, year, toleranz, monat)
+    if not auswertungen:
+        raise FileNotFoundError(f"Keine Eingaben für {year} gefunden in: {os.path.abspath(basis)}")
+    os.makedirs(ordner, exist_ok=True)
+    log.info("%d Auswertung(en) für %s gefunden:", len(auswertungen), year)
+    for a in auswertungen:
+        log.info("  %s: %d Datei(en)", a.name, len(a.eingaben))
+
+    pdfs = sorted({p for a in auswertungen for p in a.pdfs})
+    extraktion = None
+    if pdf_text.CACHE_MAX_BYTES > 0:
+        log.info("Lese %d PDF(s) mit %d Prozess(en)...", len(pdfs), workers)
+        t = time.perf_counter()
+        seiten = extrahiere(pdfs, workers)
+        extraktion = (len(pdfs), seiten, time.perf_counter() - t)
+        log.info("  %d Seite(n) neu gelesen in %.1f s", seiten, extraktion[2])
+    else:
+        log.info("PDF-Cache abgeschaltet: jede Auswertung liest ihre PDFs selbst")
+
+    log.info("Starte Auswertungen mit %d Prozess(en)...", workers)
+    ergebnisse = auswerten(auswertungen, ordner, workers, level)
+    for e in ergebnisse:
+        name = os.path.splitext(e.auswertung.ausgabe)[0] + ".log"
+        with open(os.path.join(ordner, name), "w", encoding="utf-8") as f:
+            f.write(e.protokoll)
+
+    text = zusammenfassung(year, basis, ergebnisse, extraktion, time.perf_counter() - start)
+    with open(os.path.join(ordner, ZUSAMMENFASSUNG), "w", encoding="utf-8") as f:
+        f.write(text)
+    log.info("\n%s", text)
+    log.info("Ergebnisse in: %s", os.path.abspath(ordner))
+    return ergebnisse
+
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(
+        description=(
+            "Führt alle Auswertungen eines Jahres parallel aus und schreibt die Ergebnisse\n"
+            "in einen gemeinsamen Ordner.\n\n"
+            "Erwartete Ordnerstruktur (unterhalb von --eingabe):\n"
+            "  aag_erstattungen/<YEAR>/*.pdf\n"
+            "  abrechnungen/<YEAR>/*.pdf\n"
+            "  ag_belastung/<YEAR>/<MONTH>.pdf\n"
+            "  lohnjournal/12.<YEAR>.pdf\n"
+            "  kontoabgleich/<YEAR>/ oder kontoabgleich/  (GLS*- und Paypal*-Dateien)\n\n"
+            "Fehlende Ordner werden übersprungen. Neben den Ergebnissen entstehen je\n"
+            f"Auswertung ein Protokoll (.log) und die Datei {ZUSAMMENFASSUNG}."
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    ap.add_argument(
+        "--year", default=YEAR,
+        help=f"Abrechnungsjahr (Standard: {YEAR})",
+    )
+    ap.add_argument(
+        "--eingabe", default=".", metavar="ORDNER",
+        help="Ordner mit den Eingabe-Unterordnern (Standard: aktuelles Verzeichnis)",
+    )
+    ap.add_argument(
+        "--ausgabe", metavar="ORDNER",
+        help="Ausgabeordner (Standard: jahresabschluss_<YEAR>)",
+    )
+    ap.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help=f"Anzahl paralleler Prozesse (Standard: Anzahl CPUs, hier {os.cpu_count() or 1})",
+    )
+    ap.add_argument(
+        "--toleranz", type=int, default=0, metavar="TAGE",
+        help="Datumstoleranz der Kontoabgleiche in Tagen (Standard: 0 = nur exakt)",
+    )
+    ap.add_argument(
+        "--monat", action="store_true",
+        help="Kontoabgleiche: übrige Buchungen mit gleichem Betrag im selben Monat zuordnen",
+    )
+    protokoll.add_arguments(ap)
+    args = ap.parse_args()
+    protokoll.setup_cli(args)
+    try:
+        ergebnisse = jahresabschluss(
+            args.eingabe, args.year, args.ausgabe, args.workers, args.toleranz, args.monat,
+            level=protokoll.DEBUG if args.verbose else protokoll.SUMMARY,
+        )
+    except FileNotFoundError as exc:
+        log.error("%s", exc)
+        exit(1)
+    if any(e.fehler for e in ergebnisse):
+        exit(1)
@@ -0,0 +1,942 @@
+"""Gemeinsame Bausteine für den Kontoabgleich (GLS und PayPal)."""
+
+import logging
+import multiprocessing
+import os
+import re
+import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import repeat
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils.cell import get_column_letter
+
+import protokoll
+
+# Spalten der Buchhaltungs-XLSX, die für den Abgleich gelesen werden
+SPALTE_DATUM = "Datum"
+SPALTE_TEXT = "Buchungstext"
+SPALTE_SOLL = "Gutschrift / Soll"
+SPALTE_HABEN = "Lastschrift / Haben"
+
+# Zellformate der Ergebnisdatei
+DATUM = "DD.MM.YYYY"
+BETRAG = "#,##0.00"
+QUOTE = "0.0%"
+FARBE_KOPF = "4472C4"
+FARBE_NUR_KONTO = "FCE4EC"
+FARBE_NUR_BUCHHALTUNG = "FFF3E0"
+FARBE_OK = "E8F5E9"
+FARBE_TOLERANZ = "FFF9C4"
+
+# Packen von (Tagesnummer, Cent) in einen int64-Schlüssel: 42 Bit für den
+# verschobenen Betrag (±21 Mrd. Euro), darüber die Tagesnummer
+_CENT_VERSATZ = 1 << 41
+_TAG_1970 = date(1970, 1, 1).toordinal()
+
+# Status der Ergebniszeilen
+UEBEREINSTIMMEND = "übereinstimmend"
+DATUM_ABWEICHEND = "Datum abweichend"
+
+log = logging.getLogger("erdlinge.kontoabgleich_common")
+
+# Dateinamen im Stapelbetrieb: Zeitraum (2025-03, 2025_03, 03.2025, 2025) und
+# Wörter, die nur die Art der Datei bezeichnen
+_ZEITRAUM = re.compile(
+    r"(?<!\d)(?:(20\d\d)[-_. ]?(0[1-9]|1[0-2])|(0[1-9]|1[0-2])[-_. ](20\d\d)|(20\d\d))(?!\d)"
+)
+_FUELLWOERTER = {"konto", "kontoauszug", "buchhaltung", "bh", "export", "umsaetze", "umsätze"}
+
+
+def lese_csv(pfad, betraege=(), **kwargs):
+    """Liest einen Bank-Export als Tabelle.
+
+    Die Spalten ``betraege`` enthalten deutsche Beträge ("-1.234,56") und
+    werden schon vom CSV-Parser gelesen und anschließend in ganze Cent
+    (int64) umgewandelt; alle anderen Felder bleiben Text (leer statt NaN).
+    """
+    dtype = defaultdict(lambda: str, {spalte: float for spalte in betraege})
+    csv = pd.read_csv(
+        pfad,
+        dtype=dtype,
+        keep_default_na=False,
+        decimal=",",
+        thousands=".",
+        **kwargs,
+    )
+    for spalte in betraege:
+        csv[spalte] = np.rint(csv[spalte].to_numpy() * 100).astype(np.int64)
+    return csv
+
+
+def parse_tage(werte, format="%d.%m.%Y"):
+    """Wandelt eine Datumsspalte in ein int32-Array von Tagesnummern (``date.toordinal()``).
+
+    Exporte enthalten je Tag viele Buchungen; jedes verschiedene Datum wird
+    daher nur einmal geparst.
+    """
+    codes, eindeutig = pd.factorize(werte)
+    tage = pd.to_datetime(eindeutig, format=format).to_numpy("datetime64[D]").astype(np.int64)
+    return (tage + _TAG_1970).astype(np.int32)[codes]
+
+
+class Buchungen:
+    """Buchungen spaltenweise: Beträge in Cent, Daten als Tagesnummern, Texte separat.
+
+    ``cent`` ist ein int64-Array, jedes Datumsfeld in ``daten`` (z. B.
+    ``datum`` oder ``buchungstag``) ein int32-Array mit ``date.toordinal()``.
+    Die Buchungstexte liegen als eigene Tabelle in ``texte``. Der Abgleich
+    rechnet nur mit den Zahlenspalten; ``date``, ``float`` und ``str`` entstehen
+    erst für die Zeilen der Ergebnisdatei.
+    """
+
+    def __init__(self, cent, texte, **daten):
+        self.cent = np.asarray(cent, dtype=np.int64)
+        self.texte = np.asarray(texte, dtype=object)
+        self.daten = {feld: np.asarray(tage, dtype=np.int32) for feld, tage in daten.items()}
+
+    def __len__(self):
+        return len(self.cent)
+
+    def take(self, index):
+        """Neue :class:`Buchungen` mit den Zeilen ``index`` (Array oder Maske)."""
+        return Buchungen(
+            self.cent[index],
+            self.texte[index],
+            **{feld: tage[index] for feld, tage in self.daten.items()},
+        )
+
+    def schluessel(self, feld, index=slice(None)):
+        """Datumsfeld und Betrag als gepackter int64-Schlüssel je Zeile."""
+        return _pack(self.daten[feld][index], self.cent[index])
+
+    def datum(self, feld, index):
+        """Datumswerte der Zeilen ``index`` als Liste von ``date``."""
+        eindeutig, codes = np.unique(self.daten[feld][index], return_inverse=True)
+        daten = np.array([date.fromordinal(t) for t in eindeutig.tolist()], dtype=object)
+        return daten[codes].tolist()
+
+    def betrag(self, index):
+        """Beträge der Zeilen ``index`` als Liste von ``float`` in Euro."""
+        return (self.cent[index] / 100).tolist()
+
+    def text(self, index):
+        return self.texte[index].tolist()
+
+
+def _pack(werte, cent):
+    """Packt eine Tages- oder Monatsnummer und einen Betrag in Cent in einen int64."""
+    return (werte.astype(np.int64) << 42) + (cent + _CENT_VERSATZ)
+
+
+def _rang(werte):
+    """Laufende Nummer jedes Werts unter den gleichen Werten (in Eingabereihenfolge)."""
+    reihenfolge = np.argsort(werte, kind="stable")
+    sortiert = werte[reihenfolge]
+    neu = np.empty(len(werte), dtype=bool)
+    neu[:1] = True
+    neu[1:] = sortiert[1:] != sortiert[:-1]
+    anfang = np.flatnonzero(neu)
+    laenge = np.diff(np.append(anfang, len(werte)))
+    rang = np.empty(len(werte), dtype=np.int64)
+    rang[reihenfolge] = np.arange(len(werte)) - np.repeat(anfang, laenge)
+    return rang
+
+
+def schluessel_paare(links, rechts):
+    """Ordnet gleiche Schlüssel einander zu.
+
+    Das k-te Vorkommen eines Schlüssels in ``links`` wird dem k-ten Vorkommen
+    in ``rechts`` zugeordnet. Gibt zwei Indexarrays (i, j) zurück, sortiert
+    nach ``i``. Schlüssel und Vorkommen werden zu einem int64 gepackt, die
+    Paare liefert eine sortierte Schnittmenge.
+    """
+    if not len(links) or not len(rechts):
+        leer = np.empty(0, dtype=np.int64)
+        return leer, leer
+    _, ids = np.unique(np.concatenate([links, rechts]), return_inverse=True)
+    ids = ids.astype(np.int64)
+    rang = np.concatenate([_rang(ids[:len(links)]), _rang(ids[len(links):])])
+    packed = ids * (int(rang.max()) + 1) + rang
+    _, i, j = np.intersect1d(
+        packed[:len(links)], packed[len(links):], assume_unique=True, return_indices=True
+    )
+    reihenfolge = np.argsort(i)
+    return i[reihenfolge], j[reihenfolge]
+
+
+def iter_buchhaltung(pfad):
+    """Liest eine Buchhaltungs-XLSX zeilenweise und liefert (tag, cent, betreff).
+
+    ``tag`` ist die Tagesnummer des Datums, ``cent`` der Betrag in ganzen
+    Cent. Die Spalten werden einmal anhand der Kopfzeile bestimmt. Zeilen ohne
+    Datum (z. B. Anfangssaldo) oder ohne Betrag werden übersprungen;
+    Gutschriften sind positiv, Lastschriften negativ.
+    """
+    # Nur-Lesen-Modus: Zeilen werden gestreamt statt als Objektmodell
+    # aufgebaut; data_only liefert bei Formeln den berechneten Wert
+    wb = load_workbook(pfad, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        headers = list(next(rows, ()))
+        idx_datum = headers.index(SPALTE_DATUM)
+        idx_text = headers.index(SPALTE_TEXT)
+        idx_soll = headers.index(SPALTE_SOLL)
+        idx_haben = headers.index(SPALTE_HABEN)
+        breite = max(idx_datum, idx_text, idx_soll, idx_haben) + 1
+
+        for row in rows:
+            if len(row) < breite:
+                row = row + (None,) * (breite - len(row))
+            datum = row[idx_datum]
+            if not isinstance(datum, datetime):
+                continue  # z.B. Anfangssaldo-Zeile
+
+            soll = row[idx_soll]  # Gutschrift = positiv
+            haben = row[idx_haben]  # Lastschrift = negativ
+            if soll is not None:
+                cent = round(float(soll) * 100)
+            elif haben is not None:
+                cent = -round(float(haben) * 100)
+            else:
+                continue
+
+            yield datum.toordinal(), cent, row[idx_text] or ""
+    finally:
+        wb.close()
+
+
+def lese_buchhaltung(pfad):
+    """Liest eine Buchhaltungs-XLSX als :class:`Buchungen` mit dem Datumsfeld ``datum``."""
+    tage = array("i")
+    cent = array("q")
+    texte = []
+    for tag, betrag, text in iter_buchhaltung(pfad):
+        tage.append(tag)
+        cent.append(betrag)
+        texte.append(text)
+    return Buchungen(cent, texte, datum=tage)
+
+
+def toleranz_paare(konto_cent, konto_tage, bh_cent, bh_tage, tage):
+    """Ordnet übrige Buchungen mit gleichem Betrag und nahem Datum einander zu.
+
+    ``konto_tage`` ist eine Folge von Tagesnummer-Arrays, je Datumsfeld eines
+    (bei GLS Buchungstag und Valutadatum), ``bh_tage`` ein Array. Gibt zwei
+    Indexarrays (i, j) zurück, deren Daten höchstens ``tage`` Tage
+    auseinanderliegen.
+
+    Je Betrag werden die Buchhaltungsdaten einmal sortiert und die Kandidaten
+    jeder Kontobuchung per Binärsuche im Fenster ±``tage`` gefunden. Die
+    Kandidaten werden nach Abstand vergeben, sodass bei mehreren Möglichkeiten
+    das nächstgelegene Datum gewinnt; bei gleichem Abstand entscheidet die
+    Reihenfolge der Eingabe.
+    """
+    paare = []
+    if tage > 0 and len(konto_cent) and len(bh_cent):
+        nach_betrag = defaultdict(list)
+        for j, (betrag, tag) in enumerate(zip(bh_cent.tolist(), bh_tage.tolist())):
+            nach_betrag[betrag].append((tag, j))
+        for liste in nach_betrag.values():
+            liste.sort()
+
+        kandidaten = {}
+        konto_tage = [t.tolist() for t in konto_tage]
+        for i, betrag in enumerate(konto_cent.tolist()):
+            liste = nach_betrag.get(betrag)
+            if not liste:
+                continue
+            for feld in konto_tage:
+                tag = feld[i]
+                k = bisect_left(liste, (tag - tage, -1))
+                while k < len(liste) and liste[k][0] <= tag + tage:
+                    bh_tag, j = liste[k]
+                    abstand = abs(bh_tag - tag)
+                    if abstand < kandidaten.get((i, j), tage + 1):
+                        kandidaten[(i, j)] = abstand
+                    k += 1
+
+        belegt_konto = set()
+        belegt_bh = set()
+        for (i, j), _ in sorted(kandidaten.items(), key=lambda kv: (kv[1], kv[0])):
+            if i in belegt_konto or j in belegt_bh:
+                continue
+            belegt_konto.add(i)
+            belegt_bh.add(j)
+            paare.append((i, j))
+    i, j = np.array(paare, dtype=np.int64).reshape(-1, 2).T
+    return i, j
+
+
+class Schritt(ABC):
+    """Ein Durchgang von :class:`Abgleich`.
+
+    ``paare`` erhält die noch offenen Zeilen beider Seiten als Indexarrays und
+    liefert die zugeordneten Paare als Positionen in diesen Arrays. ``status``
+    ist der Block der Ergebnisdatei, in dem die Paare erscheinen.
+    """
+
+    name = ""
+    status = UEBEREINSTIMMEND
+
+    @abstractmethod
+    def paare(self, konto, konto_offen, bh, bh_offen):
+        """Gibt zwei Indexarrays (i, j) in ``konto_offen`` bzw. ``bh_offen`` zurück."""
+
+
+class GleichesDatum(Schritt):
+    """Gleicher Betrag, Datumsfeld ``feld`` des Kontos gleich ``bh_feld`` der Buchhaltung."""
+
+    def __init__(self, feld, name, bh_feld="datum"):
+        self.feld = feld
+        self.bh_feld = bh_feld
+        self.name = name
+
+    def paare(self, konto, konto_offen, bh, bh_offen):
+        return schluessel_paare(
+            konto.schluessel(self.feld, konto_offen), bh.schluessel(self.bh_feld, bh_offen)
+        )
+
+
+class DatumToleranz(Schritt):
+    """Gleicher Betrag, eines der ``felder`` höchstens ``tage`` Tage entfernt (siehe :func:`toleranz_paare`)."""
+
+    status = DATUM_ABWEICHEND
+
+    def __init__(self, felder, tage, bh_feld="datum"):
+        self.felder = list(felder)
+        self.tage = tage
+        self.bh_feld = bh_feld
+        self.name = f"Datum ±{tage} Tage"
+
+    def paare(self, konto, konto_offen, bh, bh_offen):
+        return toleranz_paare(
+            konto.cent[konto_offen],
+            [konto.daten[feld][konto_offen] for feld in self.felder],
+            bh.cent[bh_offen],
+            bh.daten[self.bh_feld][bh_offen],
+            self.tage,
+        )
+
+
+class GleicherMonat(Schritt):
+    """Gleicher Betrag im selben Kalendermonat (Datumsfeld ``feld`` des Kontos)."""
+
+    status = DATUM_ABWEICHEND
+    name = "Betrag im Monat"
+
+    def __init__(self, feld, bh_feld="datum"):
+        self.feld = feld
+        self.bh_feld = bh_feld
+
+    def paare(self, konto, konto_offen, bh, bh_offen):
+        return schluessel_paare(
+            _pack(_monate(konto.daten[self.feld][konto_offen]), konto.cent[konto_offen]),
+            _pack(_monate(bh.daten[self.bh_feld][bh_offen]), bh.cent[bh_offen]),
+        )
+
+
+def _monate(tage):
+    """Tagesnummern als fortlaufende Monatsnummern."""
+    return (tage - _TAG_1970).astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+
+class Abgleich:
+    """Mehrstufiger Abgleich zweier :class:`Buchungen` mit einer Folge von :class:`Schritt`.
+
+    Jeder Schritt sieht nur die noch offenen Zeilen. Offen ist eine Zeile,
+    solange ihr Eintrag in einer gemeinsamen Maske je Seite gesetzt ist;
+    zugeordnete Zeilen werden dort in O(1) gelöscht, sodass weitere Schritte
+    wenig kosten. Anzahl der Paare und Laufzeit jedes Schritts werden
+    protokolliert und in ``statistik`` festgehalten.
+    """
+
+    def __init__(self, schritte):
+        self.schritte = list(schritte)
+        self.statistik = []
+
+    def __call__(self, konto, bh):
+        """Gibt ``(treffer, nur_konto, nur_bh)`` zurück.
+
+        ``treffer`` ordnet jedem Status ein Paar von Indexarrays (Konto,
+        Buchhaltung) zu, Schritte in ihrer Reihenfolge und innerhalb eines
+        Schritts in der Reihenfolge der Zuordnung. ``nur_konto`` und
+        ``nur_bh`` sind die übrigen Zeilen in Eingabereihenfolge.
+        """
+        offen_konto = np.ones(len(konto), dtype=bool)
+        offen_bh = np.ones(len(bh), dtype=bool)
+        treffer = defaultdict(list)
+        self.statistik = []
+        for schritt in self.schritte:
+            start = time.perf_counter()
+            konto_offen = np.flatnonzero(offen_konto)
+            bh_offen = np.flatnonzero(offen_bh)
+            i, j = schritt.paare(konto, konto_offen, bh, bh_offen)
+            ki = konto_offen[i]
+            bi = bh_offen[j]
+            offen_konto[ki] = False
+            offen_bh[bi] = False
+            treffer[schritt.status].append((ki, bi))
+            dauer = time.perf_counter() - start
+            self.statistik.append((schritt.name, len(ki), dauer))
+            log.info("  Schritt %-16s %7s Paare  (%.2f s)", schritt.name + ":", len(ki), dauer)
+
+        leer = np.empty(0, dtype=np.int64)
+        ergebnis = {UEBEREINSTIMMEND: (leer, leer), DATUM_ABWEICHEND: (leer, leer)}
+        for status, paare in treffer.items():
+            ergebnis[status] = (
+                np.concatenate([ki for ki, _ in paare]),
+                np.concatenate([bi for _, bi in paare]),
+            )
+        return ergebnis, np.flatnonzero(offen_konto), np.flatnonzero(offen_bh)
+
+
+def _fill(farbe):
+    return PatternFill(start_color=farbe, end_color=farbe, fill_type="solid")
+
+
+def schreibe_tabelle(pfad, titel, spalten, bloecke):
+    """Schreibt ein Abgleich-Ergebnis zeilenweise in eine xlsx-Datei (siehe :func:`schreibe_blatt`)."""
+    wb = Workbook(write_only=True)
+    schreibe_blatt(wb, titel, spalten, bloecke)
+    wb.save(pfad)
+
+
+def _kopfzeile(wb, ws, spalten):
+    """Setzt die Spaltenbreiten und schreibt die Kopfzeile."""
+    for index, (_, breite, *_) in enumerate(spalten, 1):
+        ws.column_dimensions[get_column_letter(index)].width = breite
+    if "Kopfzeile" not in wb.named_styles:
+        wb.add_named_style(NamedStyle(
+            name="Kopfzeile",
+            fill=_fill(FARBE_KOPF),
+            font=Font(color="FFFFFF", bold=True),
+            alignment=Alignment(horizontal="center"),
+        ))
+    zellen = []
+    for ueberschrift, *_ in spalten:
+        zelle = WriteOnlyCell(ws, ueberschrift)
+        zelle.style = "Kopfzeile"
+        zellen.append(zelle)
+    ws.append(zellen)
+
+
+def schreibe_blatt(wb, titel, spalten, bloecke):
+    """Schreibt ein Abgleich-Ergebnis als Tabellenblatt ``titel`` in ``wb``.
+
+    ``spalten`` ist eine Liste von (Überschrift, Breite, Zahlenformat) mit
+    Zahlenformat ``None``, ``DATUM`` oder ``BETRAG`` (weitere Felder wie bei
+    :class:`Spalte` werden ignoriert). ``bloecke`` ist eine
+    Liste von (Zeilen, Status, Farbe); an jede Zeile wird der Status als
+    letzte Spalte angehängt, alle Zellen erhalten die Farbe des Blocks.
+
+    ``wb`` ist eine Arbeitsmappe im Nur-Schreiben-Modus. Jede Kombination aus
+    Farbe und Zahlenformat ist eine benannte Formatvorlage, die einmal je
+    Block einer wiederverwendeten Zelle zugewiesen wird; jede Zeile wird
+    genau einmal geschrieben.
+    """
+    ws = wb.create_sheet(titel)
+    _kopfzeile(wb, ws, spalten)
+
+    formate = [fmt for _, _, fmt, *_ in spalten]
+    for zeilen, status, farbe in bloecke:
+        zellen = []
+        for fmt in formate:
+            name = f"{status} ({fmt})" if fmt else status
+            if name not in wb.named_styles:
+                stil = NamedStyle(name=name, fill=_fill(farbe))
+                if fmt:
+                    stil.number_format = fmt
+                wb.add_named_style(stil)
+            zelle = WriteOnlyCell(ws)
+            zelle.style = name
+            zellen.append(zelle)
+        status_zelle = zellen[-1]
+        status_zelle.value = status
+        for zeile in zeilen:
+            for zelle, wert in zip(zellen, zeile):
+                zelle.value = wert
+            # Zellen werden beim Anhängen sofort geschrieben und können
+            # für die nächste Zeile wiederverwendet werden
+            ws.append(zellen)
+
+
+def kennung(pfad):
+    """(Kontoname, Zeitraum) aus einem Dateinamen, z. B. ``GLS_Konto_2025-03.csv`` → ("gls", "2025-03")."""
+    name = os.path.splitext(os.path.basename(pfad))[0].lower()
+    zeitraum = ""
+    treffer = _ZEITRAUM.search(name)
+    if treffer:
+        jahr1, monat1, monat2, jahr2, jahr = treffer.groups()
+        if jahr1:
+            zeitraum = f"{jahr1}-{monat1}"
+        elif jahr2:
+            zeitraum = f"{jahr2}-{monat2}"
+        else:
+            zeitraum = jahr
+        name = name[:treffer.start()] + " " + name[treffer.end():]
+    woerter = [w for w in re.split(r"[\W_]+", name) if w and w not in _FUELLWOERTER]
+    return "_".join(woerter), zeitraum
+
+
+def dateipaare(pfade, konto, bezeichnung):
+    """Ordnet hochgeladene Konto-CSVs und Buchhaltungs-XLSX einander zu.
+
+    Gibt eine Liste von (Kontoname, Zeitraum, CSV, XLSX) zurück. Bei genau
+    einem Dateipaar ist der Kontoname ``konto``. Sonst werden die Dateien
+    anhand von Kontoname und Zeitraum im Dateinamen zugeordnet (siehe
+    :func:`kennung`), zuerst über beides, dann nur über den Zeitraum und
+    zuletzt nur über den Namen, jeweils nur bei eindeutiger Zuordnung.
+    ``bezeichnung`` (z. B. "GLS") erscheint in den Fehlermeldungen.
+    """
+    csvs = [p for p in pfade if p.lower().endswith(".csv")]
+    xlsx = [p for p in pfade if p.lower().endswith((".xlsx", ".xls"))]
+    if not csvs or len(csvs) != len(xlsx):
+        raise OSError(
+            f"Bitte zu jeder {bezeichnung}-Konto-CSV genau eine "
+            f"{bezeichnung}-Buchhaltungs-XLSX hochladen"
+        )
+    if len(csvs) == 1:
+        return [(konto, "", csvs[0], xlsx[0])]
+
+    offen_csv = {p: kennung(p) for p in csvs}
+    offen_xlsx = {p: kennung(p) for p in xlsx}
+    paare = []
+    for teil in (lambda k: k, lambda k: k[1], lambda k: k[0]):
+        nach_csv = defaultdict(list)
+        for p, merkmale in offen_csv.items():
+            nach_csv[teil(merkmale)].append(p)
+        nach_xlsx = defaultdict(list)
+        for p, merkmale in offen_xlsx.items():
+            nach_xlsx[teil(merkmale)].append(p)
+        for wert, liste in nach_csv.items():
+            if wert in ("", ("", "")) or len(liste) != 1 or len(nach_xlsx.get(wert, ())) != 1:
+                continue
+            c, x = liste[0], nach_xlsx[wert][0]
+            (name_c, zeit_c), (name_x, zeit_x) = offen_csv.pop(c), offen_xlsx.pop(x)
+            paare.append((name_c or name_x or konto, zeit_c or zeit_x, c, x))
+    if offen_csv:
+        raise OSError(
+            "Keine eindeutig passende Buchhaltungs-XLSX (gleicher Name oder Zeitraum) für: "
+            + ", ".join(os.path.basename(p) for p in offen_csv)
+        )
+    paare.sort(key=lambda paar: paar[:2])
+    return paare
+
+
+def _gruppe_auswerten(auswerten, gruppe, kwargs, level=None):
+    """Wertet Dateipaare nacheinander aus; gibt (Ergebnisse, Protokoll) zurück.
+
+    Mit ``level`` (Aufgabe eines Stapel-Prozesses) wird das Protokoll gesammelt
+    und mit zurückgegeben, da es im Arbeitsprozess sonst verloren ginge.
+    """
+    if level is None:
+        return [auswerten(csv, xlsx, name=name, **kwargs) for name, _, csv, xlsx in gruppe], ""
+    with protokoll.capture(level) as buf:
+        ergebnisse = [auswerten(csv, xlsx, name=name, **kwargs) for name, _, csv, xlsx in gruppe]
+    return ergebnisse, buf.getvalue()
+
+
+def abgleich_stapel(pfad, paare, auswerten, spalten, bloecke, workers=1, **kwargs):
+    """Gleicht mehrere Dateipaare ab und schreibt alle Ergebnisse in eine Arbeitsmappe.
+
+    ``paare`` kommt aus :func:`dateipaare`. ``auswerten(csv, xlsx, name=...,
+    **kwargs)`` liest ein Paar und liefert (nur Konto, nur Buchhaltung,
+    übereinstimmend, Datum abweichend); ``bloecke`` macht daraus die Blöcke
+    für :func:`schreibe_blatt`. Mit ``workers`` > 1 laufen die Paare in einem
+    Prozess-Pool; das Protokoll jeder Gruppe erscheint dann gesammelt, sobald
+    sie fertig ist. Mit Abgleichsstand (``stand`` in ``kwargs``) werden die
+    Zeiträume eines Kontos nacheinander in zeitlicher Reihenfolge abgeglichen.
+
+    Die Arbeitsmappe beginnt mit dem Blatt "Übersicht" mit Anzahl und
+    Zuordnungsquote je Paar, danach folgt ein Blatt je Paar.
+    """
+    if kwargs.get("stand"):
+        nach_konto = defaultdict(list)
+        for paar in paare:
+            nach_konto[paar[0]].append(paar)
+        gruppen = list(nach_konto.values())
+    else:
+        gruppen = [[paar] for paar in paare]
+
+    ergebnisse = {}
+    if workers <= 1 or len(gruppen) <= 1:
+        for gruppe in gruppen:
+            for paar, ergebnis in zip(gruppe, _gruppe_auswerten(auswerten, gruppe, kwargs)[0]):
+                ergebnisse[paar] = ergebnis
+            protokoll.progress("Dateipaare abgeglichen", len(ergebnisse), len(paare))
+    else:
+        log.info("Gleiche %s Dateipaare parallel mit %d Prozess(en) ab...", len(paare), workers)
+        # Die Arbeitsprozesse protokollieren mit derselben Stufe wie dieser Lauf
+        level = log.getEffectiveLevel()
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, len(gruppen)),
+            # Eigene Prozesse ohne geerbte Protokoll-Ausgabe
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        try:
+            aufgaben = {
+                pool.submit(_gruppe_auswerten, auswerten, gruppe, kwargs, level): gruppe
+                for gruppe in gruppen
+            }
+            for aufgabe in as_completed(aufgaben):
+                gruppe_ergebnisse, text = aufgabe.result()
+                if text:
+                    log.log(level, "%s", text.rstrip("\n"))
+                for paar, ergebnis in zip(aufgaben[aufgabe], gruppe_ergebnisse):
+                    ergebnisse[paar] = ergebnis
+                protokoll.progress("Dateipaare abgeglichen", len(ergebnisse), len(paare))
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    log.info("\nErgebnis je Dateipaar:")
+    wb = Workbook(write_only=True)
+    uebersicht = []
+    titel = []
+    for paar in paare:
+        name, zeitraum, csv, xlsx = paar
+        nur_konto, nur_bh, uebereinstimmend, abweichend = ergebnisse[paar]
+        paare_gesamt = len(uebereinstimmend) + len(abweichend)
+        anzahl_konto = len(nur_konto) + paare_gesamt
+        anzahl_bh = len(nur_bh) + paare_gesamt
+        uebersicht.append((
+            name, zeitraum, os.path.basename(csv), os.path.basename(xlsx),
+            anzahl_konto, anzahl_bh, len(uebereinstimmend), len(abweichend),
+            len(nur_konto), len(nur_bh),
+            paare_gesamt / anzahl_konto if anzahl_konto else None,
+            paare_gesamt / anzahl_bh if anzahl_bh else None,
+        ))
+        log.info(
+            "  %-24s %5s übereinstimmend, %5s Datum abweichend, %5s nur Konto, %5s nur Buchhaltung",
+            f"{name} {zeitraum}".strip() + ":", len(uebereinstimmend), len(abweichend),
+            len(nur_konto), len(nur_bh),
+        )
+        titel.append(_blatttitel(f"{name} {zeitraum}".strip(), titel))
+
+    _schreibe_uebersicht(wb, uebersicht)
+    for paar, blatt in zip(paare, titel):
+        schreibe_blatt(wb, blatt, spalten, bloecke(*ergebnisse[paar]))
+    wb.save(pfad)
+    return pfad
+
+
+def _blatttitel(text, vergeben):
+    """Gültiger, noch nicht vergebener Tabellenblattname (höchstens 31 Zeichen)."""
+    text = re.sub(r"[\[\]:*?/\\]", "_", text)[:31] or "Abgleich"
+    titel = text
+    nummer = 2
+    while titel in vergeben or titel == "Übersicht":
+        endung = f" ({nummer})"
+        titel = text[:31 - len(endung)] + endung
+        nummer += 1
+    return titel
+
+
+def _schreibe_uebersicht(wb, zeilen):
+    """Blatt "Übersicht" mit einer Zeile je Dateipaar."""
+    spalten = [
+        ("Konto", 24, None),
+        ("Zeitraum", 12, None),
+        ("Konto-Datei", 36, None),
+        ("Buchhaltungs-Datei", 36, None),
+        ("Buchungen Konto", 18, None),
+        ("Buchungen Buchhaltung", 24, None),
+        ("Übereinstimmend", 18, None),
+        ("Datum abweichend", 18, None),
+        ("Nur Konto", 12, None),
+        ("Nur Buchhaltung", 18, None),
+        ("Quote Konto", 14, QUOTE),
+        ("Quote Buchhaltung", 20, QUOTE),
+    ]
+    ws = wb.create_sheet("Übersicht")
+    _kopfzeile(wb, ws, spalten)
+    if "Quote" not in wb.named_styles:
+        wb.add_named_style(NamedStyle(name="Quote", number_format=QUOTE))
+    zellen = []
+    for _, _, fmt in spalten:
+        zelle = WriteOnlyCell(ws)
+        if fmt:
+            zelle.style = "Quote"
+        zellen.append(zelle)
+    for zeile in zeilen:
+        for zelle, wert in zip(zellen, zeile):
+            zelle.value = wert
+        ws.append(zellen)
+
+
+class Spalte(NamedTuple):
+    """Eine Spalte der Ergebnisdatei eines :class:`Kontoabgleich`.
+
+    ``konto`` und ``bh`` nennen die Quelle des Werts auf der jeweiligen Seite:
+    ein Datumsfeld der :class:`Buchungen`, ``"betrag"`` oder ``"text"``. Bei
+    Paaren gilt die Kontoseite, falls sie eine Quelle hat. Ohne Quelle bleibt
+    die Zelle leer (``""`` in Textspalten, sonst ``None``). Die letzte Spalte
+    erhält den Status. Spalten mit ``abweichend`` erscheinen nur, wenn ein
+    Durchgang Paare mit abweichendem Datum bilden kann (Toleranz, Monat).
+    """
+
+    ueberschrift: str
+    breite: int
+    format: str = None
+    konto: str = None
+    bh: str = None
+    abweichend: bool = False
+
+
+def _spaltenwerte(buchungen, quelle, index):
+    if quelle == "betrag":
+        return buchungen.betrag(index)
+    if quelle == "text":
+        return buchungen.text(index)
+    return buchungen.datum(quelle, index)
+
+
+@dataclass(frozen=True)
+class Kontoabgleich:
+    """Abgleich eines Kontos (GLS, PayPal) mit der Buchhaltung.
+
+    Die Module der Konten bestehen nur aus dieser Konfiguration; Einlesen,
+    Abgleich samt Abgleichsstand, Stapelbetrieb, Ergebnisdatei und
+    Kommandozeile sind für alle Konten gleich.
+
+    * ``name``: z. B. ``"gls"``; Schlüssel im Abgleichsstand, Name der
+      Ergebnisdatei und des Loggers (``erdlinge.kontoabgleich_<name>``)
+    * ``bezeichnung``: Anzeigename, z. B. ``"GLS"``
+    * ``spalten``: Liste der :class:`Spalte` der Ergebnisdatei
+    * ``lese_konto``, ``lese_buchhaltung``: lesen eine Datei als :class:`Buchungen`
+    * ``schritte``: ``schritte(toleranz, monat)`` liefert die Durchgänge (:class:`Schritt`)
+    * ``konto_datei``, ``bh_datei``, ``csv_format``: Standardpfade und
+      Aufbau des CSV-Exports für die Hilfe der Kommandozeile
+    """
+
+    name: str
+    bezeichnung: str
+    spalten: list
+    lese_konto: object
+    schritte: object
+    konto_datei: str
+    bh_datei: str
+    csv_format: str = ""
+    lese_buchhaltung: object = lese_buchhaltung
+
+    @property
+    def log(self):
+        return logging.getLogger(f"erdlinge.kontoabgleich_{self.name}")
+
+    def spalten_fuer(self, toleranz=0, monat=False):
+        """Die Spalten der Ergebnisdatei für diese Optionen (siehe :attr:`Spalte.abweichend`)."""
+        abweichend = any(s.status == DATUM_ABWEICHEND for s in self.schritte(toleranz, monat))
+        return [spalte for spalte in self.spalten if abweichend or not spalte.abweichend]
+
+    def abgleich(self, konto, bh, toleranz=0, monat=False, stand=None):
+        """Matcht Buchungen mit den Durchgängen aus ``schritte``. Gibt vier Listen zurück.
+
+        ``konto`` und ``bh`` sind die :class:`Buchungen` aus ``lese_konto``
+        und ``lese_buchhaltung``. Zurück kommen die Zeilen der Ergebnisdatei
+        (Spalten aus :meth:`spalten_fuer`) für nur Konto, nur Buchhaltung,
+        übereinstimmend und Datum abweichend, jeweils nach dem Datum der
+        ersten belegten Datumsspalte und dem Betrag sortiert.
+
+        Mit ``stand`` (:class:`kontoabgleich_stand.Stand`) werden die gefundenen
+        Paare dort als erledigt gespeichert.
+        """
+        treffer, offen_konto, offen_bh = Abgleich(self.schritte(toleranz, monat))(konto, bh)
+        if stand is not None:
+            stand.verbuche(treffer)
+        spalten = self.spalten_fuer(toleranz, monat)
+        return (
+            self._zeilen(spalten, konto, offen_konto, bh, None),
+            self._zeilen(spalten, konto, None, bh, offen_bh),
+            self._zeilen(spalten, konto, treffer[UEBEREINSTIMMEND][0], bh, treffer[UEBEREINSTIMMEND][1]),
+            self._zeilen(spalten, konto, treffer[DATUM_ABWEICHEND][0], bh, treffer[DATUM_ABWEICHEND][1]),
+        )
+
+    @staticmethod
+    def _zeilen(spalten, konto, ki, bh, bi):
+        """Ergebniszeilen der Paare (ki[k], bi[k]); ohne ``ki`` bzw. ``bi`` nur die andere Seite."""
+        seiten = {"konto": (konto, ki), "bh": (bh, bi)}
+        quellen = []
+        for spalte in spalten[:-1]:
+            if ki is not None and spalte.konto:
+                quellen.append(("konto", spalte.konto, spalte.format))
+            elif bi is not None and spalte.bh:
+                quellen.append(("bh", spalte.bh, spalte.format))
+            else:
+                quellen.append((None, None, spalte.format))
+
+        sortierung = next(((s, q) for s, q, fmt in quellen if s and fmt == DATUM), None)
+        if sortierung is not None:
+            buchungen, index = seiten[sortierung[0]]
+            reihenfolge = np.lexsort((buchungen.cent[index], buchungen.daten[sortierung[1]][index]))
+            ki = None if ki is None else ki[reihenfolge]
+            bi = None if bi is None else bi[reihenfolge]
+            seiten = {"konto": (konto, ki), "bh": (bh, bi)}
+
+        werte = []
+        for seite, quelle, fmt in quellen:
+            if seite is None:
+                werte.append(repeat(None if fmt else ""))
+            else:
+                buchungen, index = seiten[seite]
+                werte.append(_spaltenwerte(buchungen, quelle, index))
+        return list(zip(*werte))
+
+    def bloecke(self, nur_konto, nur_bh, uebereinstimmend, abweichend):
+        """Blöcke der Ergebnisdatei für :func:`schreibe_blatt`."""
+        return [
+            (nur_konto, f"nur {self.bezeichnung}", FARBE_NUR_KONTO),
+            (nur_bh, "nur Buchhaltung", FARBE_NUR_BUCHHALTUNG),
+            (uebereinstimmend, UEBEREINSTIMMEND, FARBE_OK),
+            (abweichend, DATUM_ABWEICHEND, FARBE_TOLERANZ),
+        ]
+
+    def schreibe_ergebnis(self, pfad, nur_konto, nur_bh, uebereinstimmend, abweichend=(), toleranz=0, monat=False):
+        """Schreibt das Ergebnis von :meth:`abgleich` mit denselben Optionen in eine xlsx-Datei."""
+        bloecke = self.bloecke(nur_konto, nur_bh, uebereinstimmend, abweichend)
+        spalten = self.spalten_fuer(toleranz, monat)
+        schreibe_tabelle(pfad, f"Kontoabgleich {self.bezeichnung}", spalten, bloecke)
+
+    def auswerten(self, konto_pfad, bh_pfad, toleranz=0, monat=False, stand=None, name=None):
+        """Liest ein Dateipaar und gleicht es ab; Rückgabe wie :meth:`abgleich`.
+
+        ``name`` ist der Schlüssel des Kontos im Abgleichsstand (Standard: ``self.name``).
+        """
+        import kontoabgleich_stand
+
+        log = self.log
+        log.info("Lese %s-Konto-CSV: %s", self.bezeichnung, konto_pfad)
+        konto = self.lese_konto(konto_pfad)
+        protokoll.progress(f"{self.bezeichnung}-Konto gelesen", 1, 4)
+        log.info("Lese Buchhaltungs-XLSX: %s", bh_pfad)
+        bh = self.lese_buchhaltung(bh_pfad)
+        protokoll.progress("Buchhaltung gelesen", 2, 4)
+
+        with kontoabgleich_stand.oeffne(stand, name or self.name) as db:
+            if db is not None:
+                konto, bh = db.fortschreiben(konto, bh)
+
+            log.info("%s Konto: %s Buchungen", self.bezeichnung, len(konto))
+            log.info("Buchhaltung: %s Buchungen", len(bh))
+
+            log.info("\nGleiche Buchungen ab...")
+            nur_konto, nur_bh, uebereinstimmend, abweichend = self.abgleich(
+                konto, bh, toleranz, monat, stand=db
+            )
+
+        protokoll.progress("Buchungen abgeglichen", 3, 4)
+        log.info("\nErgebnis:")
+        log.info("  Übereinstimmend:  %s", len(uebereinstimmend))
+        if toleranz or monat:
+            log.info("  Datum abweichend: %s", len(abweichend))
+        log.info("  %-17s %s", f"Nur {self.bezeichnung}:", len(nur_konto))
+        log.info("  Nur Buchhaltung:  %s", len(nur_bh))
+
+        return nur_konto, nur_bh, uebereinstimmend, abweichend
+
+    def process(self, input_paths, output_path=None, toleranz=0, monat=False, stand=None, workers=1):
+        """Verarbeitet hochgeladene Dateien (je Konto und Zeitraum eine Konto-CSV + eine Buchhaltungs-XLSX).
+
+        ``toleranz`` erlaubt zusätzlich Paare, deren Datum bis zu so viele Tage
+        abweicht (``0`` = nur exakte Übereinstimmung), ``monat`` danach Paare mit
+        gleichem Betrag im selben Monat.
+
+        Mit ``stand`` (Pfad einer SQLite-Datei oder ``True`` für
+        :data:`kontoabgleich_stand.STAND_PFAD`) werden nur neue Buchungen
+        übernommen und zusammen mit den offenen Posten früherer Läufe abgeglichen;
+        siehe :mod:`kontoabgleich_stand`.
+
+        Mehrere Dateipaare werden über Name bzw. Zeitraum zugeordnet (siehe
+        :func:`dateipaare`), mit ``workers`` > 1 parallel abgeglichen und als
+        ein Blatt je Paar samt Übersicht geschrieben.
+        """
+        log = self.log
+        paare = dateipaare(input_paths, self.name, self.bezeichnung)
+        out = output_path or f"kontoabgleich_{self.name}.xlsx"
+        if len(paare) > 1:
+            abgleich_stapel(
+                out, paare, self.auswerten, self.spalten_fuer(toleranz, monat), self.bloecke, workers,
+                toleranz=toleranz, monat=monat, stand=stand,
+            )
+            log.info("Datei geschrieben: %s", out)
+            return out
+
+        _, _, konto_pfad, bh_pfad = paare[0]
+        ergebnis = self.auswerten(konto_pfad, bh_pfad, toleranz, monat, stand)
+
+        log.info("\nSchreibe Ergebnis...")
+        self.schreibe_ergebnis(out, *ergebnis, toleranz=toleranz, monat=monat)
+        protokoll.progress("Ergebnis geschrieben", 4, 4)
+        log.info("Datei geschrieben: %s", out)
+        return out
+
+    def main(self):
+        import argparse
+
+        import kontoabgleich_stand
+
+        b = self.bezeichnung
+        stamm, endung = os.path.splitext(os.path.basename(self.konto_datei))
+        bh_stamm, bh_endung = os.path.splitext(os.path.basename(self.bh_datei))
+        breite = max(len(self.konto_datei), len(self.bh_datei))
+        einzug = " " * (breite + 5)
+        ap = argparse.ArgumentParser(
+            description=(
+                f"Gleicht {b}-Kontobewegungen mit der Buchhaltungs-XLSX ab und markiert\n"
+                "übereinstimmende sowie fehlende Buchungen farbig in einer Ausgabe-Excel-Datei.\n\n"
+                "Benötigte Dateien (Standardpfade):\n"
+                f"  {self.konto_datei:<{breite}} – {b}-Kontoauszug als CSV-Export\n"
+                + "".join(f"{einzug}{zeile}\n" for zeile in self.csv_format.splitlines())
+                + f"  {self.bh_datei:<{breite}} – Buchhaltungs-Tabelle als XLSX\n\n"
+                "Alternativ können beide Dateipfade als Argumente übergeben werden. Mehrere\n"
+                f"Paare (z. B. {stamm}_2025-03{endung} + {bh_stamm}_2025-03{bh_endung})\n"
+                "werden über Kontoname bzw. Zeitraum im Dateinamen zugeordnet und gemeinsam\n"
+                "abgeglichen; das Ergebnis enthält dann ein Blatt je Paar und eine Übersicht."
+            ),
+            formatter_class=argparse.RawDescriptionHelpFormatter,
+        )
+        ap.add_argument(
+            "dateien", nargs="*", metavar="DATEI",
+            default=[self.konto_datei, self.bh_datei],
+            help=f"{b}-Konto-CSV(s) und Buchhaltungs-XLSX "
+                 f"(Standard: {self.konto_datei} {self.bh_datei})",
+        )
+        ap.add_argument(
+            "--workers", type=int, default=1,
+            help="Anzahl paralleler Prozesse bei mehreren Dateipaaren (Standard: 1)",
+        )
+        ap.add_argument(
+            "--toleranz", type=int, default=0, metavar="TAGE",
+            help="Buchungen mit gleichem Betrag auch bei bis zu TAGE Tagen Datumsabweichung "
+                 "zuordnen (Standard: 0 = nur exakt)",
+        )
+        ap.add_argument(
+            "--monat", action="store_true",
+            help="Übrige Buchungen mit gleichem Betrag im selben Monat zuordnen",
+        )
+        ap.add_argument(
+            "--stand", nargs="?", const=True, default=None, metavar="DATEI",
+            help="Abgleichsstand in DATEI (SQLite) fortschreiben: nur neue Buchungen übernehmen "
+                 "und mit den offenen Posten früherer Läufe abgleichen "
+                 f"(ohne DATEI: {kontoabgleich_stand.STAND_PFAD})",
+        )
+        protokoll.add_arguments(ap)
+        args = ap.parse_args()
+        protokoll.setup_cli(args)
+        self.process(
+            args.dateien,
+            toleranz=args.toleranz,
+            monat=args.monat,
+            stand=args.stand,
+            workers=args.workers,
+        )
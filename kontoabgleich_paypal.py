@@ -1,210 +1,101 @@
-import csv
-from datetime import datetime
-from collections import defaultdict
-from openpyxl import load_workbook, Workbook
-from openpyxl.styles import PatternFill, Font, Alignment
-
-
-def lese_paypal_konto(pfad):
-    """Liest Paypal_Konto.csv und gibt Liste von (datum, betrag, betreff) zurück."""
-    buchungen = []
-    with open(pfad, encoding="utf-8-sig") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            datum = datetime.strptime(row["Datum"], "%d.%m.%Y").date()
-            betrag_str = row["Brutto"].replace(".", "").replace(",", ".")
-            betrag = round(float(betrag_str), 2)
-            name = row["Name"].strip()
-            hinweis = row["Hinweis"].strip()
-            typ = row["Typ"].strip()
-            betreff = f"{name} | {hinweis}" if hinweis else f"{name} ({typ})"
-            buchungen.append((datum, betrag, betreff))
-
-            # Gebühren als separate Buchung erzeugen (Buchhaltung bucht diese separat)
-            gebuehr_str = row["Gebühr"].replace(".", "").replace(",", ".")
-            gebuehr = round(float(gebuehr_str), 2)
-            if gebuehr != 0:
-                buchungen.append((datum, gebuehr, f"Paypal Gebühren ({betreff})"))
-
-    return buchungen
-
-
-def lese_paypal_buchhaltung(pfad):
-    """Liest Paypal_Buchhaltung.xlsx und gibt Liste von (datum, betrag, betreff) zurück."""
-    buchungen = []
-    wb = load_workbook(pfad)
-    ws = wb.active
-    headers = [cell.value for cell in ws[1]]
-    idx_datum = headers.index("Datum")
-    idx_text = headers.index("Buchungstext")
-    idx_soll = headers.index("Gutschrift / Soll")
-    idx_haben = headers.index("Lastschrift / Haben")
-
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        datum_val = row[idx_datum]
-        if datum_val is None:
-            continue
-        if isinstance(datum_val, datetime):
-            datum = datum_val.date()
-        else:
-            continue
-
-        soll = row[idx_soll]
-        haben = row[idx_haben]
-
-        if soll is not None:
-            betrag = round(float(soll), 2)
-        elif haben is not None:
-            betrag = round(-float(haben), 2)
-        else:
-            continue
-
-        betreff = row[idx_text] or ""
-        buchungen.append((datum, betrag, betreff))
-    return buchungen
-
-
-def abgleich(pp_buchungen, bh_buchungen):
-    """Matcht Buchungen anhand (Datum, Betrag). Gibt drei Listen zurück."""
-
-    pp_map = defaultdict(list)
-    for datum, betrag, betreff in pp_buchungen:
-        pp_map[(datum, betrag)].append(betreff)
-
-    bh_map = defaultdict(list)
-    for datum, betrag, betreff in bh_buchungen:
-        bh_map[(datum, betrag)].append(betreff)
-
-    alle_keys = set(pp_map.keys()) | set(bh_map.keys())
-
-    uebereinstimmend = []
-    nur_pp = []
-    nur_bh = []
-
-    for key in sorted(alle_keys):
-        datum, betrag = key
-        pp_liste = pp_map.get(key, [])
-        bh_liste = bh_map.get(key, [])
-
-        anzahl_match = min(len(pp_liste), len(bh_liste))
-
-        for i in range(anzahl_match):
-            uebereinstimmend.append((datum, betrag, pp_liste[i], bh_liste[i]))
-
-        for i in range(anzahl_match, len(pp_liste)):
-            nur_pp.append((datum, betrag, pp_liste[i], ""))
-
-        for i in range(anzahl_match, len(bh_liste)):
-            nur_bh.append((datum, betrag, "", bh_liste[i]))
-
-    return nur_pp, nur_bh, uebereinstimmend
-
-
-def schreibe_ergebnis(pfad, nur_pp, nur_bh, uebereinstimmend):
-    """Schreibt das Ergebnis in eine xlsx-Datei."""
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Kontoabgleich PayPal"
-
-    headers = ["Datum", "Betrag", "Betreff PayPal", "Betreff Buchhaltung", "Status"]
-    ws.append(headers)
-
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(color="FFFFFF", bold=True)
-    for cell in ws[1]:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal="center")
-
-    fill_nur_pp = PatternFill(start_color="FCE4EC", end_color="FCE4EC", fill_type="solid")
-    fill_nur_bh = PatternFill(start_color="FFF3E0", end_color="FFF3E0", fill_type="solid")
-    fill_ok = PatternFill(start_color="E8F5E9", end_color="E8F5E9", fill_type="solid")
-
-    def schreibe_block(daten, status, fill):
-        for datum, betrag, betreff_pp, betreff_bh in daten:
-            ws.append([datum, betrag, betreff_pp, betreff_bh, status])
-            for cell in ws[ws.max_row]:
-                cell.fill = fill
-
-    schreibe_block(nur_pp, "nur PayPal", fill_nur_pp)
-    schreibe_block(nur_bh, "nur Buchhaltung", fill_nur_bh)
-    schreibe_block(uebereinstimmend, "übereinstimmend", fill_ok)
-
-    ws.column_dimensions["A"].width = 12
-    ws.column_dimensions["B"].width = 14
-    ws.column_dimensions["C"].width = 60
-    ws.column_dimensions["D"].width = 60
-    ws.column_dimensions["E"].width = 20
-
-    for row in ws.iter_rows(min_row=2, min_col=2, max_col=2):
-        for cell in row:
-            cell.number_format = '#,##0.00'
-
-    for row in ws.iter_rows(min_row=2, min_col=1, max_col=1):
-        for cell in row:
-            cell.number_format = 'DD.MM.YYYY'
-
-    wb.save(pfad)
-
-
-def process(input_paths, output_path=None):
-    """Verarbeitet hochgeladene Dateien (eine Paypal_Konto CSV + eine Buchhaltung XLSX)."""
-    konto = [p for p in input_paths if p.lower().endswith(".csv")]
-    buchhaltung = [p for p in input_paths if p.lower().endswith((".xlsx", ".xls"))]
-    if len(konto) != 1 or len(buchhaltung) != 1:
-        raise OSError(
-            "Bitte genau eine PayPal-Konto-CSV und eine PayPal-Buchhaltungs-XLSX hochladen"
-        )
-
-    print(f"Lese PayPal-Konto-CSV: {konto[0]}")
-    pp_buchungen = lese_paypal_konto(konto[0])
-    print(f"Lese Buchhaltungs-XLSX: {buchhaltung[0]}")
-    bh_buchungen = lese_paypal_buchhaltung(buchhaltung[0])
-
-    print(f"PayPal Konto: {len(pp_buchungen)} Buchungen")
-    print(f"Buchhaltung:  {len(bh_buchungen)} Buchungen")
-
-    print("\nGleiche Buchungen ab...")
-    nur_pp, nur_bh, uebereinstimmend = abgleich(pp_buchungen, bh_buchungen)
-
-    print(f"\nErgebnis:")
-    print(f"  Übereinstimmend:  {len(uebereinstimmend)}")
-    print(f"  Nur PayPal:       {len(nur_pp)}")
-    print(f"  Nur Buchhaltung:  {len(nur_bh)}")
-
-    out = output_path or "kontoabgleich_paypal.xlsx"
-    print(f"\nSchreibe Ergebnis...")
-    schreibe_ergebnis(out, nur_pp, nur_bh, uebereinstimmend)
-    print(f"Datei geschrieben: {out}")
-    return out
-
-
-def main():
-    import argparse
-    ap = argparse.ArgumentParser(
-        description=(
-            "Gleicht PayPal-Kontobewegungen mit der Buchhaltungs-XLSX ab und markiert\n"
-            "übereinstimmende sowie fehlende Buchungen farbig in einer Ausgabe-Excel-Datei.\n\n"
-            "Benötigte Dateien (Standardpfade):\n"
-            "  kontoabgleich/Paypal_Konto.csv      – PayPal-Kontoauszug als CSV-Export\n"
-            "                                        (UTF-8 mit BOM, Semikolon-getrennt,\n"
-            "                                         Spalten: Datum, Brutto, Name, Hinweis, Typ)\n"
-            "  kontoabgleich/Paypal_Buchhaltung.xlsx – Buchhaltungs-Tabelle als XLSX\n\n"
-            "Alternativ können beide Dateipfade als Argumente übergeben werden."
-        ),
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-    )
-    ap.add_argument(
-        "konto", nargs="?", default="kontoabgleich/Paypal_Konto.csv",
-        help="Pfad zur PayPal-Konto-CSV (Standard: kontoabgleich/Paypal_Konto.csv)",
-    )
-    ap.add_argument(
-        "buchhaltung", nargs="?", default="kontoabgleich/Paypal_Buchhaltung.xlsx",
-        help="Pfad zur Buchhaltungs-XLSX (Standard: kontoabgleich/Paypal_Buchhaltung.xlsx)",
-    )
-    args = ap.parse_args()
-    process([args.konto, args.buchhaltung])
-
-
-if __name__ == "__main__":
-    main()
+import numpy as np
+
+from kontoabgleich_common import (
+    BETRAG,
+    DATUM,
+    Buchungen,
+    DatumToleranz,
+    GleicherMonat,
+    GleichesDatum,
+    Kontoabgleich,
+    Spalte,
+    lese_buchhaltung,
+    lese_csv,
+    parse_tage,
+)
+
+# Spalten der Ergebnisdatei (Status zuletzt)
+SPALTEN = [
+    Spalte("Datum", 12, DATUM, konto="datum", bh="datum"),
+    Spalte("Betrag", 14, BETRAG, konto="betrag", bh="betrag"),
+    Spalte("Betreff PayPal", 60, konto="text"),
+    Spalte("Betreff Buchhaltung", 60, bh="text"),
+    Spalte("Datum Buchhaltung", 18, DATUM, bh="datum", abweichend=True),
+    Spalte("Status", 20),
+]
+
+
+def lese_paypal_konto(pfad):
+    """Liest Paypal_Konto.csv als :class:`Buchungen` mit dem Datumsfeld datum.
+
+    Gebühren werden als separate Buchung direkt nach ihrer Zahlung eingefügt
+    (die Buchhaltung bucht diese separat). Datumsangaben und Beträge werden
+    spaltenweise umgewandelt.
+    """
+    csv = lese_csv(pfad, betraege=["Brutto", "Gebühr"], encoding="utf-8-sig")
+    tage = parse_tage(csv["Datum"])
+    name = csv["Name"].str.strip()
+    hinweis = csv["Hinweis"].str.strip()
+    typ = csv["Typ"].str.strip()
+    betreff = (name + " | " + hinweis).where(hinweis != "", name + " (" + typ + ")")
+
+    gebuehr = csv["Gebühr"].to_numpy()
+    mit_gebuehr = gebuehr != 0
+
+    # Jede Gebühr direkt hinter ihre Zahlung sortieren
+    position = np.concatenate([
+        np.arange(len(csv)) * 2,
+        np.flatnonzero(mit_gebuehr) * 2 + 1,
+    ])
+    reihenfolge = np.argsort(position, kind="stable")
+    return Buchungen(
+        np.concatenate([csv["Brutto"].to_numpy(), gebuehr[mit_gebuehr]])[reihenfolge],
+        np.concatenate([
+            betreff.to_numpy(dtype=object),
+            ("Paypal Gebühren (" + betreff[mit_gebuehr] + ")").to_numpy(dtype=object),
+        ])[reihenfolge],
+        datum=np.concatenate([tage, tage[mit_gebuehr]])[reihenfolge],
+    )
+
+
+def lese_paypal_buchhaltung(pfad):
+    """Liest Paypal_Buchhaltung.xlsx als :class:`Buchungen` mit dem Datumsfeld datum."""
+    return lese_buchhaltung(pfad)
+
+
+def schritte(toleranz=0, monat=False):
+    """Durchgänge des PayPal-Abgleichs in ihrer Reihenfolge.
+
+    Match auf (Datum, Betrag); mit ``toleranz`` > 0 vom Rest Match auf Betrag
+    bei höchstens ``toleranz`` Tagen Abstand, mit ``monat`` vom Rest Match auf
+    Betrag im selben Monat.
+    """
+    folge = [GleichesDatum("datum", "Datum")]
+    if toleranz > 0:
+        folge.append(DatumToleranz(["datum"], toleranz))
+    if monat:
+        folge.append(GleicherMonat("datum"))
+    return folge
+
+
+PAYPAL = Kontoabgleich(
+    name="paypal",
+    bezeichnung="PayPal",
+    spalten=SPALTEN,
+    lese_konto=lese_paypal_konto,
+    lese_buchhaltung=lese_paypal_buchhaltung,
+    schritte=schritte,
+    konto_datei="kontoabgleich/Paypal_Konto.csv",
+    bh_datei="kontoabgleich/Paypal_Buchhaltung.xlsx",
+    csv_format="(UTF-8 mit BOM, Semikolon-getrennt,\n Spalten: Datum, Brutto, Name, Hinweis, Typ)",
+)
+
+abgleich = PAYPAL.abgleich
+auswerten = PAYPAL.auswerten
+schreibe_ergebnis = PAYPAL.schreibe_ergebnis
+process = PAYPAL.process
+main = PAYPAL.main
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+"""Gespeicherter Stand des Kontoabgleichs für fortlaufende Abgleiche.
+
+Ohne Stand gleicht jeder Lauf den vollständigen Konto-Export mit der
+vollständigen Buchhaltung ab. Mit Stand werden alle Buchungen in einer
+SQLite-Datei geführt: Ein Lauf übernimmt nur die noch unbekannten Buchungen
+und gleicht sie zusammen mit den offenen Posten früherer Läufe ab.
+Zugeordnete Paare werden gespeichert und danach nicht mehr betrachtet, offene
+Posten werden automatisch in den nächsten Lauf übernommen. Der Aufwand eines
+Monatslaufs hängt so von den neuen und den noch offenen Buchungen ab, nicht
+von der Länge der Historie.
+
+Übernommen wird je Konto und Seite nur, was hinter dem Stand liegt: dem
+spätesten bereits gespeicherten Datum (erstes Datumsfeld). Buchungen mit
+späterem Datum sind neu, frühere gelten als bekannt und werden gar nicht erst
+verglichen. Am Tag des Stands selbst zählen gleiche Buchungen (Datum, Betrag,
+Text): Es kommen nur so viele hinzu, wie über die gespeicherten hinausgehen,
+sodass ein Export, der mitten im Tag endete, im nächsten Lauf ergänzt wird.
+Überlappende Exporte (z. B. das ganze Jahr statt des letzten Monats) werden
+so nicht doppelt übernommen, und der Aufwand hängt nur von den neuen Zeilen
+ab.
+
+Nachträglich erfasste Buchungen mit einem Datum vor dem Stand (etwa eine
+rückdatierte Buchung in der Buchhaltung) werden deshalb nicht übernommen.
+Enthält eine Datei vor dem Stand mehr Buchungen als gespeichert sind, wird
+das als Warnung gemeldet.
+
+Der Stand liegt standardmäßig unter
+``~/.local/share/erdlinge/kontoabgleich.sqlite``, ``ERDLINGE_STAND`` legt eine
+andere Datei fest; die Gradio-App verwendet je Lauf eine eigene, hochgeladene
+Datei. Jedes Konto (``gls``, ``paypal``) wird getrennt geführt.
+"""
+
+import contextlib
+import logging
+import os
+import sqlite3
+from collections import Counter
+from datetime import date, datetime
+from itertools import repeat
+
+import numpy as np
+
+from kontoabgleich_common import Buchungen
+
+STAND_PFAD = os.environ.get("ERDLINGE_STAND") or os.path.join(
+    os.path.expanduser("~"), ".local", "share", "erdlinge", "kontoabgleich.sqlite"
+)
+
+# Seiten einer Buchung
+KONTO = 0
+BUCHHALTUNG = 1
+_SEITEN = ("Konto", "Buchhaltung")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buchung (
+    id INTEGER PRIMARY KEY,
+    konto TEXT NOT NULL,
+    seite INTEGER NOT NULL,
+    tag INTEGER NOT NULL,
+    tag2 INTEGER,
+    cent INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    offen INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS buchung_tag ON buchung (konto, seite, tag);
+CREATE INDEX IF NOT EXISTS buchung_offen ON buchung (konto, seite, id) WHERE offen = 1;
+CREATE TABLE IF NOT EXISTS paar (
+    konto_id INTEGER PRIMARY KEY REFERENCES buchung (id),
+    bh_id INTEGER NOT NULL UNIQUE REFERENCES buchung (id),
+    status TEXT NOT NULL,
+    lauf TEXT NOT NULL
+);
+"""
+
+log = logging.getLogger("erdlinge.kontoabgleich_stand")
+
+
+class Stand:
+    """Abgleichsstand eines Kontos in der SQLite-Datei ``pfad``.
+
+    Ablauf eines Laufs: :meth:`fortschreiben` mit den frisch gelesenen
+    :class:`Buchungen` liefert die offenen Posten, die abgeglichen werden;
+    :meth:`verbuche` speichert anschließend die gefundenen Paare.
+    """
+
+    def __init__(self, pfad, konto):
+        ordner = os.path.dirname(pfad)
+        if ordner:
+            os.makedirs(ordner, exist_ok=True)
+        self.pfad = pfad
+        self.konto = konto
+        self._db = sqlite3.connect(pfad, timeout=30)
+        self._db.executescript(_SCHEMA)
+        self._ids = None
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def fortschreiben(self, konto, bh):
+        """Übernimmt neue Buchungen beider Seiten und gibt die offenen Posten zurück.
+
+        Liefert zwei :class:`Buchungen` mit denselben Datumsfeldern wie
+        ``konto`` und ``bh``: offene Posten früherer Läufe in der Reihenfolge
+        ihrer Übernahme, danach die neuen Buchungen.
+        """
+        neu = [self._uebernehme(KONTO, konto), self._uebernehme(BUCHHALTUNG, bh)]
+        self._db.commit()
+        offen = [self._offen(KONTO, konto), self._offen(BUCHHALTUNG, bh)]
+        self._ids = [ids for _, ids in offen]
+        log.info("Abgleichsstand: %s", self.pfad)
+        log.info(
+            "  Neu übernommen:   %s Konto, %s Buchhaltung (von %s bzw. %s gelesenen)",
+            neu[0], neu[1], len(konto), len(bh),
+        )
+        log.info(
+            "  Aus früheren Läufen offen: %s Konto, %s Buchhaltung",
+            len(offen[0][0]) - neu[0], len(offen[1][0]) - neu[1],
+        )
+        return offen[0][0], offen[1][0]
+
+    def verbuche(self, treffer):
+        """Speichert die Paare aus :class:`kontoabgleich_common.Abgleich` als erledigt.
+
+        ``treffer`` ordnet jedem Status Indexarrays in die zuletzt von
+        :meth:`fortschreiben` gelieferten Buchungen zu.
+        """
+        konto_ids, bh_ids = self._ids
+        lauf = datetime.now().isoformat(timespec="seconds")
+        paare = []
+        for status, (ki, bi) in treffer.items():
+            paare += zip(konto_ids[ki].tolist(), bh_ids[bi].tolist(), repeat(status), repeat(lauf))
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO paar (konto_id, bh_id, status, lauf) VALUES (?, ?, ?, ?)", paare
+            )
+            self._db.executemany(
+                "UPDATE buchung SET offen = 0 WHERE id = ?",
+                [(i,) for paar in paare for i in paar[:2]],
+            )
+        log.debug("%s Paare im Abgleichsstand gespeichert", len(paare))
+
+    def _uebernehme(self, seite, buchungen):
+        """Fügt die Buchungen hinter dem Stand der Seite ein und gibt ihre Anzahl zurück."""
+        felder = list(buchungen.daten)
+        if len(felder) > 2:
+            raise ValueError(f"Höchstens zwei Datumsfelder je Buchung, nicht {felder}")
+        tage = buchungen.daten[felder[0]]
+        zweites = buchungen.daten[felder[1]] if len(felder) > 1 else None
+        (stand,) = self._db.execute(
+            "SELECT MAX(tag) FROM buchung WHERE konto = ? AND seite = ?", (self.konto, seite)
+        ).fetchone()
+        if stand is None:
+            neu = np.arange(len(buchungen))
+        else:
+            self._pruefe_nachtraege(seite, tage, stand)
+            neu = np.flatnonzero(tage > stand)
+            am_stand = np.flatnonzero(tage == stand).tolist()
+            if am_stand:
+                # Gleiche Buchungen am Tag des Stands: nur die über die gespeicherten hinaus
+                bekannt = Counter(self._db.execute(
+                    "SELECT tag2, cent, text FROM buchung WHERE konto = ? AND seite = ? AND tag = ?",
+                    (self.konto, seite, stand),
+                ))
+                dazu = []
+                for k in am_stand:
+                    werte = (None if zweites is None else int(zweites[k]), int(buchungen.cent[k]), buchungen.texte[k])
+                    if bekannt[werte]:
+                        bekannt[werte] -= 1
+                    else:
+                        dazu.append(k)
+                neu = np.sort(np.concatenate([neu, np.array(dazu, dtype=neu.dtype)]))
+
+        self._db.executemany(
+            "INSERT INTO buchung (konto, seite, tag, tag2, cent, text) VALUES (?, ?, ?, ?, ?, ?)",
+            zip(
+                repeat(self.konto),
+                repeat(seite),
+                tage[neu].tolist(),
+                repeat(None) if zweites is None else zweites[neu].tolist(),
+                buchungen.cent[neu].tolist(),
+                buchungen.texte[neu].tolist(),
+            ),
+        )
+        return len(neu)
+
+    def _pruefe_nachtraege(self, seite, tage, stand):
+        """Warnt, wenn die Datei vor dem Stand mehr Buchungen enthält als gespeichert sind."""
+        frueher = tage[tage < stand]
+        if not len(frueher):
+            return
+        von = int(frueher.min())
+        (gespeichert,) = self._db.execute(
+            "SELECT COUNT(*) FROM buchung WHERE konto = ? AND seite = ? AND tag >= ? AND tag < ?",
+            (self.konto, seite, von, stand),
+        ).fetchone()
+        if len(frueher) > gespeichert:
+            log.warning(
+                "%s: %s Buchung(en) zwischen %s und dem Stand vom %s fehlen im Abgleichsstand "
+                "(nachträglich erfasst?) und werden nicht übernommen",
+                _SEITEN[seite], len(frueher) - gespeichert,
+                date.fromordinal(von).strftime("%d.%m.%Y"), date.fromordinal(stand).strftime("%d.%m.%Y"),
+            )
+
+    def _offen(self, seite, vorlage):
+        """Offene Posten einer Seite als :class:`Buchungen` samt ihrer ids."""
+        zeilen = self._db.execute(
+            "SELECT id, tag, tag2, cent, text FROM buchung"
+            " WHERE konto = ? AND seite = ? AND offen = 1 ORDER BY id",
+            (self.konto, seite),
+        ).fetchall()
+        ids, tag, tag2, cent, texte = zip(*zeilen) if zeilen else ((),) * 5
+        felder = list(vorlage.daten)
+        daten = {felder[0]: tag}
+        if len(felder) > 1:
+            daten[felder[1]] = tag2
+        return Buchungen(cent, texte, **daten), np.array(ids, dtype=np.int64)
+
+
+@contextlib.contextmanager
+def oeffne(pfad, konto):
+    """:class:`Stand` für ``pfad`` (``True`` = :data:`STAND_PFAD`); ohne ``pfad`` ``None``."""
+    if not pfad:
+        yield None
+        return
+    with Stand(STAND_PFAD if pfad is True else pfad, konto) as stand:
+        yield stand
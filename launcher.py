@@ -4,8 +4,13 @@ Dieses Skript wird von PyInstaller als ausführbare Datei gebündelt. Es startet
 die gemeinsame Gradio-Oberfläche (siehe :mod:`app`) und öffnet automatisch den
 Standard-Browser, damit die Anwendung sich wie ein klassisches Desktop-Programm
 verhält.
+
+Mit ``--startzeiten`` wird nach dem Start aufgeschlüsselt, wie lange die
+einzelnen Phasen und Importe bis zur fertigen Oberfläche gedauert haben.
 """
 
+import argparse
+import multiprocessing
 import os
 import sys
 
@@ -20,6 +25,22 @@ def _bundle_dir():
 
 
 def main():
+    # Im PyInstaller-Bundle starten Prozess-Pools (paralleles PDF-Lesen) das
+    # Programm erneut; ``freeze_support`` leitet diese Kindprozesse korrekt um.
+    multiprocessing.freeze_support()
+
+    ap = argparse.ArgumentParser(description="Startet die Erdlinge-Skripte im Browser.")
+    ap.add_argument(
+        "--startzeiten", action="store_true",
+        help="Nach dem Start die Dauer der Phasen und die langsamsten Importe ausgeben",
+    )
+    args = ap.parse_args()
+    zeiten = None
+    if args.startzeiten:
+        import startzeiten
+
+        zeiten = startzeiten.Startzeiten().start()
+
     # Sicherstellen, dass die gebündelten Module gefunden werden, wenn das
     # Programm aus einem anderen Arbeitsverzeichnis gestartet wird.
     bundle_dir = _bundle_dir()
@@ -28,10 +49,21 @@ def main():
 
     import app
 
+    if zeiten:
+        zeiten.phase("Import app (gradio)")
     demo = app.build_app()
+    if zeiten:
+        zeiten.phase("Oberfläche aufgebaut")
     # ``inbrowser=True`` öffnet den Standard-Browser, sobald der lokale Server
-    # bereit ist. ``launch`` blockiert anschließend, bis das Programm beendet wird.
-    demo.launch(inbrowser=True)
+    # bereit ist.
+    demo.launch(inbrowser=True, prevent_thread_lock=True)
+    if zeiten:
+        zeiten.phase("Server bereit, Browser geöffnet")
+        zeiten.stop()
+        print(zeiten.bericht(), file=sys.stderr)
+    # Erst jetzt die Arbeitsprozesse starten, dann bis zum Programmende blockieren
+    app.warm_up()
+    demo.block_thread()
 
 
 if __name__ == "__main__":
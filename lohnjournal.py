@@ -1,19 +1,19 @@
-from pandas.core.arrays import boolean
-from pypdf import PdfReader
-from pandas import DataFrame, ExcelWriter
+from pdf_text import iter_pages, iter_body_lines, with_next
+import protokoll
 import datetime
-import glob, re, os
+import glob, logging, re, os
 
 YEAR = str(datetime.date.today().year)
 
+log = logging.getLogger("erdlinge.lohnjournal")
+
 HEADER_END = "Name E Kl"
 FOOTER_START = "Negative Werte sind"
 END_TEXT = "Summen: "
 
-
-def get_pages(filename):
-    reader = PdfReader(filename)
-    return [page.extract_text() or "" for page in reader.pages]
+STEUERBRUTTO = "Steuerbrutto"
+GESAMTBRUTTO = "Gesamtbrutto"
+SV_AG = "SV-AG Anteil"
 
 
 def parse_float(float_str_eu: str):
@@ -27,56 +27,37 @@ def unique(lst: list):
     return [x for x in lst if not (x in seen or seen_add(x))]
 
 
-def line_with(lines: list, text: str):
-    return [line for line in lines if text in line][0]
-
-
-def line_index_with(lines: list, text: str):
-    return [index for index, line in enumerate(lines) if text in line][0]
+def parse_pages(pages):
+    """Wertet die Seitentexte aus und gibt die Werte je Mitarbeiter zurück."""
+    return parse_lines(iter_body_lines(pages, HEADER_END, FOOTER_START))
 
 
-def process(pdf_paths, year=YEAR, output_path=None):
-    if len(pdf_paths) != 1:
-        raise OSError("expected one pdf")
+def parse_lines(lines):
+    """Wertet die Tabellenzeilen aller Seiten (ohne Kopf- und Fußzeilen) aus."""
+    lines = with_next(lines)
 
-    print(f"Lese PDF: {pdf_paths[0]}")
-    pages = get_pages(pdf_paths[0])
-    print(f"  {len(pages)} Seite(n) gefunden, extrahiere Zeilen...")
-
-    lines = []
-    for page in pages:
-        pLines = page.split("\n")
-        index_start = line_index_with(pLines, HEADER_END)
-        index_end = line_index_with(pLines, FOOTER_START)
-        lines.extend(
-            [line for line in pLines[index_start + 1 : index_end] if line.strip() != ""]
-        )
-    
-    print(f"Starte Verarbeitung von {len(lines)} Zeile(n)")
-    i = 0
+    log.info("Starte Verarbeitung der Zeilen...")
     data = {}
-    STEUERBRUTTO = "Steuerbrutto"
-    GESAMTBRUTTO = "Gesamtbrutto"
-    SV_AG = "SV-AG Anteil"
-    while i < len(lines):
-        line_split = lines[i].split(" ")
-        if not re.match(r"^\d{6}$", line_split[0]):
-            i += 1
+    for line, name_line in lines:
+        line_split = line.split(" ")
+        if not re.match(r"^\d{6}$", line_split[0]) or name_line is None:
             continue
         gesamtbrutto = parse_float(line_split[7]) if len(line_split) >= 8 else 0.0
         steuerbrutto = parse_float(line_split[8]) if len(line_split) >= 9 else 0.0
-        i += 1
-        line_split = re.split(r"(\b\d{1,3}(?:\.\d{3})*,\d+\b)", lines[i], maxsplit=1)
+        # Namenszeile verbrauchen und auf die darauffolgende Zeile schauen
+        _, following = next(lines, (name_line, None))
+        line_split = re.split(r"(\b\d{1,3}(?:\.\d{3})*,\d+\b)", name_line, maxsplit=1)
         name = line_split[0].strip().strip(" *)")
-        if not re.match(r"^\d{6}", lines[i + 1]) and not "Summen" in lines[i + 1]:
-            print(f"FEHLER: nicht erwartetes format für {name}")
+        if following is None or (
+            not re.match(r"^\d{6}", following) and not "Summen" in following
+        ):
+            log.warning("FEHLER: nicht erwartetes format für %s", name)
             data[name] = {STEUERBRUTTO: None, GESAMTBRUTTO: None, SV_AG: None}
-            i += 2
             continue
         sv_ag = parse_float(line_split[1]) if len(line_split) > 1 else 0.0
         if name in data:
-            print(
-                f"WARNUNG: Zwei Lohnjournal Seiten für {name} - addiere Werte - Kontrolle!"
+            log.warning(
+                "WARNUNG: Zwei Lohnjournal Seiten für %s - addiere Werte - Kontrolle!", name
             )
             existing = data[name]
             steuerbrutto = (existing[STEUERBRUTTO] or 0.0) + steuerbrutto
@@ -87,10 +68,25 @@ def process(pdf_paths, year=YEAR, output_path=None):
             GESAMTBRUTTO: gesamtbrutto,
             SV_AG: sv_ag,
         }
-    print(f"Verarbeitung abgeschlossen: {len(data)} Mitarbeiter ausgewertet")
+        log.debug("%s: %s", name, data[name])
+    log.info("Verarbeitung abgeschlossen: %d Mitarbeiter ausgewertet", len(data))
+    return data
+
+
+def process(pdf_paths, year=YEAR, output_path=None):
+    if len(pdf_paths) != 1:
+        raise OSError("expected one pdf")
+
+    log.info("Lese PDF: %s", pdf_paths[0])
+    # Seiten werden einzeln gelesen, zugeschnitten und direkt ausgewertet
+    data = parse_pages(iter_pages(pdf_paths[0]))
     
+    # pandas nur für die Ausgabe
+    from pandas import DataFrame, ExcelWriter
+
     OUT_FILENAME = output_path or f"lohnjournal_{year}.xlsx"
-    print(f"\nErstelle {OUT_FILENAME}")
+    log.info("\nErstelle %s", OUT_FILENAME)
+    protokoll.progress("Schreibe Excel-Datei")
     if os.path.exists(OUT_FILENAME):
         os.remove(OUT_FILENAME)
 
@@ -109,7 +105,7 @@ def process(pdf_paths, year=YEAR, output_path=None):
                     cell.number_format = "#,##0.00"
         for column in ["B", "C", "D", "E", "F", "G", "H", "I"]:
             writer.sheets[TITLE].column_dimensions[column].width = 15
-    print("fertig")
+    log.info("fertig")
     return OUT_FILENAME
 
 
@@ -128,10 +124,12 @@ if __name__ == "__main__":
         "--year", default=YEAR,
         help=f"Abrechnungsjahr (Standard: {YEAR})",
     )
+    protokoll.add_arguments(ap)
     args = ap.parse_args()
+    protokoll.setup_cli(args)
     pdfs = glob.glob(f"lohnjournal/12.{args.year}.pdf")
     if not pdfs:
-        print(f"Keine PDF gefunden: lohnjournal/12.{args.year}.pdf")
+        log.error("Keine PDF gefunden: lohnjournal/12.%s.pdf", args.year)
         exit(1)
-    print(f"PDF gefunden: {pdfs[0]}")
+    log.info("PDF gefunden: %s", pdfs[0])
     process(pdfs, year=args.year)
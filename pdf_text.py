@@ -0,0 +1,340 @@
+"""Gemeinsames Lesen des Seitentexts aus PDFs mit Festplatten-Cache.
+
+Die Textextraktion mit pypdf ist der teuerste Schritt aller PDF-Auswertungen.
+Der extrahierte Text wird daher je PDF unter einem Schlüssel aus dem
+SHA-256 des Dateiinhalts und der pypdf-Version zwischengespeichert. Wird
+dieselbe Datei erneut hochgeladen (z. B. nach Korrektur des Jahres), entfällt
+die Extraktion vollständig.
+
+Der Cache liegt standardmäßig unter ``~/.cache/erdlinge/pdf_text`` und ist
+auf ``ERDLINGE_CACHE_MB`` Megabyte (Standard: 200) begrenzt; bei Überschreitung
+werden die am längsten nicht benutzten Einträge gelöscht (LRU). Mit
+``ERDLINGE_CACHE_MB=0`` ist der Cache abgeschaltet, ``ERDLINGE_CACHE_DIR``
+legt ein anderes Verzeichnis fest.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import protokoll
+from felder import Feld, Vorlage
+
+CACHE_DIR = os.environ.get("ERDLINGE_CACHE_DIR") or os.path.join(
+    os.path.expanduser("~"), ".cache", "erdlinge", "pdf_text"
+)
+CACHE_MAX_BYTES = int(float(os.environ.get("ERDLINGE_CACHE_MB", "200")) * 1024 * 1024)
+CACHE_SUFFIX = ".jsonl"
+
+log = logging.getLogger("erdlinge.pdf_text")
+
+
+def extract_pages(filename):
+    """Extrahiert den Text aller Seiten, ohne den Cache zu benutzen."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(filename)
+    return [page.extract_text() or "" for page in reader.pages]
+
+
+def cache_key(filename):
+    """Schlüssel aus Dateiinhalt und pypdf-Version."""
+    # pypdf wird erst beim ersten PDF geladen
+    import pypdf
+
+    digest = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    digest.update(f"pypdf={pypdf.__version__}".encode())
+    return digest.hexdigest()
+
+
+def _cache_path(key):
+    return os.path.join(CACHE_DIR, key + CACHE_SUFFIX)
+
+
+def _cache_read(key):
+    if CACHE_MAX_BYTES <= 0:
+        return None
+    path = _cache_path(key)
+    try:
+        with open(path, encoding="utf-8") as f:
+            pages = [json.loads(line) for line in f]
+        # Zugriffszeit für die LRU-Verdrängung aktualisieren
+        os.utime(path)
+    except (OSError, ValueError):
+        return None
+    return pages
+
+
+def _cache_open():
+    """Neue temporäre Cache-Datei als (Datei, Pfad); ``(None, None)``, wenn das nicht geht."""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    except OSError as exc:
+        log.warning("  Warnung: PDF-Cache konnte nicht geschrieben werden: %s", exc)
+        return None, None
+    return os.fdopen(fd, "w", encoding="utf-8"), tmp
+
+
+def _cache_append(f, tmp, page):
+    """Schreibt eine Seite in die temporäre Cache-Datei; ``False``, wenn sie verworfen wurde."""
+    try:
+        f.write(json.dumps(page, ensure_ascii=False) + "\n")
+    except OSError as exc:
+        log.warning("  Warnung: PDF-Cache konnte nicht geschrieben werden: %s", exc)
+        _cache_discard(f, tmp)
+        return False
+    return True
+
+
+def _cache_commit(f, tmp, path):
+    """Schließt die temporäre Cache-Datei und übernimmt sie als Eintrag ``path``.
+
+    Ein schreibgeschütztes oder volles Cache-Verzeichnis ist kein Fehler der
+    Auswertung, der Eintrag entfällt dann.
+    """
+    try:
+        f.close()
+        os.replace(tmp, path)
+    except OSError as exc:
+        log.warning("  Warnung: PDF-Cache konnte nicht geschrieben werden: %s", exc)
+        _cache_discard(f, tmp)
+        return
+    try:
+        _evict()
+    except OSError as exc:
+        log.warning("  Warnung: PDF-Cache konnte nicht aufgeräumt werden: %s", exc)
+
+
+def _cache_discard(f, tmp):
+    """Schließt und löscht eine unvollständige temporäre Cache-Datei."""
+    with contextlib.suppress(OSError):
+        f.close()
+    with contextlib.suppress(OSError):
+        os.remove(tmp)
+
+
+def _cache_write(key, pages):
+    if CACHE_MAX_BYTES <= 0:
+        return
+    f, tmp = _cache_open()
+    if f is None:
+        return
+    for page in pages:
+        if not _cache_append(f, tmp, page):
+            return
+    _cache_commit(f, tmp, _cache_path(key))
+
+
+def _evict():
+    """Löscht die am längsten nicht benutzten Einträge, bis das Limit passt."""
+    entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if entry.name.endswith(CACHE_SUFFIX):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # von einem anderen Prozess verdrängt
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= CACHE_MAX_BYTES:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+
+def iter_pages(filename):
+    """Liefert den Text der Seiten nacheinander.
+
+    Es wird immer nur eine Seite im Speicher gehalten: Cache-Einträge werden
+    zeilenweise gelesen, bei einem Cache-Fehlschlag wird jede extrahierte
+    Seite sofort in eine temporäre Cache-Datei geschrieben, die erst nach der
+    letzten Seite übernommen wird. Nach jeder Seite wird der Fortschritt
+    gemeldet (:func:`protokoll.progress`).
+    """
+    text = f"Seiten gelesen ({os.path.basename(filename)})"
+    key = cache_key(filename)
+    path = _cache_path(key)
+    cached = None
+    if CACHE_MAX_BYTES > 0:
+        try:
+            cached = open(path, encoding="utf-8")
+        except OSError:
+            # Auch wenn ein anderer Prozess den Eintrag eben verdrängt hat
+            pass
+    if cached is not None:
+        log.info("  Cache-Treffer: %s", filename)
+        with cached:
+            for done, line in enumerate(cached, 1):
+                yield json.loads(line)
+                protokoll.progress(text, done)
+        with contextlib.suppress(OSError):
+            os.utime(path)
+        return
+
+    cache_file = tmp = None
+    if CACHE_MAX_BYTES > 0:
+        cache_file, tmp = _cache_open()
+
+    from pypdf import PdfReader
+
+    reader = PdfReader(filename)
+    total = len(reader.pages)
+    try:
+        for done, page in enumerate(reader.pages, 1):
+            page_text = page.extract_text() or ""
+            if cache_file is not None and not _cache_append(cache_file, tmp, page_text):
+                cache_file = None
+            yield page_text
+            protokoll.progress(text, done, total)
+        if cache_file is not None:
+            _cache_commit(cache_file, tmp, path)
+            cache_file = None
+    finally:
+        if cache_file is not None:
+            _cache_discard(cache_file, tmp)
+
+
+def iter_body_lines(pages, header_end, footer_start):
+    """Liefert die nicht-leeren Zeilen zwischen Kopf- und Fußzeile jeder Seite.
+
+    Ausgegeben werden je Seite die Zeilen nach der ersten Zeile mit
+    ``header_end`` bis vor die erste Zeile mit ``footer_start``.
+    """
+    vorlage = Vorlage(body=Feld(header_end, versatz=1), footer=Feld(footer_start))
+    for page in pages:
+        for line in vorlage.lesen(page).zeilen("body", "footer"):
+            if line.strip() != "":
+                yield line
+
+
+class _BodyEnd(Exception):
+    """Bricht die Textextraktion einer Seite an der Fußzeile ab."""
+
+
+def _page_body_lines(page, header_end, footer_start):
+    """Tabellenzeilen einer pypdf-Seite, gesammelt über ``visitor_text``."""
+    body = []
+    pending = []
+    in_body = False
+
+    def finish(line):
+        nonlocal in_body
+        if footer_start in line:
+            raise _BodyEnd
+        if in_body:
+            if line.strip() != "":
+                body.append(line)
+        elif header_end in line:
+            in_body = True
+
+    def visit(text, cm, tm, font_dict, font_size):
+        if "\n" not in text:
+            pending.append(text)
+            return
+        first, *rest = text.split("\n")
+        pending.append(first)
+        finish("".join(pending))
+        for line in rest[:-1]:
+            finish(line)
+        pending[:] = [rest[-1]]
+
+    try:
+        page.extract_text(visitor_text=visit)
+        finish("".join(pending))
+    except _BodyEnd:
+        return body
+    raise ValueError(
+        f"Fußzeile '{footer_start}' nicht gefunden" if in_body
+        else f"Kopfzeile '{header_end}' nicht gefunden"
+    )
+
+
+def extract_body_lines(filename, header_end, footer_start):
+    """Wie :func:`iter_body_lines`, aber direkt aus dem PDF und nur bis zur Fußzeile.
+
+    Der Text wird über den ``visitor_text``-Callback von pypdf zeilenweise
+    verfolgt: Zeilen bis einschließlich ``header_end`` werden verworfen, an der
+    ersten Zeile mit ``footer_start`` endet die Extraktion der Seite. Ohne
+    Cache; zum Vergleich mit :func:`iter_pages` siehe
+    ``benchmarks/bench_pdf.py``.
+    """
+    from pypdf import PdfReader
+
+    text = f"Seiten gelesen ({os.path.basename(filename)})"
+    reader = PdfReader(filename)
+    total = len(reader.pages)
+    for done, page in enumerate(reader.pages, 1):
+        yield from _page_body_lines(page, header_end, footer_start)
+        protokoll.progress(text, done, total)
+
+
+def with_next(lines):
+    """Liefert Paare (Zeile, nächste Zeile); die letzte Zeile hat ``None`` als Nachfolger."""
+    it = iter(lines)
+    current = next(it, None)
+    if current is None:
+        return
+    for following in it:
+        yield current, following
+        current = following
+    yield current, None
+
+
+def prefetch(filename):
+    """Legt den Text eines PDFs im Cache ab, ohne ihn zurückzugeben.
+
+    Gibt die Anzahl der extrahierten Seiten zurück, 0 bei einem Cache-Treffer.
+    """
+    if CACHE_MAX_BYTES > 0 and os.path.exists(_cache_path(cache_key(filename))):
+        return 0
+    return sum(1 for _ in iter_pages(filename))
+
+
+def get_pages(filename):
+    """Text aller Seiten eines PDFs als Liste, aus dem Cache falls vorhanden."""
+    return list(iter_pages(filename))
+
+
+def get_pages_parallel(pdf_paths, workers=1):
+    """Liest die Seiten mehrerer PDFs, bei ``workers > 1`` in einem Prozess-Pool.
+
+    Die Ergebnisse kommen in derselben Reihenfolge wie ``pdf_paths`` zurück.
+    Ohne Pool wird je PDF ein :func:`iter_pages`-Generator geliefert, die
+    Seiten werden also erst beim Durchlaufen gelesen. Im Pool werden
+    Cache-Treffer im aufrufenden Prozess bedient; nur die fehlenden PDFs
+    werden verteilt und vollständig zurückgegeben; bei einem Abbruch werden
+    noch nicht begonnene Extraktionen verworfen.
+    """
+    if workers <= 1 or len(pdf_paths) <= 1:
+        return map(iter_pages, pdf_paths)
+
+    keys = [cache_key(pdf) for pdf in pdf_paths]
+    results = [_cache_read(key) for key in keys]
+    for pdf, pages in zip(pdf_paths, results):
+        if pages is not None:
+            log.info("  Cache-Treffer: %s", pdf)
+    missing = [i for i, pages in enumerate(results) if pages is None]
+    if missing:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(missing)))
+        try:
+            extracted = pool.map(extract_pages, [pdf_paths[i] for i in missing])
+            for done, (i, pages) in enumerate(zip(missing, extracted), 1):
+                results[i] = pages
+                _cache_write(keys[i], pages)
+                protokoll.progress("PDFs gelesen", done, len(missing))
+        finally:
+            pool.shutdown(cancel_futures=True)
+    return results
@@ -0,0 +1,157 @@
+"""Gemeinsames Protokoll der Auswertungsskripte.
+
+Alle Skripte melden ihre Ereignisse über Logger unterhalb von ``erdlinge``
+(z. B. ``erdlinge.abrechnungen``) in drei Stufen:
+
+* Zusammenfassung (``INFO``): Fortschritt und Ergebnisse, Standard
+* Warnung (``WARNING``): Auffälligkeiten, die geprüft werden sollten
+* Details (``DEBUG``): jede einzelne ausgewertete Zeile/Seite
+
+Detail-Meldungen werden mit ``%``-Platzhaltern übergeben und daher nur
+formatiert, wenn die Stufe aktiv ist. Die Kommandozeile schreibt das Protokoll
+nach stdout (:func:`setup_cli`), die Gradio-App sammelt es je Auftrag
+(:func:`capture`, :func:`forward`).
+
+Zusätzlich melden die Skripte ihren Fortschritt über :func:`progress`. Ohne
+:func:`track` bleibt das wirkungslos; die Gradio-App zeigt die Meldungen als
+Fortschrittsbalken an und kann den Auftrag darüber abbrechen.
+"""
+
+import contextlib
+import io
+import logging
+import sys
+import threading
+
+LOGGER_NAME = "erdlinge"
+SUMMARY = logging.INFO
+WARNING = logging.WARNING
+DEBUG = logging.DEBUG
+
+_FORMAT = "%(message)s"
+_logger = logging.getLogger(LOGGER_NAME)
+_logger.setLevel(SUMMARY)
+_logger.propagate = False
+_lock = threading.Lock()
+_active_levels = []
+_default_level = SUMMARY
+_local = threading.local()
+
+
+class JobCancelled(Exception):
+    """Der laufende Auftrag wurde abgebrochen (siehe :func:`track`)."""
+
+
+def add_arguments(ap):
+    """Fügt einem ArgumentParser die Optionen ``--verbose`` und ``--quiet`` hinzu."""
+    group = ap.add_mutually_exclusive_group()
+    group.add_argument(
+        "-v", "--verbose", action="store_true",
+        help="Detailprotokoll mit jeder ausgewerteten Zeile ausgeben",
+    )
+    group.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="Nur Warnungen und Fehler ausgeben",
+    )
+
+
+def setup_cli(args=None, level=SUMMARY):
+    """Richtet die Protokollausgabe nach stdout ein."""
+    global _default_level
+    if args is not None:
+        level = DEBUG if args.verbose else WARNING if args.quiet else SUMMARY
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(_FORMAT))
+    _logger.handlers[:] = [handler]
+    _default_level = level
+    _update_level()
+
+
+def _update_level():
+    _logger.setLevel(min(_active_levels, default=_default_level))
+
+
+class _CallbackHandler(logging.Handler):
+    def __init__(self, emit):
+        super().__init__()
+        self._emit = emit
+
+    def emit(self, record):
+        try:
+            self._emit(self.format(record) + "\n")
+        except Exception:  # noqa: BLE001 - wie logging.StreamHandler
+            self.handleError(record)
+
+
+@contextlib.contextmanager
+def forward(emit, level=SUMMARY):
+    """Übergibt die Meldungen des aktuellen Threads als Text an ``emit``.
+
+    Mehrere Aufträge können gleichzeitig in verschiedenen Threads laufen; jeder
+    erhält nur die Meldungen seines eigenen Threads.
+    """
+    thread = threading.get_ident()
+    handler = _CallbackHandler(emit)
+    handler.setFormatter(logging.Formatter(_FORMAT))
+    handler.setLevel(level)
+    handler.addFilter(lambda record: record.thread == thread)
+    with _lock:
+        _active_levels.append(level)
+        _update_level()
+        _logger.addHandler(handler)
+    try:
+        yield
+    finally:
+        with _lock:
+            _logger.removeHandler(handler)
+            _active_levels.remove(level)
+            _update_level()
+
+
+@contextlib.contextmanager
+def capture(level=SUMMARY):
+    """Sammelt die Meldungen des aktuellen Threads und liefert den Puffer."""
+    buf = io.StringIO()
+    with forward(buf.write, level):
+        yield buf
+
+
+@contextlib.contextmanager
+def track(callback, cancel=None):
+    """Leitet :func:`progress`-Meldungen des aktuellen Threads an ``callback``.
+
+    ``callback(text, done, total)`` erhält die Meldungen. Ist das Ereignis
+    ``cancel`` (``threading.Event``) gesetzt, löst der nächste Aufruf von
+    :func:`progress` :class:`JobCancelled` aus.
+    """
+    previous = getattr(_local, "job", None)
+    _local.job = (callback, cancel)
+    try:
+        yield
+    finally:
+        _local.job = previous
+
+
+def progress(text, done=None, total=None):
+    """Meldet einen Fortschritt, z. B. ``progress("PDFs gelesen", 3, 12)``.
+
+    ``total`` ist ``None``, wenn die Gesamtzahl nicht bekannt ist. Hier wird
+    auch ein Abbruch des Auftrags umgesetzt, die Skripte sollten die Funktion
+    daher regelmäßig (je Datei/Seite) aufrufen.
+    """
+    job = getattr(_local, "job", None)
+    if job is None:
+        return
+    callback, cancel = job
+    if cancel is not None and cancel.is_set():
+        raise JobCancelled("Auftrag abgebrochen")
+    callback(text, done, total)
+
+
+def iterate(items, text, total=None):
+    """Durchläuft ``items`` und meldet nach jedem Element den Fortschritt."""
+    if total is None and hasattr(items, "__len__"):
+        total = len(items)
+    for done, item in enumerate(items, 1):
+        yield item
+        progress(text, done, total)
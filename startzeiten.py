@@ -0,0 +1,86 @@
+"""Messung der Startzeit: Phasen und Importe bis zur fertigen Oberfläche.
+
+Ähnlich wie ``python -X importtime``, aber auch im PyInstaller-Bundle
+nutzbar, dem sich keine Interpreter-Optionen übergeben lassen: Solange die
+Messung läuft, wird jeder ``import`` eines noch nicht geladenen Moduls mit
+eigener und kumulierter Zeit erfasst. Submodule, die ein Paket intern per
+``from . import x`` lädt, zählen dabei zur Zeit des Pakets. Dazu kommen
+benannte Phasen (:meth:`Startzeiten.phase`), etwa "Oberfläche aufgebaut".
+"""
+
+import builtins
+import importlib.util
+import sys
+import threading
+import time
+
+# Bibliotheken, bei denen im Bericht vermerkt wird, ob sie schon geladen sind
+SCHWERGEWICHTE = ("gradio", "pandas", "numpy", "openpyxl", "pypdf")
+
+
+class Startzeiten:
+    """Zeichnet Importe und Phasen ab :meth:`start` auf."""
+
+    def __init__(self):
+        self.beginn = None
+        self.phasen = []
+        # Modulname -> (eigene Zeit, kumulierte Zeit) in Sekunden
+        self.importe = {}
+        self._import = None
+        self._lokal = threading.local()
+
+    def start(self):
+        self.beginn = time.perf_counter()
+        self._import = builtins.__import__
+        builtins.__import__ = self._gemessen
+        return self
+
+    def stop(self):
+        if self._import is not None:
+            builtins.__import__ = self._import
+            self._import = None
+
+    def phase(self, name):
+        """Hält das Ende der Phase ``name`` fest."""
+        self.phasen.append((name, time.perf_counter() - self.beginn))
+
+    def _gemessen(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._import
+        modul = name
+        if level:
+            try:
+                modul = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__") or "")
+            except (ImportError, ValueError):
+                return original(name, globals, locals, fromlist, level)
+        if modul in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+
+        stapel = self._lokal.__dict__.setdefault("stapel", [])
+        stapel.append(0.0)
+        start = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            gesamt = time.perf_counter() - start
+            kinder = stapel.pop()
+            if stapel:
+                stapel[-1] += gesamt
+            self.importe.setdefault(modul, (gesamt - kinder, gesamt))
+
+    def bericht(self, anzahl=30):
+        """Phasen, die langsamsten Importe und geladene Bibliotheken als Text."""
+        zeilen = ["Startzeiten:"]
+        vorher = 0.0
+        for name, ende in self.phasen:
+            zeilen.append(f"  {name:<32} {ende - vorher:7.2f} s   (seit Start {ende:6.2f} s)")
+            vorher = ende
+        zeilen.append("")
+        zeilen.append("Langsamste Importe (in ms, wie python -X importtime):")
+        zeilen.append(f"  {'eigene':>9} | {'kumuliert':>9} | Modul")
+        langsamste = sorted(self.importe.items(), key=lambda eintrag: eintrag[1][1], reverse=True)
+        for modul, (eigen, gesamt) in langsamste[:anzahl]:
+            zeilen.append(f"  {eigen * 1000:9.1f} | {gesamt * 1000:9.1f} | {modul}")
+        geladen = [name for name in SCHWERGEWICHTE if name in sys.modules]
+        zeilen.append("")
+        zeilen.append("Im Server-Prozess geladen: " + (", ".join(geladen) or "-"))
+        return "\n".join(zeilen)
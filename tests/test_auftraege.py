@@ -0,0 +1,51 @@
+"""Abbruch und Zeitlimit von Aufträgen, die laufend Fortschritt melden."""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import auftraege  # noqa: E402
+import protokoll  # noqa: E402
+
+DAUER = 5
+
+
+def fleissig(sekunden=DAUER):
+    """Meldet alle 50 ms Fortschritt, wie die Skripte je PDF-Seite."""
+    ende = time.monotonic() + sekunden
+    schritt = 0
+    while time.monotonic() < ende:
+        schritt += 1
+        protokoll.progress("Seite", schritt)
+        time.sleep(0.05)
+    return schritt
+
+
+@pytest.fixture
+def executor():
+    executor = auftraege.Executor(size=1, timeout=0)
+    yield executor
+    executor.shutdown()
+
+
+def test_zeitlimit_bei_haeufigem_fortschritt(executor):
+    start = time.monotonic()
+    job = executor.submit(fleissig, timeout=1)
+    assert job.wait(DAUER + auftraege.GRACE_SECONDS)
+    assert job.status == auftraege.ZEITLIMIT
+    assert time.monotonic() - start < DAUER
+
+
+def test_abbruch_bei_haeufigem_fortschritt(executor):
+    job = executor.submit(fleissig)
+    while job.progress is None:
+        time.sleep(0.05)
+    start = time.monotonic()
+    job.cancel()
+    assert job.wait(DAUER + auftraege.GRACE_SECONDS)
+    assert job.status == auftraege.ABGEBROCHEN
+    assert time.monotonic() - start < DAUER - 1
@@ -0,0 +1,91 @@
+"""Deklarative Feldextraktion (felder)."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from felder import Feld, Vorlage  # noqa: E402
+
+
+def parse_eur(wert):
+    return float(wert.replace(" €", "").replace(".", "").replace(",", "."))
+
+
+SEITE = Vorlage(
+    vorname=Feld("Vorname Rentenversicherungsnummer", versatz=1, token=slice(None, -1)),
+    rvnr=Feld("Vorname Rentenversicherungsnummer", versatz=1, token=-1),
+    summe=Feld("Summe Erstattungsbetrag", token=slice(2, None), parser=parse_eur),
+    im_monat=Feld(" im Monat ", teil="nach", parser=parse_eur),
+    monat_vor=Feld(" im Monat ", teil="vor"),
+    storno=Feld("X Stornierung"),
+    ende=Feld("Ende der Seite", versatz=1),
+    drittes_wort=Feld("Summe Erstattungsbetrag", token=5),
+)
+
+TEXT = (
+    "Kopf\n"
+    "Vorname Rentenversicherungsnummer\n"
+    "Anna Maria 12345678A123\n"
+    "Erstattung im Monat 1.234,56 €\n"
+    "Summe Erstattungsbetrag 987,65 €\n"
+    "Ende der Seite\n"
+    "letzte Zeile"
+)
+
+
+def test_felder_lesen():
+    felder = SEITE.lesen(TEXT)
+    assert felder["vorname"] == "Anna Maria"
+    assert felder["rvnr"] == "12345678A123"
+    assert felder["summe"] == 987.65
+    assert felder["im_monat"] == 1234.56
+    assert felder["monat_vor"] == "Erstattung"
+    assert felder.zeile("summe") == "Summe Erstattungsbetrag 987,65 €"
+    assert felder.zeilen("vorname", "summe") == ["Anna Maria 12345678A123", "Erstattung im Monat 1.234,56 €"]
+    assert felder.zeilen("summe", "vorname") == []
+
+
+def test_anker_fehlt():
+    felder = SEITE.lesen(TEXT)
+    assert not felder.hat("storno")
+    assert felder.get("storno") is None
+    assert felder.get("storno", 0) == 0
+    with pytest.raises(KeyError, match="storno: 'X Stornierung' nicht gefunden"):
+        felder["storno"]
+    with pytest.raises(KeyError, match="storno"):
+        felder.zeile("storno")
+
+
+def test_erste_fundstelle_zaehlt():
+    felder = SEITE.lesen("Summe Erstattungsbetrag 1,00 €\nSumme Erstattungsbetrag 2,00 €")
+    assert felder["summe"] == 1.0
+
+
+def test_versatz_hinter_dem_textende():
+    felder = SEITE.lesen("Ende der Seite")
+    with pytest.raises(IndexError, match="ende: keine Zeile 1"):
+        felder["ende"]
+    # get hilft nur bei fehlendem Anker, nicht bei fehlender Zeile
+    with pytest.raises(IndexError):
+        felder.get("ende")
+    # Die letzte Zeile ohne abschließenden Zeilenumbruch ist noch erreichbar
+    assert SEITE.lesen(TEXT)["ende"] == "letzte Zeile"
+
+
+def test_token_fehlt():
+    with pytest.raises(IndexError, match="drittes_wort: kein Wort 5"):
+        SEITE.lesen(TEXT)["drittes_wort"]
+    # Ein slice hinter dem Zeilenende ergibt dagegen einen leeren Text
+    assert SEITE.lesen("Vorname Rentenversicherungsnummer\n")["vorname"] == ""
+
+
+def test_parser_scheitert():
+    felder = SEITE.lesen("Summe Erstattungsbetrag keine Zahl")
+    with pytest.raises(ValueError, match="summe: 'keine Zahl' nicht lesbar") as info:
+        felder["summe"]
+    assert isinstance(info.value.__cause__, ValueError)
+    with pytest.raises(ValueError):
+        felder.get("summe", 0)
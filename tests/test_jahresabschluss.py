@@ -0,0 +1,52 @@
+"""Eingaben des Jahresabschlusses (jahresabschluss.finde_auswertungen)."""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import jahresabschluss  # noqa: E402
+import protokoll  # noqa: E402
+
+
+def _dateien(ordner, *namen):
+    ordner.mkdir(parents=True, exist_ok=True)
+    for name in namen:
+        (ordner / name).write_text("")
+
+
+def _eingaben(auswertungen):
+    return {a.modul: [os.path.basename(p) for p in a.eingaben] for a in auswertungen}
+
+
+def test_kontoabgleich_ohne_jahresordner_nur_dateien_des_jahres(tmp_path):
+    _dateien(
+        tmp_path / "kontoabgleich",
+        "GLS_Konto_2024-12.csv", "GLS_Buchhaltung_2024-12.xlsx",
+        "GLS_Konto_2025-01.csv", "GLS_Buchhaltung_2025-01.xlsx",
+        "Paypal_Konto.csv", "Paypal_Buchhaltung.xlsx",
+    )
+    with protokoll.capture(protokoll.SUMMARY) as buf:
+        eingaben = _eingaben(jahresabschluss.finde_auswertungen(str(tmp_path), "2025"))
+    assert eingaben == {
+        "kontoabgleich_gls": ["GLS_Buchhaltung_2025-01.xlsx", "GLS_Konto_2025-01.csv"],
+        "kontoabgleich_paypal": ["Paypal_Buchhaltung.xlsx", "Paypal_Konto.csv"],
+    }
+    text = buf.getvalue()
+    assert "2 Datei(en) anderer Jahre übersprungen" in text
+    assert "Paypal_Buchhaltung.xlsx, Paypal_Konto.csv ohne Jahr im Dateinamen" in text
+    assert os.path.join(str(tmp_path), "kontoabgleich") in text
+
+    # Für 2024 nur die Dezember-Dateien von GLS
+    assert _eingaben(jahresabschluss.finde_auswertungen(str(tmp_path), "2024"))["kontoabgleich_gls"] == [
+        "GLS_Buchhaltung_2024-12.xlsx", "GLS_Konto_2024-12.csv",
+    ]
+
+
+def test_kontoabgleich_jahresordner_ungefiltert(tmp_path):
+    _dateien(tmp_path / "kontoabgleich", "GLS_Konto_2025-01.csv", "GLS_Buchhaltung_2025-01.xlsx")
+    _dateien(tmp_path / "kontoabgleich" / "2025", "GLS_Konto.csv", "GLS_Buchhaltung.xlsx")
+    with protokoll.capture(protokoll.SUMMARY) as buf:
+        eingaben = _eingaben(jahresabschluss.finde_auswertungen(str(tmp_path), "2025"))
+    assert eingaben == {"kontoabgleich_gls": ["GLS_Buchhaltung.xlsx", "GLS_Konto.csv"]}
+    assert buf.getvalue() == ""
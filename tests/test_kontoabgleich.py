@@ -0,0 +1,314 @@
+"""Bausteine des Kontoabgleichs (kontoabgleich_common)."""
+
+import os
+import sys
+from datetime import date, datetime
+
+from openpyxl import Workbook, load_workbook
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kontoabgleich_common as kc  # noqa: E402
+
+
+def test_iter_buchhaltung(tmp_path):
+    pfad = tmp_path / "Buchhaltung.xlsx"
+    wb = Workbook()
+    ws = wb.active
+    # Spalten in anderer Reihenfolge und mit einer zusätzlichen Spalte
+    ws.append(["Beleg", kc.SPALTE_TEXT, kc.SPALTE_HABEN, kc.SPALTE_DATUM, kc.SPALTE_SOLL])
+    ws.append([None, "Anfangssaldo", None, None, 1000])
+    ws.append([1, "Miete", 850.5, datetime(2025, 3, 3), None])
+    ws.append([2, "Spende", None, datetime(2025, 3, 4), 0.1 + 0.2])
+    ws.append([3, None, None, datetime(2025, 3, 5), 12])
+    ws.append([4, "ohne Betrag", None, datetime(2025, 3, 6), None])
+    ws.append([5, "Text statt Datum", None, "07.03.2025", 5])
+    wb.save(pfad)
+
+    assert list(kc.iter_buchhaltung(pfad)) == [
+        (date(2025, 3, 3).toordinal(), -85050, "Miete"),
+        (date(2025, 3, 4).toordinal(), 30, "Spende"),
+        (date(2025, 3, 5).toordinal(), 1200, ""),
+    ]
+    bh = kc.lese_buchhaltung(pfad)
+    assert bh.cent.tolist() == [-85050, 30, 1200]
+    assert bh.datum("datum", [0, 2]) == [date(2025, 3, 3), date(2025, 3, 5)]
+    assert bh.text([1]) == ["Spende"]
+
+
+# --- Abgleich auf Cent-Spalten und gepackten Schlüsseln ---------------------
+
+import random  # noqa: E402
+from collections import defaultdict  # noqa: E402
+
+import numpy as np  # noqa: E402
+
+import kontoabgleich_gls  # noqa: E402
+
+TAG = date(2025, 3, 1).toordinal()
+
+
+def _paare(i, j):
+    return sorted(zip(i.tolist(), j.tolist()))
+
+
+def _referenz_paare(links, rechts):
+    """k-tes Vorkommen eines Schlüssels links mit dem k-ten rechts, wie früher mit dict und Listen."""
+    rechts_nach_schluessel = defaultdict(list)
+    for j, schluessel in enumerate(rechts):
+        rechts_nach_schluessel[schluessel].append(j)
+    gesehen = defaultdict(int)
+    paare = []
+    for i, schluessel in enumerate(links):
+        k = gesehen[schluessel]
+        gesehen[schluessel] += 1
+        if k < len(rechts_nach_schluessel[schluessel]):
+            paare.append((i, rechts_nach_schluessel[schluessel][k]))
+    return paare
+
+
+def test_schluessel_paare_gleiche_betraege_am_selben_tag():
+    # Dreimal 10,00 € am selben Tag im Konto, zweimal in der Buchhaltung
+    konto = kc.Buchungen([1000, 1000, 500, 1000], list("abcd"), datum=[TAG] * 4)
+    bh = kc.Buchungen([1000, 500, 1000, 500], list("wxyz"), datum=[TAG] * 4)
+    i, j = kc.schluessel_paare(konto.schluessel("datum"), bh.schluessel("datum"))
+    assert i.tolist() == sorted(i.tolist())
+    assert _paare(i, j) == [(0, 0), (1, 2), (2, 1)]
+
+
+def test_schluessel_paare_wie_referenz():
+    rng = random.Random(3)
+    for _ in range(50):
+        links = [(rng.randrange(TAG, TAG + 5), rng.choice([-2500, -1, 0, 1, 2500])) for _ in range(60)]
+        rechts = [(rng.randrange(TAG, TAG + 5), rng.choice([-2500, -1, 0, 1, 2500])) for _ in range(60)]
+        konto = kc.Buchungen([c for _, c in links], [""] * 60, datum=[t for t, _ in links])
+        bh = kc.Buchungen([c for _, c in rechts], [""] * 60, datum=[t for t, _ in rechts])
+        i, j = kc.schluessel_paare(konto.schluessel("datum"), bh.schluessel("datum"))
+        assert _paare(i, j) == _referenz_paare(links, rechts)
+
+
+def test_schluessel_negative_cent():
+    grenze = (1 << 41) - 1
+    cent = np.array([-grenze, -100, -1, 0, 1, 100, grenze, -1, 1], dtype=np.int64)
+    tage = np.array([TAG] * 7 + [TAG + 1, TAG - 1], dtype=np.int32)
+    schluessel = kc._pack(tage, cent)
+    # Verschieden, wo (Tag, Cent) verschieden sind, und in derselben Ordnung
+    assert len(set(schluessel.tolist())) == len(cent)
+    assert np.argsort(schluessel).tolist() == sorted(range(len(cent)), key=lambda k: (tage[k], cent[k]))
+
+
+def test_rang():
+    assert kc._rang(np.array([5, 3, 5, 5, 3, 7])).tolist() == [0, 0, 1, 2, 1, 0]
+
+
+def test_toleranz_paare_naechstes_datum():
+    # Konto am 10., Buchhaltung am 8., 11. und 13.: der 11. ist am nächsten
+    i, j = kc.toleranz_paare(
+        np.array([100]), [np.array([TAG + 10])],
+        np.array([100, 100, 100]), np.array([TAG + 8, TAG + 11, TAG + 13]), 3,
+    )
+    assert _paare(i, j) == [(0, 1)]
+    # Zwei Kontobuchungen wollen denselben Tag: der kleinere Abstand gewinnt,
+    # die andere nimmt die nächstbeste Buchung
+    i, j = kc.toleranz_paare(
+        np.array([100, 100]), [np.array([TAG + 12, TAG + 11])],
+        np.array([100, 100]), np.array([TAG + 11, TAG + 14]), 3,
+    )
+    assert _paare(i, j) == [(0, 1), (1, 0)]
+    # Anderer Betrag oder zu weit entfernt: kein Paar
+    i, j = kc.toleranz_paare(
+        np.array([100, -100]), [np.array([TAG, TAG])],
+        np.array([-100, 100]), np.array([TAG + 5, TAG + 4]), 3,
+    )
+    assert _paare(i, j) == []
+
+
+def test_toleranz_paare_wie_alle_paare_vergleichen():
+    """Gleiches Ergebnis wie der Vergleich aller Paare, nach Abstand vergeben."""
+    rng = random.Random(7)
+    for _ in range(30):
+        n, m, tage = rng.randrange(1, 40), rng.randrange(1, 40), rng.randrange(1, 4)
+        konto_cent = np.array([rng.choice([-300, 100, 200]) for _ in range(n)])
+        felder = [np.array([TAG + rng.randrange(15) for _ in range(n)]) for _ in range(2)]
+        bh_cent = np.array([rng.choice([-300, 100, 200]) for _ in range(m)])
+        bh_tage = np.array([TAG + rng.randrange(15) for _ in range(m)])
+
+        kandidaten = []
+        for a in range(n):
+            for b in range(m):
+                abstand = min(abs(int(f[a]) - int(bh_tage[b])) for f in felder)
+                if konto_cent[a] == bh_cent[b] and abstand <= tage:
+                    kandidaten.append((abstand, a, b))
+        erwartet, links, rechts = [], set(), set()
+        for _, a, b in sorted(kandidaten):
+            if a not in links and b not in rechts:
+                links.add(a)
+                rechts.add(b)
+                erwartet.append((a, b))
+
+        i, j = kc.toleranz_paare(konto_cent, felder, bh_cent, bh_tage, tage)
+        assert _paare(i, j) == sorted(erwartet)
+
+
+def test_gleicher_monat_monatsgrenze():
+    tag = lambda j, m, t: date(j, m, t).toordinal()  # noqa: E731
+    konto = kc.Buchungen(
+        [100, 200, 300, 400],
+        list("abcd"),
+        buchungstag=[tag(2025, 1, 31), tag(2025, 2, 1), tag(2024, 12, 31), tag(2025, 12, 1)],
+    )
+    bh = kc.Buchungen(
+        [100, 200, 300, 400],
+        list("wxyz"),
+        datum=[tag(2025, 2, 1), tag(2025, 2, 28), tag(2025, 12, 31), tag(2025, 12, 31)],
+    )
+    treffer, nur_konto, nur_bh = kc.Abgleich([kc.GleicherMonat("buchungstag")])(konto, bh)
+    assert _paare(*treffer[kc.DATUM_ABWEICHEND]) == [(1, 1), (3, 3)]
+    assert nur_konto.tolist() == [0, 2]
+    assert nur_bh.tolist() == [0, 2]
+
+
+def _referenz_gls(gls, bh):
+    """Der frühere GLS-Abgleich: dicts über (Buchungstag, Betrag), dann (Valutadatum, Betrag)."""
+    gls_map1, bh_map1 = defaultdict(list), defaultdict(list)
+    for i, (buchungstag, _, betrag, _) in enumerate(gls):
+        gls_map1[(buchungstag, betrag)].append(i)
+    for j, (datum, betrag, _) in enumerate(bh):
+        bh_map1[(datum, betrag)].append(j)
+    paare, gls_rest, bh_rest = [], set(range(len(gls))), set(range(len(bh)))
+    for key, gls_liste in gls_map1.items():
+        for i, j in zip(gls_liste, bh_map1.get(key, [])):
+            paare.append((i, j))
+            gls_rest.discard(i)
+            bh_rest.discard(j)
+    gls_map2, bh_map2 = defaultdict(list), defaultdict(list)
+    for i in sorted(gls_rest):
+        gls_map2[(gls[i][1], gls[i][2])].append(i)
+    for j in sorted(bh_rest):
+        bh_map2[(bh[j][0], bh[j][1])].append(j)
+    for key, gls_liste in gls_map2.items():
+        for i, j in zip(gls_liste, bh_map2.get(key, [])):
+            paare.append((i, j))
+            gls_rest.discard(i)
+            bh_rest.discard(j)
+    zeilen = sorted(
+        (bh[j][0], gls[i][0], gls[i][1], gls[i][2], gls[i][3], bh[j][2]) for i, j in paare
+    )
+    nur_gls = sorted((None, g[0], g[1], g[2], g[3], "") for g in (gls[i] for i in gls_rest))
+    nur_bh = sorted((b[0], None, None, b[1], "", b[2]) for b in (bh[j] for j in bh_rest))
+    return nur_gls, nur_bh, zeilen
+
+
+def test_gls_abgleich_wie_referenz():
+    rng = random.Random(11)
+    tag = lambda: date(2025, 3, rng.randrange(1, 10))  # noqa: E731
+    betrag = lambda: rng.choice([-1234.56, -0.01, 0.01, 19.99, 19.99, 100.0])  # noqa: E731
+    gls = [(t, t.replace(day=min(t.day + rng.randrange(3), 28)), betrag(), f"g{k}")
+           for k, t in enumerate(tag() for _ in range(300))]
+    bh = [(tag(), betrag(), f"b{k}") for k in range(300)]
+    konto = kc.Buchungen(
+        [round(g[2] * 100) for g in gls], [g[3] for g in gls],
+        buchungstag=[g[0].toordinal() for g in gls], valutadatum=[g[1].toordinal() for g in gls],
+    )
+    buchhaltung = kc.Buchungen(
+        [round(b[1] * 100) for b in bh], [b[2] for b in bh], datum=[b[0].toordinal() for b in bh],
+    )
+    nur_gls, nur_bh, uebereinstimmend, abweichend = kontoabgleich_gls.abgleich(konto, buchhaltung)
+    erwartet = _referenz_gls(gls, bh)
+    assert abweichend == []
+    assert (sorted(nur_gls, key=repr), sorted(nur_bh, key=repr), sorted(uebereinstimmend, key=repr)) == tuple(
+        sorted(liste, key=repr) for liste in erwartet
+    )
+
+
+def test_paypal_datum_buchhaltung_nur_mit_toleranz(tmp_path):
+    import kontoabgleich_paypal
+
+    konto = kc.Buchungen([100, 200], ["a", "b"], datum=[TAG, TAG])
+    bh = kc.Buchungen([100, 200], ["x", "y"], datum=[TAG, TAG + 2])
+    for optionen, breite in (({}, 4), ({"toleranz": 3}, 5), ({"monat": True}, 5)):
+        ergebnis = kontoabgleich_paypal.abgleich(konto, bh, **optionen)
+        assert {len(zeile) for liste in ergebnis for zeile in liste} == {breite}
+        pfad = tmp_path / "ergebnis.xlsx"
+        kontoabgleich_paypal.schreibe_ergebnis(pfad, *ergebnis, **optionen)
+        kopf = next(load_workbook(pfad).active.iter_rows(values_only=True))
+        assert ("Datum Buchhaltung" in kopf) == (breite == 5)
+        # Ohne Status-Spalte, die aus dem Block kommt
+        assert len(kopf) == breite + 1
+
+
+# --- Mehrere Dateipaare ------------------------------------------------------
+
+import pytest  # noqa: E402
+
+import protokoll  # noqa: E402
+
+
+def test_dateipaare_ein_paar():
+    assert kc.dateipaare(["a/Auszug.csv", "b/Export.xlsx"], "gls", "GLS") == [
+        ("gls", "", "a/Auszug.csv", "b/Export.xlsx"),
+    ]
+
+
+def test_dateipaare_nach_name_und_zeitraum():
+    pfade = [
+        "GLS_Konto_2025-03.csv", "GLS_Buchhaltung_2025-04.xlsx",
+        "GLS_Konto_2025-04.csv", "GLS_Buchhaltung_2025-03.xlsx",
+        "Spenden_Konto.csv", "Spenden_Buchhaltung.xlsx",
+    ]
+    assert kc.dateipaare(pfade, "gls", "GLS") == [
+        ("gls", "2025-03", "GLS_Konto_2025-03.csv", "GLS_Buchhaltung_2025-03.xlsx"),
+        ("gls", "2025-04", "GLS_Konto_2025-04.csv", "GLS_Buchhaltung_2025-04.xlsx"),
+        ("spenden", "", "Spenden_Konto.csv", "Spenden_Buchhaltung.xlsx"),
+    ]
+    # Nur über den Zeitraum, wenn die Namen nicht zusammenpassen
+    assert kc.dateipaare(["Bank_03-2025.csv", "BH_2025-03.xlsx", "Bank_2025-04.csv", "BH_2025-04.xlsx"], "gls", "GLS") == [
+        ("bank", "2025-03", "Bank_03-2025.csv", "BH_2025-03.xlsx"),
+        ("bank", "2025-04", "Bank_2025-04.csv", "BH_2025-04.xlsx"),
+    ]
+
+
+def test_dateipaare_anzahl_passt_nicht():
+    with pytest.raises(OSError, match="genau eine GLS-Buchhaltungs-XLSX"):
+        kc.dateipaare(["GLS_Konto_2025-03.csv", "GLS_Konto_2025-04.csv", "GLS_Buchhaltung.xlsx"], "gls", "GLS")
+    with pytest.raises(OSError, match="genau eine PayPal-Buchhaltungs-XLSX"):
+        kc.dateipaare(["Paypal_Buchhaltung.xlsx"], "paypal", "PayPal")
+
+
+def test_dateipaare_ohne_eindeutige_zuordnung():
+    with pytest.raises(OSError, match="GLS_Konto_2025-05.csv") as info:
+        kc.dateipaare(
+            ["GLS_Konto_2025-03.csv", "GLS_Buchhaltung_2025-03.xlsx",
+             "GLS_Konto_2025-05.csv", "Spenden_Buchhaltung_2025-06.xlsx"],
+            "gls", "GLS",
+        )
+    assert "GLS_Konto_2025-03.csv" not in str(info.value)
+
+
+def test_stapel_parallel_mit_protokoll(tmp_path):
+    import kontoabgleich_gls
+
+    pfade = []
+    for monat in ("01", "02"):
+        csv = tmp_path / f"GLS_Konto_2025-{monat}.csv"
+        csv.write_text(
+            "Buchungstag;Valutadatum;Verwendungszweck;Betrag\n"
+            f"03.{monat}.2025;03.{monat}.2025;Miete {monat};-500,00\n"
+            f"04.{monat}.2025;05.{monat}.2025;Spende {monat};25,00\n",
+            encoding="utf-8",
+        )
+        xlsx = tmp_path / f"GLS_Buchhaltung_2025-{monat}.xlsx"
+        wb = Workbook()
+        wb.active.append([kc.SPALTE_DATUM, kc.SPALTE_TEXT, kc.SPALTE_SOLL, kc.SPALTE_HABEN])
+        wb.active.append([datetime(2025, int(monat), 3), f"Miete {monat}", None, 500])
+        wb.save(xlsx)
+        pfade += [str(csv), str(xlsx)]
+
+    with protokoll.capture(protokoll.SUMMARY) as buf:
+        ausgabe = kontoabgleich_gls.process(pfade, str(tmp_path / "ergebnis.xlsx"), workers=2)
+    text = buf.getvalue()
+    # Das Protokoll der Arbeitsprozesse kommt im aufrufenden Prozess an
+    for monat in ("01", "02"):
+        assert f"Lese GLS-Konto-CSV: {tmp_path / f'GLS_Konto_2025-{monat}.csv'}" in text
+    assert text.count("Übereinstimmend:  1") == 2
+    assert load_workbook(ausgabe).sheetnames == ["Übersicht", "gls 2025-01", "gls 2025-02"]
@@ -0,0 +1,88 @@
+"""Fortlaufender Kontoabgleich mit gespeichertem Stand (kontoabgleich_stand)."""
+
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import kontoabgleich_common as kc  # noqa: E402
+import kontoabgleich_stand  # noqa: E402
+import protokoll  # noqa: E402
+
+TAG = date(2025, 3, 1).toordinal()
+
+
+def _konto(*zeilen):
+    """Kontobuchungen aus (Tag, Cent, Text); Valutadatum einen Tag später."""
+    return kc.Buchungen(
+        [c for _, c, _ in zeilen], [t for _, _, t in zeilen],
+        buchungstag=[TAG + d for d, _, _ in zeilen], valutadatum=[TAG + d + 1 for d, _, _ in zeilen],
+    )
+
+
+def _bh(*zeilen):
+    return kc.Buchungen([c for _, c, _ in zeilen], [t for _, _, t in zeilen], datum=[TAG + d for d, _, _ in zeilen])
+
+
+def _lauf(pfad, konto, bh):
+    with kontoabgleich_stand.oeffne(pfad, "gls") as stand:
+        offen_konto, offen_bh = stand.fortschreiben(konto, bh)
+        treffer, nur_konto, nur_bh = kc.Abgleich([kc.GleichesDatum("buchungstag", "Buchungstag")])(offen_konto, offen_bh)
+        stand.verbuche(treffer)
+        return offen_konto, offen_bh, nur_konto, nur_bh
+
+
+def _anzahl(pfad):
+    with kontoabgleich_stand.Stand(pfad, "gls") as stand:
+        return stand._db.execute("SELECT seite, COUNT(*) FROM buchung GROUP BY seite ORDER BY seite").fetchall()
+
+
+def test_nur_buchungen_hinter_dem_stand(tmp_path):
+    pfad = str(tmp_path / "stand.sqlite")
+    maerz = [(0, -5000, "Miete"), (3, 1200, "Spende"), (5, 999, "Beitrag")]
+    _, _, nur_konto, nur_bh = _lauf(pfad, _konto(*maerz), _bh((0, -5000, "Miete")))
+    assert len(nur_konto) == 2 and len(nur_bh) == 0
+
+    # Überlappender Export: nur die Buchung nach dem 6.3. ist neu, die offenen
+    # Posten kommen aus dem Stand
+    offen_konto, offen_bh, nur_konto, nur_bh = _lauf(
+        pfad, _konto(*maerz, (8, 700, "Neu")), _bh((0, -5000, "Miete"), (3, 1200, "Spende")),
+    )
+    assert offen_konto.texte.tolist() == ["Spende", "Beitrag", "Neu"]
+    assert offen_bh.texte.tolist() == ["Spende"]
+    assert offen_konto.texte[nur_konto].tolist() == ["Beitrag", "Neu"]
+    assert _anzahl(pfad) == [(0, 4), (1, 2)]
+
+    # Derselbe Export noch einmal: nichts Neues
+    offen_konto, offen_bh, _, _ = _lauf(pfad, _konto(*maerz, (8, 700, "Neu")), _bh((3, 1200, "Spende")))
+    assert offen_konto.texte.tolist() == ["Beitrag", "Neu"]
+    assert len(offen_bh) == 0
+    assert _anzahl(pfad) == [(0, 4), (1, 2)]
+
+
+def test_gleiche_buchungen_am_tag_des_stands(tmp_path):
+    pfad = str(tmp_path / "stand.sqlite")
+    # Der erste Export endet mitten im 6.3. nach einer von zwei gleichen Gebühren
+    _lauf(pfad, _konto((2, 500, "A"), (5, -250, "Gebühr")), _bh())
+    offen_konto, _, _, _ = _lauf(
+        pfad, _konto((5, -250, "Gebühr"), (5, -250, "Gebühr"), (5, 100, "B"), (6, -250, "Gebühr")), _bh(),
+    )
+    assert offen_konto.texte.tolist() == ["A", "Gebühr", "Gebühr", "B", "Gebühr"]
+    # Ein späterer Export, der innerhalb der Historie beginnt, legt nichts doppelt an
+    offen_konto, _, _, _ = _lauf(pfad, _konto((5, -250, "Gebühr"), (6, -250, "Gebühr")), _bh())
+    assert len(offen_konto) == 5
+
+
+def test_rueckdatierte_buchung_wird_gemeldet(tmp_path):
+    pfad = str(tmp_path / "stand.sqlite")
+    _lauf(pfad, _konto(), _bh((1, 100, "A"), (4, 200, "B")))
+    with protokoll.capture(protokoll.SUMMARY) as buf:
+        _, offen_bh, _, _ = _lauf(pfad, _konto(), _bh((1, 100, "A"), (2, 300, "rückdatiert"), (4, 200, "B"), (9, 400, "C")))
+    assert offen_bh.texte.tolist() == ["A", "B", "C"]
+    assert "Buchhaltung: 1 Buchung(en) zwischen 02.03.2025 und dem Stand vom 05.03.2025 fehlen" in buf.getvalue()
+
+
+def test_ohne_stand():
+    with kontoabgleich_stand.oeffne(None, "gls") as stand:
+        assert stand is None
@@ -0,0 +1,74 @@
+"""Der PDF-Cache darf die Textextraktion nie scheitern lassen."""
+
+import os
+import sys
+
+import pytest
+
+HIER = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HIER))
+sys.path.insert(0, os.path.join(os.path.dirname(HIER), "benchmarks"))
+
+import pdf_text  # noqa: E402
+import testdaten_pdf  # noqa: E402
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    return testdaten_pdf.erzeuge_lohnjournal(str(tmp_path / "pdf"), 3)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    ordner = tmp_path / "cache"
+    monkeypatch.setattr(pdf_text, "CACHE_DIR", str(ordner))
+    monkeypatch.setattr(pdf_text, "CACHE_MAX_BYTES", 1024 * 1024)
+    return ordner
+
+
+def test_cache_treffer(pdf, cache):
+    erwartet = pdf_text.extract_pages(pdf)
+    assert list(pdf_text.iter_pages(pdf)) == erwartet
+    assert [p.name for p in cache.iterdir()] == [pdf_text.cache_key(pdf) + pdf_text.CACHE_SUFFIX]
+    assert list(pdf_text.iter_pages(pdf)) == erwartet
+
+
+def test_cache_verzeichnis_nicht_anlegbar(pdf, tmp_path, monkeypatch):
+    datei = tmp_path / "keine_ordner"
+    datei.write_text("")
+    monkeypatch.setattr(pdf_text, "CACHE_DIR", str(datei / "cache"))
+    monkeypatch.setattr(pdf_text, "CACHE_MAX_BYTES", 1024 * 1024)
+    erwartet = pdf_text.extract_pages(pdf)
+    assert list(pdf_text.iter_pages(pdf)) == erwartet
+    assert pdf_text.get_pages_parallel([pdf, pdf], workers=2) == [erwartet, erwartet]
+
+
+@pytest.mark.parametrize("lesen", [
+    lambda pdf: list(pdf_text.iter_pages(pdf)),
+    lambda pdf: pdf_text.get_pages_parallel([pdf, pdf], workers=2)[0],
+])
+def test_cache_nicht_uebernehmbar(pdf, cache, monkeypatch, lesen):
+    def voll(*args):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(pdf_text.os, "replace", voll)
+    assert lesen(pdf) == pdf_text.extract_pages(pdf)
+    # Keine liegen gebliebenen temporären Dateien
+    assert list(cache.iterdir()) == []
+
+
+def test_verdraengter_eintrag_ist_fehlschlag(pdf, cache, monkeypatch):
+    erwartet = pdf_text.extract_pages(pdf)
+    list(pdf_text.iter_pages(pdf))
+    eintrag = cache / (pdf_text.cache_key(pdf) + pdf_text.CACHE_SUFFIX)
+    oeffnen = open
+
+    def verdraengt(pfad, *args, **kwargs):
+        # Ein anderer Prozess löscht den Eintrag kurz vor dem Öffnen
+        if str(pfad) == str(eintrag) and eintrag.exists():
+            eintrag.unlink()
+        return oeffnen(pfad, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", verdraengt)
+    assert list(pdf_text.iter_pages(pdf)) == erwartet
+    assert eintrag.exists()